@@ -0,0 +1,120 @@
+"""
+Offline benchmark suite: no OpenAI, no Weaviate.
+
+    pytest benchmarks                          # 1k-row employee table
+    pytest benchmarks --bench-sizes=1k,100k,1m # larger tables (slow to build)
+    pytest benchmarks --bench-fail=0.25        # fail if any p50 is >25% slower than the last run
+
+Each run is saved to .benchmarks/<timestamp>_<git rev>.json and compared with
+the previous run found there.
+"""
+
+import json
+import os
+from pathlib import Path
+
+import pytest
+
+import harness
+
+# core's own data source (the benchmarks swap in one per table size) stays out of the source tree.
+os.environ.setdefault("DATA_DB_PATH", ":memory:")
+
+BENCH_DIR = Path(__file__).resolve().parents[1] / ".benchmarks"
+_SIZES = {"k": 1_000, "m": 1_000_000}
+
+
+def _size(token: str) -> int:
+    token = token.strip().lower()
+    return int(token[:-1]) * _SIZES[token[-1]] if token[-1] in _SIZES else int(token)
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("bench")
+    group.addoption("--bench-sizes", default=os.getenv("BENCH_SIZES", "1k"),
+                    help="comma separated employee table sizes, e.g. 1k,100k,1m")
+    group.addoption("--bench-rounds", type=int, default=int(os.getenv("BENCH_ROUNDS", "200")),
+                    help="timed calls per micro benchmark")
+    group.addoption("--bench-dir", default=str(BENCH_DIR), help="where runs are saved")
+    group.addoption("--bench-compare", default="last",
+                    help="baseline run to compare with: 'last', a path, or 'none'")
+    group.addoption("--bench-fail", type=float, default=None,
+                    help="fail the session if any p50 regressed by more than this fraction")
+    group.addoption("--bench-no-save", action="store_true", help="do not write the run to --bench-dir")
+
+
+def pytest_generate_tests(metafunc):
+    if "rows" in metafunc.fixturenames:
+        tokens = metafunc.config.getoption("--bench-sizes").split(",")
+        metafunc.parametrize("rows", [_size(t) for t in tokens], ids=[t.strip() for t in tokens],
+                             scope="session")
+
+
+class Recorder:
+    def __init__(self, rounds: int) -> None:
+        self.rounds = rounds
+        self.results = {}
+
+    def record(self, name: str, stats, **extra):
+        self.results[name] = {**stats, **extra}
+        return stats
+
+
+@pytest.fixture(scope="session")
+def recorder(request):
+    rec = Recorder(request.config.getoption("--bench-rounds"))
+    request.config._bench_recorder = rec
+    return rec
+
+
+@pytest.fixture
+def bench(recorder, request):
+    """bench(fn, rounds=None, setup=None) times fn and records it under the test id."""
+    def run(fn, rounds=None, setup=None, name=None, is_async=False, **extra):
+        measure = harness.measure_async if is_async else harness.measure
+        stats = measure(fn, rounds or recorder.rounds, setup=setup)
+        return recorder.record(name or request.node.name, stats, **extra)
+
+    return run
+
+
+def pytest_sessionfinish(session, exitstatus):
+    config = session.config
+    rec = getattr(config, "_bench_recorder", None)
+    if rec is None or not rec.results:
+        return
+    out_dir = Path(config.getoption("--bench-dir"))
+    saved = None
+    if not config.getoption("--bench-no-save"):
+        saved = harness.save(rec.results, out_dir, {
+            "sizes": config.getoption("--bench-sizes"),
+            "data_backend": os.getenv("DATA_BACKEND", "sqlite"),
+        })
+    which = config.getoption("--bench-compare")
+    baseline = None if which == "none" else harness.latest(out_dir, exclude=saved) if which == "last" else Path(which)
+    rows = harness.compare(rec.results, json.loads(baseline.read_text())["results"]) if baseline else []
+    config._bench_report = (saved, baseline, rows)
+    limit = config.getoption("--bench-fail")
+    if limit is not None and any(r["change"] > limit for r in rows) and exitstatus == 0:
+        session.exitstatus = 1
+
+
+def pytest_terminal_summary(terminalreporter, config):
+    rec = getattr(config, "_bench_recorder", None)
+    if rec is None or not rec.results:
+        return
+    tr = terminalreporter
+    tr.section("benchmarks (ms)")
+    tr.write_line(f"{'name':<58}{'p50':>10}{'p95':>10}{'p99':>10}{'ops/s':>12}")
+    for name, r in sorted(rec.results.items()):
+        tr.write_line(f"{name:<58}{r['p50_ms']:>10.3f}{r['p95_ms']:>10.3f}{r['p99_ms']:>10.3f}"
+                      f"{r['ops_per_sec']:>12.0f}")
+    saved, baseline, rows = getattr(config, "_bench_report", (None, None, []))
+    if saved is not None:
+        tr.write_line(f"saved {saved}")
+    if rows:
+        tr.write_line(f"p50 vs {baseline.name}:")
+        for r in rows:
+            flag = "  REGRESSION" if config.getoption("--bench-fail") is not None \
+                and r["change"] > config.getoption("--bench-fail") else ""
+            tr.write_line(f"  {r['name']:<56}{r['old']:>10.3f} -> {r['new']:>10.3f} ({r['change']:+.1%}){flag}")
@@ -0,0 +1,104 @@
+"""Minimal timing harness: latency percentiles per call, saved as JSON for run-to-run comparison."""
+
+import asyncio
+import json
+import platform
+import subprocess
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import numpy as np
+
+
+def summarize(samples_ns: List[int]) -> Dict[str, float]:
+    ms = np.asarray(samples_ns, dtype=np.float64) / 1e6
+    total_s = ms.sum() / 1000
+    return {
+        "rounds": int(ms.size),
+        "mean_ms": float(ms.mean()),
+        "min_ms": float(ms.min()),
+        "p50_ms": float(np.percentile(ms, 50)),
+        "p95_ms": float(np.percentile(ms, 95)),
+        "p99_ms": float(np.percentile(ms, 99)),
+        "max_ms": float(ms.max()),
+        "ops_per_sec": float(ms.size / total_s) if total_s > 0 else float("inf"),
+    }
+
+
+def measure(fn: Callable[[], Any], rounds: int, warmup: int = 5,
+            setup: Optional[Callable[[], Any]] = None) -> Dict[str, float]:
+    """Time `rounds` calls of `fn`; `setup` runs before each call, outside the timed region."""
+    for _ in range(warmup):
+        if setup is not None:
+            setup()
+        fn()
+    samples = []
+    for _ in range(rounds):
+        if setup is not None:
+            setup()
+        t0 = time.perf_counter_ns()
+        fn()
+        samples.append(time.perf_counter_ns() - t0)
+    return summarize(samples)
+
+
+def measure_async(fn: Callable[[], Awaitable[Any]], rounds: int, warmup: int = 5,
+                  setup: Optional[Callable[[], Any]] = None) -> Dict[str, float]:
+    """Like measure(), with every call awaited on one event loop."""
+    async def go():
+        for _ in range(warmup):
+            if setup is not None:
+                setup()
+            await fn()
+        samples = []
+        for _ in range(rounds):
+            if setup is not None:
+                setup()
+            t0 = time.perf_counter_ns()
+            await fn()
+            samples.append(time.perf_counter_ns() - t0)
+        return samples
+
+    return summarize(asyncio.run(go()))
+
+
+def _git_rev() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=Path(__file__).parent,
+                              capture_output=True, text=True, timeout=5).stdout.strip() or "unknown"
+    except (OSError, subprocess.SubprocessError):
+        return "unknown"
+
+
+def save(results: Dict[str, Dict[str, Any]], out_dir: Path, meta: Dict[str, Any]) -> Path:
+    """Write one run as <out_dir>/<timestamp>_<git rev>.json and return its path."""
+    out_dir.mkdir(parents=True, exist_ok=True)
+    rev = _git_rev()
+    path = out_dir / f"{datetime.now().strftime('%Y%m%d-%H%M%S')}_{rev}.json"
+    doc = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "git_rev": rev,
+        "python": platform.python_version(),
+        "machine": f"{platform.system()} {platform.machine()}",
+        **meta,
+        "results": results,
+    }
+    path.write_text(json.dumps(doc, indent=2, sort_keys=True))
+    return path
+
+
+def latest(out_dir: Path, exclude: Optional[Path] = None) -> Optional[Path]:
+    runs = sorted(p for p in out_dir.glob("*.json") if p != exclude)
+    return runs[-1] if runs else None
+
+
+def compare(current: Dict[str, Dict[str, Any]], baseline: Dict[str, Dict[str, Any]],
+            metric: str = "p50_ms") -> List[Dict[str, Any]]:
+    """Per benchmark present in both runs: baseline, current and relative change of `metric`."""
+    rows = []
+    for name in sorted(current.keys() & baseline.keys()):
+        old, new = baseline[name][metric], current[name][metric]
+        rows.append({"name": name, "old": old, "new": new, "change": (new - old) / old if old else 0.0})
+    return rows
@@ -0,0 +1,49 @@
+"""Synthetic employees.csv of any size, with the same columns and a real reporting tree."""
+
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+DEPARTMENTS = np.array(["Engineering", "Sales", "Finance", "HR", "Marketing", "Support"])
+CITIES = np.array(["San Francisco", "Austin", "New York", "Seattle", "Chicago", "Denver"])
+FANOUT = 8  # direct reports per manager
+
+
+def manager_of(employee_id: int) -> int:
+    """Manager of a synthetic employee (employee 1 has none)."""
+    return (employee_id - 2) // FANOUT + 1
+
+
+def employees(n: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    ids = np.arange(1, n + 1)
+    managers = (ids - 2) // FANOUT + 1
+    is_manager = ids <= (n - 2) // FANOUT + 1
+    dept = DEPARTMENTS[rng.integers(0, len(DEPARTMENTS), n)]
+    role = np.where(is_manager, np.char.add(dept, " Manager"), "Engineer")
+    role = np.where(dept == "HR", np.where(is_manager, "HR Manager", "HR"), role)
+    return pd.DataFrame({
+        "employee_id": ids,
+        "name": pd.Series(ids).map("Employee {}".format),
+        "email": pd.Series(ids).map("e{}@company.com".format),
+        "department": dept,
+        "role": role,
+        "manager_id": pd.Series(managers, dtype="Int64").mask(ids == 1),
+        "salary": rng.integers(60_000, 250_000, n),
+        "hire_date": "2022-01-01",
+        "performance_rating": np.round(rng.uniform(2.5, 5.0, n), 1),
+        "performance_summary": "Meets expectations.",
+        "ssn_last4": rng.integers(1000, 9999, n),
+        "home_city": CITIES[rng.integers(0, len(CITIES), n)],
+    })
+
+
+def write_data_dir(src: Path, dst: Path, n: int, seed: int = 0) -> Path:
+    """Copy the real data dir into `dst`, replacing employees.csv with `n` synthetic rows."""
+    dst.mkdir(parents=True, exist_ok=True)
+    for csv in Path(src).glob("*.csv"):
+        if csv.name != "employees.csv":
+            (dst / csv.name).write_bytes(csv.read_bytes())
+    employees(n, seed).to_csv(dst / "employees.csv", index=False)
+    return dst
@@ -0,0 +1,196 @@
+import asyncio
+import itertools
+from types import SimpleNamespace
+
+import pytest
+from llama_index.core.base.llms.types import ChatMessage, MessageRole, ToolCallBlock
+from llama_index.core.llms.mock import MockFunctionCallingLLM
+
+import synthetic
+
+HR = "e2@company.com"        # an "HR Manager" in every synthetic table
+MANAGER = "e1@company.com"   # root of the reporting tree
+REPORT = 2                   # a direct report of MANAGER
+
+
+@pytest.fixture(scope="session")
+def env(rows, tmp_path_factory):
+    """core wired to a synthetic employee table of `rows` rows, with fake RAG and a temp audit log."""
+    from basic.retrieval import WeaviateDirectRetriever
+    from basic.skills import core
+    from basic.skills.audit import AuditSink, SegmentedAuditStore
+    from basic.skills.datasource import PandasDataSource, SQLiteDataSource
+    from basic.skills.policy_notes import PolicyNotes
+    from basic.skills.reloader import FileReloader
+
+    root = tmp_path_factory.mktemp(f"bench-{rows}")
+    data = synthetic.write_data_dir(core.BASE / "data", root / "data", rows)
+    employees = FileReloader(data / "employees.csv", core._load_employees, interval=0)
+    snap = employees.current
+    source = (PandasDataSource(snap.emp, snap.directory) if core.os.getenv("DATA_BACKEND") == "pandas"
+              else SQLiteDataSource(data, root / "datasets.sqlite"))
+    notes = PolicyNotes()
+    for resource in core.RESOURCES:
+        for role in sorted(set(snap.emp["role"]) | core.RULE_ROLES):
+            notes.put(resource, role, "See policy.", "HR-1.1")
+    store = SegmentedAuditStore(root / "audit")
+    sink = AuditSink(store)
+    retriever = WeaviateDirectRetriever(_FakeClient(_policy_objects()), top_k=5)
+
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(core, "EMPLOYEES", employees)
+        mp.setattr(core, "EMP", snap.emp)
+        mp.setattr(core, "DIRECTORY", snap.directory)
+        mp.setattr(core, "DATA", source)
+        mp.setattr(core, "NOTES", notes)
+        mp.setattr(core, "AUDIT_STORE", store)
+        mp.setattr(core, "AUDIT", sink)
+        mp.setattr(core, "get_policy_query_engine", lambda: SimpleNamespace())
+        core.invalidate_decisions()
+        yield SimpleNamespace(core=core, rows=rows, sink=sink, retriever=retriever)
+        sink.close()
+        core.invalidate_decisions()
+
+
+def _policy_objects(n: int = 40):
+    return [SimpleNamespace(
+        uuid=f"uuid-{i}",
+        properties={"title": f"Policy {i}", "section": f"HR-{i}.1", "text": "Policy body. " * 40,
+                    "tags": ["hr"], "roles_allowed": ["HR"]},
+        metadata=SimpleNamespace(distance=i / n),
+    ) for i in range(n)]
+
+
+class _FakeClient:
+    """Weaviate client stand-in whose near_text returns the first `limit` canned objects."""
+
+    def __init__(self, objects) -> None:
+        query = SimpleNamespace(near_text=lambda query, limit, return_metadata=None:
+                                SimpleNamespace(objects=objects[:limit]))
+        self.collections = SimpleNamespace(get=lambda name: SimpleNamespace(query=query))
+
+
+def _scripted_llm() -> MockFunctionCallingLLM:
+    """
+    Function-calling LLM that follows the SYSTEM policy for a structured request:
+    check_permissions -> fetch_data -> audit_log -> final answer, one tool per turn.
+    """
+    from basic import fastpath
+
+    ids = itertools.count()
+
+    def respond(messages, **kwargs):
+        req = fastpath.parse(next(m.content for m in messages if m.role == MessageRole.USER))
+        done = sum(m.role == MessageRole.TOOL for m in messages)
+        calls = [
+            ("check_permissions", {"user_email": req.user_email, "user_role": req.role,
+                                   "resource": req.resource, "action": "read",
+                                   "target_employee_id": req.target_employee_id}),
+            ("fetch_data", {"resource": req.resource, "filters": {"employee_id": req.target_employee_id}}),
+            ("audit_log", {"entry": {"user_email": req.user_email, "role": req.role, "resource": req.resource,
+                                     "action": "read", "decision": "allow", "rows_returned": 1}}),
+        ]
+        if done < len(calls):
+            name, kwargs = calls[done]
+            return ChatMessage(role=MessageRole.ASSISTANT, blocks=[
+                ToolCallBlock(tool_call_id=f"call-{next(ids)}", tool_name=name, tool_kwargs=kwargs)])
+        return ChatMessage(role=MessageRole.ASSISTANT, content="Access allowed (HR-1.1).")
+
+    return MockFunctionCallingLLM(response_generator=respond)
+
+
+def test_check_permissions_cached(env, bench, rows) -> None:
+    check = lambda: env.core.check_permissions(MANAGER, "Engineer", "performance_summary", "read", REPORT)
+    assert check()["allow"]
+    bench(check, name=f"check_permissions[cached-{rows}]")
+
+
+def test_check_permissions_uncached(env, bench, rows) -> None:
+    check = lambda: env.core.check_permissions(MANAGER, "Engineer", "performance_summary", "read", REPORT)
+    bench(check, setup=env.core.invalidate_decisions, name=f"check_permissions[uncached-{rows}]")
+
+
+def test_fetch_data_by_id(env, bench, rows) -> None:
+    target = rows // 2
+    fetch = lambda: env.core.fetch_data("salary", {"employee_id": target})
+    assert fetch()["rows_returned"] == 1
+    bench(fetch, name=f"fetch_data[by_id-{rows}]")
+
+
+def test_fetch_data_scan_page(env, bench, rows) -> None:
+    fetch = lambda: env.core.fetch_data("directory", {"department": "Finance"}, limit=50)
+    assert fetch()["rows_returned"] == min(50, fetch()["total_rows"])
+    bench(fetch, rounds=max(env.core.PAGE_SIZE, 20) if rows >= 100_000 else None,
+          name=f"fetch_data[department_page-{rows}]")
+
+
+def test_audit_log_enqueue(env, bench, rows) -> None:
+    entry = {"user_email": HR, "role": "HR Manager", "resource": "salary", "action": "read",
+             "decision": "allow", "rows_returned": 1}
+    bench(lambda: env.core.audit_log(dict(entry)), name=f"audit_log[enqueue-{rows}]")
+    env.sink.flush(timeout=10)
+    assert env.sink.failed == 0
+
+
+def test_retriever(env, bench, rows) -> None:
+    from llama_index.core.schema import QueryBundle
+
+    q = QueryBundle("Which policy governs salary access for role HR?")
+    assert len(env.retriever._retrieve(q)) == 5
+    bench(lambda: env.retriever._retrieve(q), name=f"retriever._retrieve[{rows}]")
+
+
+def _workflow_run(message: str):
+    from basic.workflow import ConciergeWorkflow
+
+    wf = ConciergeWorkflow(timeout=30)
+
+    async def run():
+        return await wf.run(message=message)
+
+    return run
+
+
+def test_workflow_fast_path(env, bench, rows) -> None:
+    run = _workflow_run(f"[user_email={HR}; role=HR Manager] Show salary for employee_id {rows // 2}")
+    assert asyncio.run(run())["rows_returned"]
+    bench(run, rounds=50, is_async=True, name=f"workflow.run[fast_path-{rows}]")
+
+
+def test_workflow_agent_path(env, bench, rows, monkeypatch) -> None:
+    from llama_index.core.agent.workflow import FunctionAgent
+    from basic import workflow
+    from basic.skills.policy_skill import TOOLS
+
+    agent = FunctionAgent(llm=_scripted_llm(), tools=TOOLS, system_prompt=workflow.SYSTEM)
+    monkeypatch.setattr(workflow, "_AGENT", agent)
+    monkeypatch.setattr(workflow, "get_llm", lambda: agent.llm)
+    monkeypatch.setattr(workflow, "FAST_PATH", False)
+    run = _workflow_run(f"[user_email={HR}; role=HR Manager] Show salary for employee_id {rows // 2}")
+    assert asyncio.run(run())["answer"].startswith("Access allowed")
+    bench(run, rounds=50, is_async=True, name=f"workflow.run[agent_mock_llm-{rows}]")
+
+
+def test_check_permissions_bulk(env, bench, rows) -> None:
+    n = min(rows, 1000)
+    reqs = [(f"e{i}@company.com", "Engineer", "performance_summary", "read", synthetic.manager_of(i) if i > 1 else 2)
+            for i in range(1, n + 1)]
+    assert len(env.core.check_permissions_bulk(reqs)) == n
+    bench(lambda: env.core.check_permissions_bulk(reqs), rounds=20, setup=env.core.invalidate_decisions,
+          name=f"check_permissions_bulk[{n}x-uncached-{rows}]", requests=n)
+
+
+def test_reporting_chain(env, bench, rows) -> None:
+    d = env.core.EMPLOYEES.current.directory
+    assert d.is_in_chain(1, rows) and not d.is_in_chain(rows, 1)
+    bench(lambda: d.is_in_chain(1, rows), name=f"directory.is_in_chain[{rows}]")
+    bench(d._build_tour, rounds=5, name=f"directory.build_tour[{rows}]")
+
+
+def test_access_review(env, bench, rows) -> None:
+    from basic.skills.access_review import review
+
+    emp = env.core.EMPLOYEES.current.emp
+    m = review(emp, env.core.RULES)
+    assert m.scopes.shape == (rows, len(env.core.RULES.resources()), len(m.actions))
+    bench(lambda: review(emp, env.core.RULES), rounds=5, name=f"access_review[{rows}]")
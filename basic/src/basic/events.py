@@ -0,0 +1,75 @@
+"""Events ConciergeWorkflow writes to its stream while a request is in flight.
+
+Clients read them from the handler's event stream (``handler.stream_events()``)
+before the final StopEvent arrives; the shapes mirror ``ui/src/types/workflow.ts``.
+"""
+
+import os
+from typing import Any, Dict, Iterator, List, Sequence
+
+from workflows.events import Event
+
+# Rows per AnswerChunkEvent; a fetch_data page is split into chunks of at most this many.
+ANSWER_CHUNK_ROWS = int(os.getenv("ANSWER_CHUNK_ROWS", "20"))
+
+
+class QueuedEvent(Event):
+    """The run is waiting for a free workflow slot; `position` 1 is next in line."""
+    position: int
+    queue_depth: int
+
+
+class TokenDeltaEvent(Event):
+    """Incremental LLM output text."""
+    delta: str
+
+
+class ToolCallStartedEvent(Event):
+    tool_name: str
+    tool_id: str
+    input: Dict[str, Any]
+
+
+class ToolCallFinishedEvent(Event):
+    """`output` is the tool result; fetch_data rows are left out and sent as AnswerChunkEvents."""
+    tool_name: str
+    tool_id: str
+    output: Any
+    duration_ms: float
+    status: str  # "completed" | "failed"
+
+
+class PermissionDecisionEvent(Event):
+    resource: str
+    action: str
+    allow: bool
+    reason: str
+    policy_section: str = ""
+
+
+class AnswerChunkEvent(Event):
+    """
+    A slice of the final answer payload (e.g. a batch of rows), sent ahead of the StopEvent.
+    Chunks of one fetch_data call share its `tool_id`, count `index` up from 0 and end with `last`.
+    """
+    index: int
+    text: str = ""
+    rows: List[Dict[str, Any]] = []
+    tool_id: str = ""
+    last: bool = True
+
+
+def row_chunks(rows: Sequence[Dict[str, Any]], tool_id: str = "", size: int = 0) -> Iterator[AnswerChunkEvent]:
+    """`rows` as AnswerChunkEvents of at most `size` (default ANSWER_CHUNK_ROWS) rows; no rows is one empty chunk."""
+    size = max(1, size or ANSWER_CHUNK_ROWS)
+    count = max(1, -(-len(rows) // size))
+    for i in range(count):
+        yield AnswerChunkEvent(index=i, rows=list(rows[i * size:(i + 1) * size]), tool_id=tool_id,
+                               last=i == count - 1)
+
+
+def without_rows(output: Any) -> Any:
+    """A fetch_data result minus its rows, which the stream carries in AnswerChunkEvents instead."""
+    if isinstance(output, dict) and "rows" in output:
+        return {k: v for k, v in output.items() if k != "rows"}
+    return output
@@ -0,0 +1,110 @@
+import re
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from workflows.events import Event
+
+from basic.events import (PermissionDecisionEvent, ToolCallFinishedEvent, ToolCallStartedEvent,
+                          row_chunks, without_rows)
+from basic.tracing import span
+
+# "[user_email=grace.patel@company.com; role=HR] Show salary for employee_id 101"
+_HEADER = re.compile(r"^\s*\[\s*user_email\s*=\s*(?P<email>[^;\]\s]+)\s*;\s*role\s*=\s*(?P<role>[^\]]+?)\s*\]\s*(?P<body>.*)$", re.S)
+_BODY = re.compile(
+    r"^(?:please\s+)?(?:show|get|fetch|view|display)\s+(?:me\s+)?(?:the\s+)?(?P<resource>[a-z_ ]+?)"
+    r"\s+(?:for|of)\s+employee(?:[_ ]?id)?\s*[:#=]?\s*(?P<eid>\d+)\s*[.!?]?\s*$",
+    re.I,
+)
+RESOURCE_ALIASES = {
+    "salary": "salary",
+    "salaries": "salary",
+    "performance_summary": "performance_summary",
+    "performance summary": "performance_summary",
+    "performance review": "performance_summary",
+    "performance reviews": "performance_summary",
+    "directory": "directory",
+    "directory entry": "directory",
+}
+
+
+@dataclass(frozen=True)
+class StructuredRequest:
+    user_email: str
+    role: str
+    resource: str
+    target_employee_id: int
+    action: str = "read"
+
+
+def parse(message: str) -> Optional[StructuredRequest]:
+    """Recognize a fully structured single-record read; None means "let the agent handle it"."""
+    m = _HEADER.match(message or "")
+    if not m:
+        return None
+    b = _BODY.match(m.group("body").strip())
+    if not b:
+        return None
+    resource = RESOURCE_ALIASES.get(" ".join(b.group("resource").lower().split()))
+    if resource is None:
+        return None
+    return StructuredRequest(m.group("email"), m.group("role").strip(), resource, int(b.group("eid")))
+
+
+async def _call(emit: Callable[[Event], None], name: str, fn: Callable[..., Awaitable[Any]], **kwargs) -> Any:
+    """Run one tool coroutine, emitting the same start/finish events the agent path streams."""
+    tool_id = f"fast-{name}"
+    emit(ToolCallStartedEvent(tool_name=name, tool_id=tool_id, input=kwargs))
+    t0 = time.perf_counter()
+    status = "failed"
+    out = None
+    try:
+        with span("tool", tool_name=name, path="fast"):
+            out = await fn(**kwargs)
+        status = "completed"
+        return out
+    finally:
+        emit(ToolCallFinishedEvent(tool_name=name, tool_id=tool_id, output=without_rows(out),
+                                   duration_ms=(time.perf_counter() - t0) * 1000, status=status))
+
+
+async def run(req: StructuredRequest, emit: Optional[Callable[[Event], None]] = None) -> Dict[str, Any]:
+    """check_permissions -> fetch_data -> audit_log in code, mirroring the agent's policy."""
+    from basic.skills import core
+
+    emit = emit or (lambda ev: None)
+    decision = await _call(emit, "check_permissions", core.acheck_permissions,
+                           user_email=req.user_email, user_role=req.role, resource=req.resource,
+                           action=req.action, target_employee_id=req.target_employee_id)
+    section = decision.get("policy_section") or "Policies"
+    emit(PermissionDecisionEvent(resource=req.resource, action=req.action, allow=decision["allow"],
+                                 reason=decision["reason"], policy_section=decision.get("policy_section", "")))
+    if not decision["allow"]:
+        return {
+            "answer": f"Access denied ({section}). {decision['reason']}",
+            "decision": decision,
+        }
+
+    filters = {"employee_id": req.target_employee_id}
+    data = await _call(emit, "fetch_data", core.afetch_data, resource=req.resource, filters=filters,
+                       user_email=req.user_email)
+    for chunk in row_chunks(data["rows"], tool_id="fast-fetch_data"):
+        emit(chunk)
+    await _call(emit, "audit_log", core.aaudit_log, entry={
+        "user_email": req.user_email,
+        "role": req.role,
+        "resource": req.resource,
+        "action": req.action,
+        "filters": filters,
+        "decision": "allow",
+        "policy_section": section,
+        "policy_ref": decision.get("policy_ref", "Policies"),
+        "rows_returned": data["rows_returned"],
+        "timestamp": datetime.utcnow().isoformat() + "Z",
+    })
+    return {
+        "answer": f"Access allowed ({section}). {decision['reason']}",
+        "decision": decision,
+        "rows_returned": data["rows_returned"],  # the rows are only in the streamed AnswerChunkEvents
+    }
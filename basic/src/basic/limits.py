@@ -0,0 +1,214 @@
+"""
+Concurrency limits for the dependencies a request fans out to.
+
+Each Limiter is a FIFO semaphore shared by threads and event loops: the
+OpenAI LLM, the Weaviate vector store and the audit sink each get one, and
+ConciergeWorkflow runs pass through WORKFLOW, an admission queue with a
+bounded depth. When WORKFLOW's queue is full a run is rejected at once with
+Overloaded instead of piling more waiters onto a saturated backend.
+
+Limits come from the environment (0 means unlimited):
+
+- LLM_CONCURRENCY (8), VECTOR_STORE_CONCURRENCY (16), AUDIT_CONCURRENCY (4)
+- WORKFLOW_CONCURRENCY (32) runs in flight, WORKFLOW_QUEUE_DEPTH (64) runs
+  waiting, WORKFLOW_QUEUE_TIMEOUT (30) seconds a run may wait
+
+stats() reports in-flight, queue depth and wait times per limiter.
+"""
+
+import os
+import time
+import asyncio
+import threading
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, Callable, Dict, Optional
+
+from dotenv import load_dotenv
+
+from basic.tracing import set_attributes
+
+load_dotenv()  # limits are read at import, so .env must be loaded before
+
+
+class Overloaded(Exception):
+    """A limiter's queue is full, or the wait for a slot timed out."""
+
+    def __init__(self, name: str, queue_depth: int, timed_out: bool = False):
+        self.name = name
+        self.queue_depth = queue_depth
+        self.timed_out = timed_out
+        what = "timed out waiting" if timed_out else f"queue full ({queue_depth} waiting)"
+        super().__init__(f"{name} overloaded: {what}")
+
+
+class Limiter:
+    """
+    At most `limit` holders at a time, at most `max_waiting` waiters (None: no
+    bound). Slots are handed to waiters in arrival order, whether they wait in
+    a thread (hold) or on an event loop (ahold).
+    """
+
+    def __init__(self, name: str, limit: int, max_waiting: Optional[int] = None,
+                 timeout: Optional[float] = None):
+        self.name = name
+        self.limit = limit
+        self.max_waiting = max_waiting
+        self.timeout = timeout
+        self._free = limit
+        self._waiters: deque = deque()
+        self._lock = threading.Lock()
+        self.acquired = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self._waited = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    @property
+    def in_flight(self) -> int:
+        return self.limit - self._free
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._waiters)
+
+    def _enter(self, waiter: Any) -> Optional[int]:
+        """Take a free slot (None) or queue `waiter`, returning its 1-based position."""
+        with self._lock:
+            if self._free > 0 and not self._waiters:
+                self._free -= 1
+                self.acquired += 1
+                return None
+            if self.max_waiting is not None and len(self._waiters) >= self.max_waiting:
+                self.rejected += 1
+                raise Overloaded(self.name, len(self._waiters))
+            self._waiters.append(waiter)
+            return len(self._waiters)
+
+    def _abandon(self, waiter: Any) -> bool:
+        """Drop a waiter that gave up; False when it was already handed a slot."""
+        with self._lock:
+            try:
+                self._waiters.remove(waiter)
+            except ValueError:
+                return False
+            return True
+
+    def _timed_out(self) -> None:
+        with self._lock:
+            self.timeouts += 1
+
+    def _granted(self, started: float) -> None:
+        waited = time.perf_counter() - started
+        with self._lock:
+            self.acquired += 1
+            self._waited += 1
+            self._wait_total += waited
+            self._wait_max = max(self._wait_max, waited)
+        set_attributes(**{f"{self.name}_wait_ms": round(waited * 1000, 3)})
+
+    def release(self) -> None:
+        if self.limit <= 0:
+            return
+        with self._lock:
+            while self._waiters:
+                w = self._waiters.popleft()
+                if isinstance(w, threading.Event):
+                    w.set()
+                    return
+                if not w.done():
+                    w.get_loop().call_soon_threadsafe(self._wake, w)
+                    return
+            self._free += 1
+
+    def _wake(self, fut: "asyncio.Future") -> None:
+        if fut.done():  # its task went away between hand-off and wake-up
+            self.release()
+        else:
+            fut.set_result(True)
+
+    def acquire(self, timeout: Optional[float] = None,
+                on_queued: Optional[Callable[[int], None]] = None) -> None:
+        if self.limit <= 0:
+            return
+        timeout = self.timeout if timeout is None else timeout
+        started, event = time.perf_counter(), threading.Event()
+        position = self._enter(event)
+        if position is None:
+            return
+        if on_queued is not None:
+            on_queued(position)
+        if not event.wait(timeout) and self._abandon(event):
+            self._timed_out()
+            raise Overloaded(self.name, self.queue_depth, timed_out=True)
+        self._granted(started)
+
+    async def aacquire(self, timeout: Optional[float] = None,
+                       on_queued: Optional[Callable[[int], None]] = None) -> None:
+        if self.limit <= 0:
+            return
+        timeout = self.timeout if timeout is None else timeout
+        started, fut = time.perf_counter(), asyncio.get_running_loop().create_future()
+        position = self._enter(fut)
+        if position is None:
+            return
+        if on_queued is not None:
+            on_queued(position)
+        try:
+            await asyncio.wait_for(asyncio.shield(fut), timeout)
+        except asyncio.TimeoutError:
+            if self._abandon(fut):
+                self._timed_out()
+                raise Overloaded(self.name, self.queue_depth, timed_out=True) from None
+        except asyncio.CancelledError:
+            if not self._abandon(fut):
+                self.release()  # the slot arrived as the caller was cancelled
+            raise
+        self._granted(started)
+
+    @contextmanager
+    def hold(self, timeout: Optional[float] = None, on_queued: Optional[Callable[[int], None]] = None):
+        self.acquire(timeout, on_queued)
+        try:
+            yield self
+        finally:
+            self.release()
+
+    @asynccontextmanager
+    async def ahold(self, timeout: Optional[float] = None, on_queued: Optional[Callable[[int], None]] = None):
+        await self.aacquire(timeout, on_queued)
+        try:
+            yield self
+        finally:
+            self.release()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "limit": self.limit,
+                "in_flight": self.in_flight if self.limit > 0 else 0,
+                "queue_depth": len(self._waiters),
+                "max_waiting": self.max_waiting,
+                "acquired": self.acquired,
+                "rejected": self.rejected,
+                "timeouts": self.timeouts,
+                "wait_ms_avg": round(self._wait_total / self._waited * 1000, 3) if self._waited else 0.0,
+                "wait_ms_max": round(self._wait_max * 1000, 3),
+            }
+
+
+def _env_int(name: str, default: int) -> int:
+    return int(os.getenv(name, str(default)))
+
+
+LLM = Limiter("llm", _env_int("LLM_CONCURRENCY", 8))
+VECTOR_STORE = Limiter("vector_store", _env_int("VECTOR_STORE_CONCURRENCY", 16))
+AUDIT = Limiter("audit", _env_int("AUDIT_CONCURRENCY", 4))
+WORKFLOW = Limiter("workflow", _env_int("WORKFLOW_CONCURRENCY", 32),
+                   max_waiting=_env_int("WORKFLOW_QUEUE_DEPTH", 64),
+                   timeout=float(os.getenv("WORKFLOW_QUEUE_TIMEOUT", "30")) or None)
+
+
+def stats() -> Dict[str, Dict[str, Any]]:
+    return {l.name: l.stats() for l in (WORKFLOW, LLM, VECTOR_STORE, AUDIT)}
@@ -0,0 +1,108 @@
+"""
+The OpenAI LLM shared by the agent and the policy RAG fallback.
+
+get_llm() builds it on first use from OPENAI_API_KEY / OPENAI_MODEL, with the
+LLM response cache (basic.llm_cache) and a limits.LLM slot per provider call,
+and installs it as Settings.llm. Anything that synthesizes text should take
+its LLM from here rather than rely on Settings.llm having been set.
+"""
+
+import os
+import threading
+import contextvars
+
+from basic import limits
+
+_LLM = None
+_LOCK = threading.Lock()
+
+_IN_LLM = contextvars.ContextVar("in_llm_call", default=False)
+
+
+class _LimitedLLM:
+    """
+    LLM mixin holding a limits.LLM slot for each request to the provider; a
+    streamed response keeps its slot until the stream is consumed or closed.
+    Calls made from inside a held call (complete -> chat) reuse its slot.
+    """
+
+    def chat(self, messages, **kwargs):
+        return self._held(super().chat, messages, **kwargs)
+
+    def complete(self, prompt, formatted=False, **kwargs):
+        return self._held(super().complete, prompt, formatted=formatted, **kwargs)
+
+    async def achat(self, messages, **kwargs):
+        return await self._aheld(super().achat, messages, **kwargs)
+
+    async def acomplete(self, prompt, formatted=False, **kwargs):
+        return await self._aheld(super().acomplete, prompt, formatted=formatted, **kwargs)
+
+    def _held(self, call, *args, **kwargs):
+        if _IN_LLM.get():
+            return call(*args, **kwargs)
+        with limits.LLM.hold():
+            token = _IN_LLM.set(True)
+            try:
+                return call(*args, **kwargs)
+            finally:
+                _IN_LLM.reset(token)
+
+    async def _aheld(self, call, *args, **kwargs):
+        if _IN_LLM.get():
+            return await call(*args, **kwargs)
+        async with limits.LLM.ahold():
+            token = _IN_LLM.set(True)
+            try:
+                return await call(*args, **kwargs)
+            finally:
+                _IN_LLM.reset(token)
+
+    async def astream_chat(self, messages, **kwargs):
+        if _IN_LLM.get():
+            return await super().astream_chat(messages, **kwargs)
+        await limits.LLM.aacquire()
+        token = _IN_LLM.set(True)
+        try:
+            stream = await super().astream_chat(messages, **kwargs)
+        except BaseException:
+            limits.LLM.release()
+            raise
+        finally:
+            _IN_LLM.reset(token)
+
+        async def held():
+            try:
+                async for chunk in stream:
+                    yield chunk
+            finally:
+                limits.LLM.release()
+
+        return held()
+
+
+def get_llm():
+    """Build the OpenAI LLM on first use and install it as Settings.llm."""
+    global _LLM
+    with _LOCK:
+        if _LLM is None:
+            from llama_index.core import Settings
+            from llama_index.llms.openai import OpenAI as _OpenAI
+            from basic.llm_cache import CachedLLM
+
+            class OpenAI(CachedLLM, _LimitedLLM, _OpenAI):
+                pass
+
+            # Use OpenAI API key
+            openai_api_key = os.getenv("OPENAI_API_KEY")
+            if not openai_api_key:
+                raise ValueError("OPENAI_API_KEY environment variable is required")
+
+            Settings.llm = OpenAI(
+                model=os.getenv("OPENAI_MODEL", "gpt-4o-mini"),
+                api_key=openai_api_key,
+                temperature=0.1,
+                max_tokens=2048,
+            )
+            _LLM = Settings.llm
+        return _LLM
@@ -0,0 +1,279 @@
+"""
+On-disk cache of LLM responses for repeated agent turns.
+
+The key is a hash of the model parameters, the tool schemas and the
+normalized conversation: text and tool calls/results, with tool call ids
+replaced by their position and email addresses by placeholders. The same
+question from two users with the same role therefore shares one entry, and
+a replayed answer has the placeholders filled with the current user's
+addresses. Conversations that already contain fetch_data results (rows
+that belong to one requester) bypass the cache entirely.
+
+LLM_CACHE=0 disables it; LLM_CACHE_PATH, LLM_CACHE_TTL (seconds, 3600) and
+LLM_CACHE_MAX_ENTRIES (10000) configure the SQLite store.
+"""
+
+import os
+import re
+import json
+import time
+import uuid
+import sqlite3
+import hashlib
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from llama_index.core.base.llms.types import (ChatMessage, ChatResponse, MessageRole, TextBlock,
+                                              ThinkingBlock, ToolCallBlock)
+
+from basic.tracing import set_attributes
+
+BASE = Path(__file__).resolve().parents[2]  # points to basic/
+_EMAIL = re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+")
+_PLACEHOLDER = re.compile(r"<email:(\d+)>")
+BYPASS_TOOLS = frozenset({"fetch_data"})  # tool results that are specific to one requester
+
+
+class LLMResponseCache:
+    """SQLite key -> response store whose entries expire after `ttl` seconds; one connection per thread."""
+
+    def __init__(self, path: Any, ttl: float = 3600.0, max_entries: int = 10000,
+                 clock=time.time):
+        self.path = str(path)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._clock = clock
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._writes = 0
+        self.hits = 0
+        self.misses = 0
+        self.bypassed = 0
+        if self.path != ":memory:":
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        self._shared = sqlite3.connect(":memory:", check_same_thread=False) if self.path == ":memory:" else None
+        with self._lock:
+            conn = self._conn()
+            if self._shared is None:
+                conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("CREATE TABLE IF NOT EXISTS llm_cache ("
+                         "key TEXT PRIMARY KEY, value TEXT NOT NULL, created REAL NOT NULL, expires REAL NOT NULL)")
+            conn.execute("CREATE INDEX IF NOT EXISTS llm_cache_expires ON llm_cache (expires)")
+            conn.commit()
+
+    def _conn(self) -> sqlite3.Connection:
+        if self._shared is not None:
+            return self._shared
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = sqlite3.connect(self.path, check_same_thread=False, timeout=5)
+        return conn
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn().execute("SELECT value FROM llm_cache WHERE key = ? AND expires > ?",
+                                       (key, self._clock())).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return row[0]
+
+    def set(self, key: str, value: str) -> None:
+        now = self._clock()
+        with self._lock:
+            conn = self._conn()
+            conn.execute("INSERT OR REPLACE INTO llm_cache (key, value, created, expires) VALUES (?, ?, ?, ?)",
+                         (key, value, now, now + self.ttl))
+            self._writes += 1
+            if self._writes % 100 == 0:
+                self._evict(conn, now)
+            conn.commit()
+
+    def _evict(self, conn: sqlite3.Connection, now: float) -> None:
+        conn.execute("DELETE FROM llm_cache WHERE expires <= ?", (now,))
+        conn.execute("DELETE FROM llm_cache WHERE key IN (SELECT key FROM llm_cache ORDER BY created DESC "
+                     "LIMIT -1 OFFSET ?)", (self.max_entries,))
+
+    def note_bypass(self) -> None:
+        with self._lock:
+            self.bypassed += 1
+
+    def purge(self) -> None:
+        """Drop expired entries and trim to max_entries now."""
+        with self._lock:
+            conn = self._conn()
+            self._evict(conn, self._clock())
+            conn.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            conn = self._conn()
+            conn.execute("DELETE FROM llm_cache")
+            conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn().execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "bypassed": self.bypassed, "size": len(self),
+                "maxsize": self.max_entries}
+
+
+def _kwargs(value: Any) -> Any:
+    if isinstance(value, str):
+        try:
+            return json.loads(value)
+        except ValueError:
+            return value
+    return value
+
+
+def _blocks(message: ChatMessage, call_ids: Dict[str, str]) -> Optional[List[Dict[str, Any]]]:
+    """Text and tool-call blocks as plain data; None when the message holds anything else (images, audio)."""
+    out = []
+    for block in message.blocks:
+        if isinstance(block, TextBlock):
+            if block.text:
+                out.append({"text": block.text})
+        elif isinstance(block, ToolCallBlock):
+            call = call_ids.setdefault(block.tool_call_id or "", f"call-{len(call_ids)}")
+            out.append({"tool": block.tool_name, "kwargs": _kwargs(block.tool_kwargs), "call": call})
+        elif not isinstance(block, ThinkingBlock):
+            return None
+    return out
+
+
+def _normalize(text: str, emails: Dict[str, str]) -> str:
+    return _EMAIL.sub(lambda m: emails.setdefault(m.group(0), f"<email:{len(emails)}>"), text)
+
+
+def request_key(llm: Any, messages: Sequence[ChatMessage], kwargs: Dict[str, Any]
+                ) -> Optional[Tuple[str, Dict[str, str]]]:
+    """(cache key, email -> placeholder map) for a chat request, or None when it must not be cached."""
+    call_ids: Dict[str, str] = {}
+    names: Dict[str, str] = {}
+    conversation = []
+    for m in messages:
+        blocks = _blocks(m, call_ids)
+        if blocks is None:
+            return None
+        for b in blocks:
+            if "tool" in b:
+                names[b["call"]] = b["tool"]
+        entry: Dict[str, Any] = {"role": MessageRole(m.role).value, "blocks": blocks}
+        call_id = m.additional_kwargs.get("tool_call_id")
+        if call_id is not None:
+            entry["call"] = call_ids.setdefault(call_id, f"call-{len(call_ids)}")
+            if m.role == MessageRole.TOOL and names.get(entry["call"]) in BYPASS_TOOLS:
+                return None
+        conversation.append(entry)
+    params = {"class": type(llm).__name__, "model": getattr(llm, "model", None),
+              "temperature": getattr(llm, "temperature", None), "max_tokens": getattr(llm, "max_tokens", None),
+              "additional_kwargs": getattr(llm, "additional_kwargs", None), "request": kwargs}
+    emails: Dict[str, str] = {}
+    text = _normalize(json.dumps([params, conversation], sort_keys=True, default=str), emails)
+    return hashlib.sha256(text.encode()).hexdigest(), emails
+
+
+def encode_response(message: ChatMessage, emails: Dict[str, str]) -> Optional[str]:
+    blocks = _blocks(message, {})
+    if blocks is None:
+        return None
+    for b in blocks:
+        b.pop("call", None)
+    # Only the request's own addresses become placeholders; any other address stays literal.
+    text = json.dumps({"role": MessageRole(message.role).value, "blocks": blocks})
+    return _EMAIL.sub(lambda m: emails.get(m.group(0), m.group(0)), text)
+
+
+def decode_response(value: str, emails: Dict[str, str]) -> ChatMessage:
+    """The cached message with placeholders filled in from this request's emails and fresh tool call ids."""
+    by_slot = {p: e for e, p in emails.items()}
+    data = json.loads(_PLACEHOLDER.sub(lambda m: by_slot.get(m.group(0), m.group(0)), value))
+    blocks = [TextBlock(text=b["text"]) if "text" in b else
+              ToolCallBlock(tool_call_id=f"call_{uuid.uuid4().hex[:24]}", tool_name=b["tool"], tool_kwargs=b["kwargs"])
+              for b in data["blocks"]]
+    return ChatMessage(role=data["role"], blocks=blocks)
+
+
+class CachedLLM:
+    """
+    LLM mixin answering chat requests from `llm_cache()` when an identical
+    normalized request was answered within the TTL. A hit never reaches the
+    provider; a streamed hit arrives as a single chunk.
+    """
+
+    def _lookup(self, messages, kwargs):
+        cache = llm_cache()
+        req = request_key(self, messages, kwargs) if cache is not None else None
+        if cache is not None and req is None:
+            cache.note_bypass()
+        if req is None:
+            set_attributes(llm_cache="bypass")
+            return None, None, None
+        value = cache.get(req[0])
+        set_attributes(llm_cache="hit" if value is not None else "miss")
+        return cache, req, None if value is None else decode_response(value, req[1])
+
+    @staticmethod
+    def _store(cache, req, message: ChatMessage) -> None:
+        value = encode_response(message, req[1])
+        if value is not None:
+            cache.set(req[0], value)
+
+    def chat(self, messages, **kwargs):
+        cache, req, hit = self._lookup(messages, kwargs)
+        if hit is not None:
+            return ChatResponse(message=hit)
+        response = super().chat(messages, **kwargs)
+        if req is not None:
+            self._store(cache, req, response.message)
+        return response
+
+    async def achat(self, messages, **kwargs):
+        cache, req, hit = self._lookup(messages, kwargs)
+        if hit is not None:
+            return ChatResponse(message=hit)
+        response = await super().achat(messages, **kwargs)
+        if req is not None:
+            self._store(cache, req, response.message)
+        return response
+
+    async def astream_chat(self, messages, **kwargs):
+        cache, req, hit = self._lookup(messages, kwargs)
+        if hit is not None:
+            async def replay():
+                yield ChatResponse(message=hit, delta=hit.content or "")
+            return replay()
+        stream = await super().astream_chat(messages, **kwargs)
+        if req is None:
+            return stream
+
+        async def recorded():
+            last = None
+            async for last in stream:
+                yield last
+            if last is not None:  # only complete responses are stored
+                self._store(cache, req, last.message)
+
+        return recorded()
+
+
+_CACHE: Optional[LLMResponseCache] = None
+_CACHE_LOCK = threading.Lock()
+
+
+def llm_cache() -> Optional[LLMResponseCache]:
+    """The process-wide response cache, or None when LLM_CACHE=0."""
+    global _CACHE
+    if os.getenv("LLM_CACHE", "1") == "0":
+        return None
+    with _CACHE_LOCK:
+        if _CACHE is None:
+            _CACHE = LLMResponseCache(os.getenv("LLM_CACHE_PATH", BASE / "data" / "llm_cache.sqlite"),
+                                      ttl=float(os.getenv("LLM_CACHE_TTL", "3600")),
+                                      max_entries=int(os.getenv("LLM_CACHE_MAX_ENTRIES", "10000")))
+        return _CACHE
@@ -0,0 +1,148 @@
+"""
+The policy corpus (data/policies.json) and backend selection for policy retrieval.
+
+POLICY_RETRIEVER picks where policy lookups run:
+
+- ``weaviate`` (default): the Policies collection in Weaviate Cloud
+- ``local``: an in-process NumPy index built from data/policies.json
+"""
+
+import os
+import re
+import json
+import uuid
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+BASE = Path(__file__).resolve().parents[2]  # points to basic/
+POLICIES_PATH = Path(os.getenv("POLICIES_PATH", BASE / "data" / "policies.json"))
+_NAMESPACE = uuid.UUID("6f1c4a52-3d0e-5b8e-9a51-0c7f2b6d9e11")
+
+
+def _read(path: Path) -> Dict[str, Any]:
+    path = Path(path)
+    with open(path) as f:
+        if path.suffix in (".yaml", ".yml"):
+            try:
+                import yaml
+            except ImportError as e:
+                raise ImportError("YAML policy files need PyYAML (pip install pyyaml)") from e
+            return yaml.safe_load(f)
+        return json.load(f)
+
+
+def load_policy_file(path: Path = POLICIES_PATH) -> Tuple[Any, List[Dict[str, Any]]]:
+    """(version, policies) from a JSON or YAML policy file; YAML needs PyYAML."""
+    data = _read(path)
+    return data.get("version"), data["policies"]
+
+
+def load_policies(path: Path = POLICIES_PATH) -> List[Dict[str, Any]]:
+    return load_policy_file(path)[1]
+
+
+def load_role_groups(path: Path = POLICIES_PATH) -> Dict[str, List[str]]:
+    """Group name used in roles_allowed -> member roles ("*" any role, "*Suffix" roles ending in Suffix)."""
+    return _read(path).get("role_groups", {})
+
+
+def policy_uuid(section: str) -> str:
+    """Stable object id for a policy section, the same in every store."""
+    return str(uuid.uuid5(_NAMESPACE, section))
+
+
+def policy_node(properties: Dict[str, Any], score: float, node_uuid: str):
+    """The NodeWithScore every policy retriever returns for one policy document."""
+    from llama_index.core.schema import Document, NodeWithScore
+
+    title = properties.get('title', '')
+    section = properties.get('section', '')
+    text = properties.get('text', '')
+    doc = Document(
+        text=f"Title: {title}\nSection: {section}\nContent: {text}",
+        metadata={
+            'title': title,
+            'section': section,
+            'uuid': node_uuid,
+            **{k: v for k, v in properties.items() if k not in ['title', 'section', 'text']}
+        }
+    )
+    return NodeWithScore(node=doc, score=score)
+
+
+_SECTIONS: Dict[Tuple[str, int], Dict[str, Tuple[str, ...]]] = {}
+
+
+def resource_sections(path: Path = POLICIES_PATH) -> Dict[str, Tuple[str, ...]]:
+    """resource -> sections of the policies whose ``resource`` field names it; re-read when the file changes."""
+    key = (str(path), Path(path).stat().st_mtime_ns)
+    found = _SECTIONS.get(key)
+    if found is None:
+        out: Dict[str, List[str]] = {}
+        for doc in load_policies(path):
+            if doc.get("resource"):
+                out.setdefault(doc["resource"], []).append(doc["section"])
+        found = {r: tuple(s) for r, s in out.items()}
+        _SECTIONS.clear()
+        _SECTIONS[key] = found
+    return found
+
+
+_SECTION = re.compile(r"\b([A-Za-z]{2,4}-\d+\.\d+)\b")
+_QUESTION = re.compile(r"governs (?P<resource>\w+) access for role")  # PolicyNotes.question()
+
+
+class PolicyFilter(NamedTuple):
+    """Metadata constraints for a policy search; an empty field does not constrain."""
+    sections: Tuple[str, ...] = ()
+    tags: Tuple[str, ...] = ()
+    roles: Tuple[str, ...] = ()
+
+    @property
+    def empty(self) -> bool:
+        return not (self.sections or self.tags or self.roles)
+
+    def matches(self, doc: Dict[str, Any]) -> bool:
+        return ((not self.sections or doc.get("section") in self.sections)
+                and (not self.tags or bool(set(self.tags) & set(doc.get("tags", ()))))
+                and (not self.roles or bool(set(self.roles + ("All Employees",)) & set(doc.get("roles_allowed", ())))))
+
+
+def policy_filter(query: str, resource: Optional[str] = None) -> PolicyFilter:
+    """
+    Filter implied by a policy query: the section ids it names, otherwise the
+    sections of the policies governing the resource it asks about (given, or
+    parsed from a PolicyNotes question). Roles are never derived: a permission
+    question must still find the policy that denies the asking role.
+    """
+    sections = tuple(dict.fromkeys(m.upper() for m in _SECTION.findall(query)))
+    if sections:
+        return PolicyFilter(sections=sections)
+    if resource is None:
+        m = _QUESTION.search(query)
+        resource = m.group("resource") if m else None
+    return PolicyFilter(sections=resource_sections().get(resource, ()))
+
+
+def retriever_backend() -> str:
+    return os.getenv("POLICY_RETRIEVER", "weaviate").lower()
+
+
+def policy_llm():
+    """
+    The LLM policy answers are synthesized with: basic.llm's OpenAI model
+    (OPENAI_MODEL), behind the LLM concurrency limit and response cache. Query
+    engines must be given it explicitly; Settings.llm is only set once get_llm()
+    has run and otherwise falls back to llama_index's default model.
+    """
+    from basic.llm import get_llm
+    return get_llm()
+
+
+def get_policy_query_engine():
+    """The shared policy query engine for the configured POLICY_RETRIEVER backend."""
+    if retriever_backend() == "local":
+        from basic.policy_index import get_local_query_engine
+        return get_local_query_engine()
+    from basic.retrieval import get_policy_query_engine as _get
+    return _get()
@@ -0,0 +1,296 @@
+"""
+In-process policy retrieval: a NumPy matrix of policy vectors and cosine top-k.
+
+The index is built from data/policies.json with a local embedding model and
+persisted to LOCAL_INDEX_DIR (default data/policy_index/) as ``vectors.npy``
+plus ``meta.json`` in a versioned subdirectory named by ``CURRENT``. It is rebuilt when policies.json or the embedding model
+changes, and memory-mapped on load unless LOCAL_INDEX_MMAP=0.
+
+LOCAL_EMBED_MODEL selects the embedding model:
+
+- ``hashing`` (default): signed feature hashing of word unigrams and bigrams,
+  pure NumPy, no model download
+- ``hf:<model name>``: a sentence-transformers model via
+  llama-index-embeddings-huggingface (optional dependency)
+"""
+
+import os
+import re
+import json
+import time
+import zlib
+import shutil
+import hashlib
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from llama_index.core.base.embeddings.base import BaseEmbedding
+from llama_index.core.retrievers import BaseRetriever
+from llama_index.core.schema import NodeWithScore, QueryBundle
+
+from basic.policies import (BASE, POLICIES_PATH, load_policies, policy_filter, policy_llm, policy_node,
+                            policy_uuid)
+from basic.tracing import span
+
+_TOKEN = re.compile(r"[a-z0-9]+(?:[.-][a-z0-9]+)*")
+
+
+def _tokens(text: str) -> List[str]:
+    words = [w[:-1] if len(w) > 3 and w.endswith("s") and not w.endswith("ss") else w
+             for w in _TOKEN.findall(text.lower())]
+    return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+
+class HashingEmbedding(BaseEmbedding):
+    """Deterministic bag-of-words embedding: no weights, no network, a few microseconds per text."""
+
+    dim: int = 1024
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "HashingEmbedding"
+
+    def embed(self, text: str) -> List[float]:
+        vec = np.zeros(self.dim, dtype=np.float32)
+        for tok in _tokens(text):
+            h = zlib.crc32(tok.encode())
+            vec[h % self.dim] += 1.0 if h & 0x80000000 else -1.0
+        norm = np.linalg.norm(vec)
+        return (vec / norm if norm else vec).tolist()
+
+    def _get_query_embedding(self, query: str) -> List[float]:
+        return self.embed(query)
+
+    async def _aget_query_embedding(self, query: str) -> List[float]:
+        return self.embed(query)
+
+    def _get_text_embedding(self, text: str) -> List[float]:
+        return self.embed(text)
+
+
+def embed_model_from_env() -> Tuple[str, BaseEmbedding]:
+    """(model id, model) for LOCAL_EMBED_MODEL; the id is stored with the index to detect changes."""
+    name = os.getenv("LOCAL_EMBED_MODEL", "hashing")
+    if name == "hashing":
+        model = HashingEmbedding()
+        return f"hashing-{model.dim}", model
+    if name.startswith("hf:"):
+        try:
+            from llama_index.embeddings.huggingface import HuggingFaceEmbedding
+        except ImportError as e:
+            raise ImportError("LOCAL_EMBED_MODEL=hf:... needs llama-index-embeddings-huggingface") from e
+        return name, HuggingFaceEmbedding(model_name=name[3:])
+    raise ValueError(f"Unknown LOCAL_EMBED_MODEL: {name}")
+
+
+def _doc_text(doc: Dict[str, Any]) -> str:
+    return " ".join([doc.get("title", ""), doc.get("section", ""), doc.get("text", ""),
+                     " ".join(doc.get("tags", []))])
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+
+class LocalPolicyIndex:
+    """
+    Row-normalized float32 policy vectors with the documents they were built from.
+
+    For HashingEmbedding the dimensions are also IDF-weighted over the corpus
+    (`weights`, applied to queries as well), so boilerplate shared by every
+    query ("Which policy governs ... access") does not drown the topic words.
+    """
+
+    def __init__(self, vectors: np.ndarray, docs: List[Dict[str, Any]], meta: Optional[Dict[str, Any]] = None,
+                 weights: Optional[np.ndarray] = None):
+        self.vectors = vectors
+        self.docs = docs
+        self.meta = meta or {}
+        self.weights = weights
+
+    @classmethod
+    def build(cls, docs: Sequence[Dict[str, Any]], embed_model: BaseEmbedding,
+              meta: Optional[Dict[str, Any]] = None) -> "LocalPolicyIndex":
+        vectors = np.asarray(embed_model.get_text_embedding_batch([_doc_text(d) for d in docs]), dtype=np.float32)
+        weights = None
+        if isinstance(embed_model, HashingEmbedding):
+            df = np.count_nonzero(vectors, axis=0)
+            weights = (np.log((1 + len(docs)) / (1 + df)) + 1).astype(np.float32)
+            vectors = vectors * weights
+        return cls(_normalize(vectors).astype(np.float32), list(docs), meta, weights)
+
+    def save(self, path: Path) -> None:
+        """
+        Write the files into a fresh version directory, then repoint ``CURRENT``
+        at it with one os.replace, so readers see the old set or the new set,
+        never vectors from one and meta from the other. The previous version
+        is kept for readers that resolved it just before the swap.
+        """
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        version = f"v{time.time_ns()}-{os.getpid()}-{threading.get_ident()}"
+        tmp = path / f".{version}"
+        tmp.mkdir()
+        np.save(tmp / "vectors.npy", np.ascontiguousarray(self.vectors))
+        if self.weights is not None:
+            np.save(tmp / "weights.npy", self.weights)
+        (tmp / "meta.json").write_text(json.dumps({**self.meta, "weighted": self.weights is not None,
+                                                   "docs": self.docs}))
+        os.replace(tmp, path / version)
+        (path / f".CURRENT.{version}").write_text(version)
+        os.replace(path / f".CURRENT.{version}", path / "CURRENT")
+        for old in sorted(p for p in path.glob("v*") if p.is_dir() and p.name != version)[:-1]:
+            shutil.rmtree(old, ignore_errors=True)
+
+    @classmethod
+    def load(cls, path: Path, mmap: bool = True) -> "LocalPolicyIndex":
+        path = Path(path)
+        path = path / (path / "CURRENT").read_text().strip()
+        meta = json.loads((path / "meta.json").read_text())
+        vectors = np.load(path / "vectors.npy", mmap_mode="r" if mmap else None)
+        weights = np.load(path / "weights.npy") if meta.pop("weighted", False) else None
+        return cls(vectors, meta.pop("docs"), meta, weights)
+
+    def search(self, query: Sequence[float], k: int,
+               rows: Optional[np.ndarray] = None) -> List[Tuple[int, float]]:
+        """(row, cosine similarity) of the k best rows (among `rows`, if given), best first."""
+        q = np.asarray(query, dtype=np.float32)
+        if self.weights is not None:
+            q = q * self.weights
+        norm = np.linalg.norm(q)
+        if rows is None:
+            rows = np.arange(len(self.docs))
+        if not norm or not len(rows):
+            return []
+        scores = self.vectors[rows] @ (q / norm)
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(int(rows[i]), float(scores[i])) for i in top]
+
+    def search_many(self, queries: Sequence[Sequence[float]], k: int,
+                    masks: Optional[np.ndarray] = None) -> List[List[Tuple[int, float]]]:
+        """search() for a batch of queries with one matrix product; `masks[i]` limits query i's rows."""
+        q = np.asarray(queries, dtype=np.float32).reshape(len(queries), -1)
+        if self.weights is not None:
+            q = q * self.weights
+        scores = _normalize(q) @ self.vectors.T  # (queries, docs)
+        if masks is not None:
+            scores = np.where(masks, scores, -np.inf)
+        k = min(k, scores.shape[1])
+        if not k:
+            return [[] for _ in range(len(q))]
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        top = np.take_along_axis(top, np.argsort(-np.take_along_axis(scores, top, 1), axis=1, kind="stable"), 1)
+        return [[(int(i), float(scores[r, i])) for i in row if np.isfinite(scores[r, i])]
+                for r, row in enumerate(top)]
+
+
+def _source_hash(path: Path) -> str:
+    return hashlib.sha256(Path(path).read_bytes()).hexdigest()
+
+
+def open_index(embed_id: str, embed_model: BaseEmbedding, policies_path: Path = POLICIES_PATH,
+               index_dir: Optional[Path] = None, mmap: bool = True) -> LocalPolicyIndex:
+    """Load the persisted index, rebuilding it first if the corpus or embedding model changed."""
+    index_dir = Path(index_dir or os.getenv("LOCAL_INDEX_DIR", BASE / "data" / "policy_index"))
+    meta = {"embed_model": embed_id, "source_sha256": _source_hash(policies_path)}
+    try:
+        index = LocalPolicyIndex.load(index_dir, mmap=mmap)
+        if all(index.meta.get(k) == v for k, v in meta.items()):
+            return index
+    except (FileNotFoundError, ValueError, KeyError):
+        pass
+    LocalPolicyIndex.build(load_policies(policies_path), embed_model, meta).save(index_dir)
+    return LocalPolicyIndex.load(index_dir, mmap=mmap)
+
+
+class LocalPolicyRetriever(BaseRetriever):
+    """
+    Drop-in for WeaviateDirectRetriever that searches a LocalPolicyIndex in process.
+
+    `auto_filter` applies the same policy_filter() narrowing as the Weaviate
+    retriever, as a row mask ahead of the top-k (falling back to all rows).
+    """
+
+    def __init__(self, index: LocalPolicyIndex, embed_model: BaseEmbedding, top_k: int = 5,
+                 auto_filter: bool = False):
+        super().__init__()
+        self.index = index
+        self.embed_model = embed_model
+        self.top_k = top_k
+        self.auto_filter = auto_filter
+
+    def _rows(self, query_str: str) -> Optional[np.ndarray]:
+        f = policy_filter(query_str) if self.auto_filter else None
+        if f is None or f.empty:
+            return None
+        rows = np.flatnonzero([f.matches(d) for d in self.index.docs])
+        return rows if len(rows) else None
+
+    def _retrieve(self, query_bundle: QueryBundle) -> List[NodeWithScore]:
+        with span("policy.local_query", top_k=self.top_k) as s:
+            query = query_bundle.embedding or self.embed_model.get_query_embedding(query_bundle.query_str)
+            rows = self._rows(query_bundle.query_str)
+            hits = self.index.search(query, self.top_k, rows)
+            s.set(results=len(hits), filtered=rows is not None)
+            return self._to_nodes(hits)
+
+    def _to_nodes(self, hits: List[Tuple[int, float]]) -> List[NodeWithScore]:
+        return [policy_node(self.index.docs[i], max(0.0, score), policy_uuid(self.index.docs[i]["section"]))
+                for i, score in hits]
+
+    def retrieve_many(self, queries: Sequence[str], max_concurrency: int = 8) -> List[List[NodeWithScore]]:
+        """Results for each query, in order, scored against the whole batch in one matrix product."""
+        with span("policy.local_query_many", top_k=self.top_k, queries=len(queries)):
+            if not queries:
+                return []
+            vectors = [self.embed_model.get_query_embedding(q) for q in queries]
+            masks = None
+            if self.auto_filter:
+                masks = np.ones((len(queries), len(self.index.docs)), dtype=bool)
+                for r, q in enumerate(queries):
+                    rows = self._rows(q)
+                    if rows is not None:
+                        masks[r] = False
+                        masks[r, rows] = True
+            return [self._to_nodes(hits) for hits in self.index.search_many(vectors, self.top_k, masks)]
+
+    async def aretrieve_many(self, queries: Sequence[str], max_concurrency: int = 8) -> List[List[NodeWithScore]]:
+        return self.retrieve_many(queries, max_concurrency)
+
+
+def build_local_retriever(top_k: int = 5) -> LocalPolicyRetriever:
+    embed_id, embed_model = embed_model_from_env()
+    index = open_index(embed_id, embed_model, mmap=os.getenv("LOCAL_INDEX_MMAP", "1") != "0")
+    return LocalPolicyRetriever(index, embed_model, top_k=top_k,
+                                auto_filter=os.getenv("POLICY_AUTO_FILTER", "1") != "0")
+
+
+def build_local_query_engine(top_k: int = 5):
+    from llama_index.core.query_engine import RetrieverQueryEngine
+
+    return RetrieverQueryEngine.from_args(build_local_retriever(top_k), llm=policy_llm())
+
+
+_ENGINE = None
+_ENGINE_LOCK = threading.Lock()
+
+
+def get_local_query_engine():
+    """The shared local policy query engine, built on first use."""
+    global _ENGINE
+    with _ENGINE_LOCK:
+        if _ENGINE is None:
+            _ENGINE = build_local_query_engine()
+        return _ENGINE
+
+
+def reset_local_query_engine() -> None:
+    """Drop the shared engine; the next get_local_query_engine() reopens (and if needed rebuilds) the index."""
+    global _ENGINE
+    with _ENGINE_LOCK:
+        _ENGINE = None
@@ -0,0 +1,140 @@
+"""
+Incremental, idempotent sync of the policy file into Weaviate.
+
+Every policy gets a deterministic UUID from its section (policy_uuid) and a
+``content_hash`` property. A sync reads the stored hashes, upserts only new
+or changed policies (so only those are re-vectorized) and deletes removed
+ones with a single delete_many. Running it twice is a no-op.
+
+Queries go through the ``Policies`` alias. A rebuild (schema change, new
+vectorizer) loads a fresh ``Policies_v<version>_<timestamp>`` collection
+next to the live one and then repoints the alias, so retrieval never sees
+a missing or half-loaded collection.
+"""
+
+import json
+import logging
+import hashlib
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from basic.policies import policy_uuid
+
+log = logging.getLogger(__name__)
+
+
+class SyncResult(NamedTuple):
+    collection: str
+    added: List[str]      # sections
+    updated: List[str]    # sections
+    unchanged: int
+    deleted: List[str]    # uuids
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.added or self.updated or self.deleted)
+
+
+def content_hash(doc: Dict[str, Any]) -> str:
+    body = {k: v for k, v in doc.items() if k != "content_hash"}
+    return hashlib.sha256(json.dumps(body, sort_keys=True, separators=(",", ":")).encode()).hexdigest()
+
+
+def stored_hashes(collection) -> Dict[str, Optional[str]]:
+    """uuid -> content_hash of every stored policy (None for objects loaded before hashing)."""
+    return {str(o.uuid): o.properties.get("content_hash")
+            for o in collection.iterator(return_properties=["content_hash"])}
+
+
+def plan(stored: Dict[str, Optional[str]], docs: Iterable[Dict[str, Any]]
+         ) -> Tuple[List[Tuple[str, Dict[str, Any]]], List[str], List[str], List[str], int]:
+    """(upserts as (uuid, properties), added sections, updated sections, uuids to delete, unchanged count)."""
+    upserts, added, updated, keep, unchanged = [], [], [], set(), 0
+    for doc in docs:
+        uid = policy_uuid(doc["section"])
+        if uid in keep:
+            raise ValueError(f"Duplicate policy section: {doc['section']}")
+        keep.add(uid)
+        h = content_hash(doc)
+        if stored.get(uid) == h:
+            unchanged += 1
+            continue
+        (updated if uid in stored else added).append(doc["section"])
+        upserts.append((uid, {**doc, "content_hash": h}))
+    return upserts, added, updated, sorted(set(stored) - keep), unchanged
+
+
+def sync_collection(collection, docs: Iterable[Dict[str, Any]], dry_run: bool = False) -> SyncResult:
+    upserts, added, updated, deletes, unchanged = plan(stored_hashes(collection), docs)
+    if not dry_run:
+        if upserts:
+            with collection.batch.dynamic() as batch:
+                for uid, props in upserts:
+                    batch.add_object(properties=props, uuid=uid)  # same uuid replaces the object
+            failed = collection.batch.failed_objects
+            if failed:
+                raise RuntimeError(f"{len(failed)} policies failed to upsert: {failed[0].message}")
+        if deletes:
+            from weaviate.classes.query import Filter
+
+            collection.data.delete_many(where=Filter.by_id().contains_any(deletes))
+    return SyncResult(collection.name, added, updated, unchanged, deletes)
+
+
+def create_collection(client, name: str):
+    from weaviate.classes.config import Configure
+
+    return client.collections.create(name=name, vector_config=Configure.Vectors.text2vec_weaviate())
+
+
+def alias_target(client, alias: str) -> Optional[str]:
+    found = client.alias.get(alias_name=alias)
+    return found.collection if found is not None else None
+
+
+def resolve(client, name: str = "Policies") -> Optional[str]:
+    """
+    The collection `name` reads from: `name` itself in the pre-alias layout, the
+    alias target after a rebuild, or None when neither exists. collections.exists()
+    does not resolve aliases, so existence checks must go through here.
+    """
+    if client.collections.exists(name):
+        return name
+    return alias_target(client, name)
+
+
+def rebuild(client, docs: List[Dict[str, Any]], alias: str = "Policies", version: Any = None,
+            keep_old: bool = False) -> SyncResult:
+    """Blue/green: load a new collection, check it, then repoint `alias` at it."""
+    name = f"{alias}_v{version or 0}_{datetime.now().strftime('%Y%m%d%H%M%S')}"
+    result = sync_collection(create_collection(client, name), docs)
+    count = client.collections.get(name).aggregate.over_all(total_count=True).total_count
+    if count != len(docs):
+        client.collections.delete(name)
+        raise RuntimeError(f"{name} holds {count} of {len(docs)} policies; alias left unchanged")
+    old = alias_target(client, alias)
+    if old is not None:
+        client.alias.update(alias_name=alias, new_target_collection=name)
+    else:
+        if client.collections.exists(alias):
+            # One-time migration from the pre-alias layout: a real collection holds the
+            # alias name, so it has to go before the alias can exist.
+            log.warning("Replacing collection %s with an alias (brief gap on this first rebuild)", alias)
+            client.collections.delete(alias)
+        client.alias.create(alias_name=alias, target_collection=name)
+    if old is not None and not keep_old:
+        client.collections.delete(old)
+    return result
+
+
+def sync(client, docs: List[Dict[str, Any]], alias: str = "Policies", version: Any = None,
+         full_rebuild: bool = False, dry_run: bool = False, keep_old: bool = False) -> SyncResult:
+    """Incremental sync into whatever `alias` points at; rebuilds when asked or when nothing exists yet."""
+    target = alias_target(client, alias)
+    if target is None and client.collections.exists(alias) and not full_rebuild:
+        target = alias  # pre-alias layout: sync in place until the next rebuild
+    if full_rebuild or target is None:
+        if dry_run:
+            return SyncResult(f"{alias} (rebuild)", [d["section"] for d in docs], [], 0, [])
+        return rebuild(client, docs, alias, version, keep_old)
+    return sync_collection(client.collections.get(target), docs, dry_run)
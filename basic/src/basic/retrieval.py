@@ -1,74 +1,184 @@
 import os
+import asyncio
+import logging
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
 import weaviate
 from weaviate.classes.init import Auth
 from llama_index.core import VectorStoreIndex
 from llama_index.core.query_engine import RetrieverQueryEngine
 from llama_index.core.retrievers import VectorIndexRetriever
-from llama_index.core.schema import Document, NodeWithScore, QueryBundle
+from llama_index.core.schema import NodeWithScore, QueryBundle
 from llama_index.core.retrievers import BaseRetriever
-from typing import List
+from typing import Awaitable, Callable, List, Optional, Sequence
 from dotenv import load_dotenv
+from basic import limits, policy_sync
+from basic.policies import PolicyFilter, policy_filter, policy_llm, policy_node
+from basic.weaviate_pool import get_async_pool, get_pool
+from basic.tracing import span
 
 load_dotenv()
+log = logging.getLogger(__name__)
 
 class WeaviateDirectRetriever(BaseRetriever):
     """
     Direct Weaviate retriever that bypasses embedding compatibility issues
     by using Weaviate's native search capabilities.
+
+    `mode` is "near_text" (vector only) or "hybrid" (BM25 + vector fused by
+    `alpha`: 0 is pure keyword, 1 pure vector). With `auto_filter` the search
+    is narrowed server-side by the filter policy_filter() derives from the
+    query (named sections, or the tags of the resource asked about); if that
+    filter matches nothing the query is retried unfiltered.
     """
 
-    def __init__(self, weaviate_client, collection_name: str = "Policies", top_k: int = 5):
+    def __init__(self, weaviate_client, collection_name: str = "Policies", top_k: int = 5,
+                 on_error: Optional[Callable[[Exception, object], None]] = None,
+                 async_client: Optional[Callable[[], Awaitable[object]]] = None,
+                 mode: str = "near_text", alpha: float = 0.5, auto_filter: bool = False):
         super().__init__()
+        if mode not in ("near_text", "hybrid"):
+            raise ValueError(f"Unknown search mode: {mode}")
         self.client = weaviate_client
         self.collection_name = collection_name
         self.top_k = top_k
+        # Called with (exception, client) after a failed sync query.
+        self.on_error = on_error
+        # Zero-arg coroutine returning a connected WeaviateAsyncClient.
+        self.async_client = async_client
+        self.mode = mode
+        self.alpha = alpha
+        self.auto_filter = auto_filter
         self.collection = self.client.collections.get(collection_name)
 
-    def _retrieve(self, query_bundle: QueryBundle) -> List[NodeWithScore]:
-        """Retrieve documents using Weaviate's native near_text search"""
-        query_str = query_bundle.query_str
-
-        try:
-            # Use Weaviate's built-in vectorization with near_text
-            results = self.collection.query.near_text(
-                query=query_str,
-                limit=self.top_k,
-                return_metadata=['distance']
-            )
-
-            nodes = []
-            for obj in results.objects:
-                # Extract properties
-                title = obj.properties.get('title', '')
-                section = obj.properties.get('section', '')
-                text = obj.properties.get('text', '')
-
-                # Create comprehensive document text
-                doc_text = f"Title: {title}\nSection: {section}\nContent: {text}"
+    def _requests(self, query_str: str):
+        """(method, kwargs) to try in order: filtered first, then unfiltered when a filter applies."""
+        kwargs = {"query": query_str, "limit": self.top_k}
+        if self.mode == "hybrid":
+            kwargs.update(alpha=self.alpha, query_properties=["title^2", "section^3", "text", "tags"],
+                          return_metadata=['score'])
+        else:
+            kwargs.update(return_metadata=['distance'])
+        requests = [(self.mode, kwargs)]
+        f = policy_filter(query_str) if self.auto_filter else PolicyFilter()
+        if not f.empty:
+            requests.insert(0, (self.mode, {**kwargs, "filters": _weaviate_filter(f)}))
+        return requests
+
+    def _search(self, query_api, query_str: str):
+        for method, kwargs in self._requests(query_str):
+            # Use Weaviate's built-in vectorization (and BM25 index in hybrid mode)
+            with limits.VECTOR_STORE.hold():
+                results = getattr(query_api, method)(**kwargs)
+            if results.objects:
+                break
+        return results.objects, "filters" in kwargs
+
+    async def _asearch(self, query_api, query_str: str):
+        for method, kwargs in self._requests(query_str):
+            async with limits.VECTOR_STORE.ahold():
+                results = await getattr(query_api, method)(**kwargs)
+            if results.objects:
+                break
+        return results.objects, "filters" in kwargs
 
+    def _retrieve(self, query_bundle: QueryBundle) -> List[NodeWithScore]:
+        """Retrieve documents using Weaviate's native near_text or hybrid search"""
+        with span("weaviate.query", collection=self.collection_name, top_k=self.top_k,
+                  search=self.mode, api="sync") as s:
+            try:
+                objects, filtered = self._search(self.collection.query, query_bundle.query_str)
+                s.set(results=len(objects), filtered=filtered)
+                return self._to_nodes(objects)
+
+            except Exception as e:
+                log.warning("Error in Weaviate retrieval: %s", e)
+                s.record_error(e)
+                if self.on_error is not None:
+                    self.on_error(e, self.client)
+                return []
+
+    async def _aretrieve(self, query_bundle: QueryBundle) -> List[NodeWithScore]:
+        """Async search that does not block the event loop"""
+        if self.async_client is None:
+            return await asyncio.to_thread(self._retrieve, query_bundle)
+
+        with span("weaviate.query", collection=self.collection_name, top_k=self.top_k,
+                  search=self.mode, api="async") as s:
+            client = None
+            try:
+                client = await self.async_client()
+                collection = client.collections.get(self.collection_name)
+                objects, filtered = await self._asearch(collection.query, query_bundle.query_str)
+                s.set(results=len(objects), filtered=filtered)
+                return self._to_nodes(objects)
+
+            except Exception as e:
+                log.warning("Error in async Weaviate retrieval: %s", e)
+                s.record_error(e)
+                if client is not None:
+                    await get_async_pool().report_error(e, client)
+                return []
+
+    def retrieve_many(self, queries: Sequence[str], max_concurrency: int = 8) -> List[List[NodeWithScore]]:
+        """
+        Results for each query, in order. Distinct queries run concurrently over
+        the one client (gRPC multiplexes them on its connection); duplicates are
+        searched once.
+        """
+        unique = list(dict.fromkeys(queries))
+        with span("weaviate.query_many", queries=len(queries), unique=len(unique)):
+            workers = max(1, min(max_concurrency, len(unique)))
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="policy-query") as pool:
+                # copy_context keeps each query's span under weaviate.query_many
+                futures = [pool.submit(contextvars.copy_context().run, self._retrieve, QueryBundle(q))
+                           for q in unique]
+                found = dict(zip(unique, (f.result() for f in futures)))
+        return [found[q] for q in queries]
+
+    async def aretrieve_many(self, queries: Sequence[str], max_concurrency: int = 8) -> List[List[NodeWithScore]]:
+        """Async retrieve_many: the searches share the pooled async client and run under one semaphore."""
+        if self.async_client is None:
+            return await asyncio.to_thread(self.retrieve_many, queries, max_concurrency)
+        unique = list(dict.fromkeys(queries))
+        sem = asyncio.Semaphore(max(1, max_concurrency))
+
+        async def one(q: str) -> List[NodeWithScore]:
+            async with sem:
+                return await self._aretrieve(QueryBundle(q))
+
+        with span("weaviate.query_many", queries=len(queries), unique=len(unique)):
+            found = dict(zip(unique, await asyncio.gather(*(one(q) for q in unique))))
+        return [found[q] for q in queries]
+
+    @staticmethod
+    def _to_nodes(objects) -> List[NodeWithScore]:
+        nodes = []
+        for obj in objects:
+            metadata = getattr(obj, 'metadata', None)
+            distance = getattr(metadata, 'distance', None)
+            if distance is not None:
                 # Calculate score from distance (convert distance to similarity)
-                distance = getattr(obj.metadata, 'distance', 1.0) if hasattr(obj, 'metadata') else 1.0
                 score = max(0.0, 1.0 - distance)
+            else:
+                # Hybrid search reports a fused relevance score instead
+                score = getattr(metadata, 'score', None) or 0.0
+            nodes.append(policy_node(obj.properties, score, str(obj.uuid)))
+        return nodes
 
-                # Create document node
-                doc = Document(
-                    text=doc_text,
-                    metadata={
-                        'title': title,
-                        'section': section,
-                        'uuid': str(obj.uuid),
-                        **{k: v for k, v in obj.properties.items() if k not in ['title', 'section', 'text']}
-                    }
-                )
 
-                node_with_score = NodeWithScore(node=doc, score=score)
-                nodes.append(node_with_score)
+def _weaviate_filter(f: PolicyFilter):
+    from weaviate.classes.query import Filter
 
-            return nodes
-
-        except Exception as e:
-            print(f"Error in Weaviate retrieval: {e}")
-            return []
+    parts = []
+    if f.sections:
+        parts.append(Filter.by_property("section").contains_any(list(f.sections)))
+    if f.tags:
+        parts.append(Filter.by_property("tags").contains_any(list(f.tags)))
+    if f.roles:
+        parts.append(Filter.by_property("roles_allowed").contains_any(list(f.roles) + ["All Employees"]))
+    return Filter.all_of(parts) if len(parts) > 1 else parts[0]
 
 def build_policy_query_engine():
     """
@@ -83,7 +193,7 @@ def build_policy_query_engine():
         )
 
         # Verify collection exists
-        if not client.collections.exists("Policies"):
+        if policy_sync.resolve(client, "Policies") is None:
             raise ValueError("Policies collection not found. Run bootstrap_policies.py first.")
 
         # Create custom retriever
@@ -94,26 +204,63 @@ def build_policy_query_engine():
         )
 
         # Create query engine with the custom retriever
-        query_engine = RetrieverQueryEngine(retriever=retriever)
+        query_engine = RetrieverQueryEngine.from_args(retriever, llm=policy_llm())
 
         return query_engine, client
 
     except Exception as e:
-        print(f"Error building query engine: {e}")
+        log.exception("Error building query engine")
         raise
 
+_ENGINE = None
+_ENGINE_GEN = -1
+_ENGINE_LOCK = threading.Lock()
+
+
+def get_policy_query_engine():
+    """
+    Return a policy query engine bound to the pooled Weaviate client.
+
+    The engine is built once per pool connection and reused; when the pool
+    reconnects (new generation) it is rebuilt against the fresh client.
+    Unlike build_policy_query_engine(), callers must NOT close the client.
+    Search settings come from POLICY_SEARCH_MODE (default near_text; hybrid is opt-in),
+    POLICY_HYBRID_ALPHA, POLICY_TOP_K and POLICY_AUTO_FILTER.
+    """
+    global _ENGINE, _ENGINE_GEN
+    pool = get_pool()
+    client = pool.get()
+    with _ENGINE_LOCK:
+        if _ENGINE is not None and _ENGINE_GEN == pool.generation:
+            return _ENGINE
+        if policy_sync.resolve(client, "Policies") is None:
+            raise ValueError("Policies collection not found. Run bootstrap_policies.py first.")
+        retriever = WeaviateDirectRetriever(
+            weaviate_client=client,
+            collection_name="Policies",
+            top_k=int(os.getenv("POLICY_TOP_K", "5")),
+            on_error=pool.report_error,
+            async_client=lambda: get_async_pool().get(),
+            mode=os.getenv("POLICY_SEARCH_MODE", "near_text"),
+            alpha=float(os.getenv("POLICY_HYBRID_ALPHA", "0.5")),
+            auto_filter=os.getenv("POLICY_AUTO_FILTER", "1") != "0",
+        )
+        _ENGINE = RetrieverQueryEngine.from_args(retriever, llm=policy_llm())
+        _ENGINE_GEN = pool.generation
+        return _ENGINE
+
+
 def simple_policy_search(query: str) -> str:
     """
     Simple function to search policies and return formatted results.
     This is used as a fallback when the main query engine fails.
     """
+    pool = get_pool()
+    client = None
     try:
-        client = weaviate.connect_to_weaviate_cloud(
-            cluster_url=os.environ["WEAVIATE_URL"],
-            auth_credentials=Auth.api_key(os.environ["WEAVIATE_API_KEY"]),
-        )
+        client = pool.get()
 
-        if not client.collections.exists("Policies"):
+        if policy_sync.resolve(client, "Policies") is None:
             return "Policy database not available"
 
         collection = client.collections.get("Policies")
@@ -122,7 +269,6 @@ def simple_policy_search(query: str) -> str:
         results = collection.query.near_text(query=query, limit=3)
 
         if not results.objects:
-            client.close()
             return "No relevant policies found"
 
         # Format the best result
@@ -133,10 +279,11 @@ def simple_policy_search(query: str) -> str:
 
         response = f"{title} ({section}): {text}..."
 
-        client.close()
         return response
 
     except Exception as e:
+        if client is not None:
+            pool.report_error(e, client)
         return f"Policy search error: {str(e)}"
 
 if __name__ == "__main__":
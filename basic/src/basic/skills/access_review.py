@@ -0,0 +1,145 @@
+import json
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from basic.skills.rules import RuleEngine
+
+# One bit per way an employee can reach a (resource, action), stored in each matrix cell:
+# all targets, their own record, direct reports, deeper reports, only in some context
+# (e.g. quarterly reports), or only the rows the data source scopes to them (e.g. own
+# accounts). A cell with "all" set carries no other bit.
+SCOPES = ("all", "self", "reports", "chain", "context", "rows")
+ALL, SELF, REPORTS, CHAIN, CONTEXT, ROWS = (1 << i for i in range(len(SCOPES)))
+_RELATIONSHIPS = (("other", ALL), ("self", SELF), ("manager", REPORTS), ("chain", CHAIN))
+
+
+def scope_names(bits: int) -> str:
+    return "|".join(name for i, name in enumerate(SCOPES) if bits >> i & 1)
+
+
+class AccessMatrix(NamedTuple):
+    """
+    Who can reach what: scopes[i, r, a] holds the SCOPES bits under which
+    employee employee_ids[i] may perform actions[a] on resources[r].
+    """
+    employee_ids: np.ndarray
+    resources: Tuple[str, ...]
+    actions: Tuple[str, ...]
+    scopes: np.ndarray  # uint8, (employees, resources, actions)
+    meta: Dict[str, str]
+
+    def save(self, path: Path) -> Path:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + ".tmp")
+        with open(tmp, "wb") as f:
+            np.savez_compressed(f, employee_ids=self.employee_ids, resources=np.array(self.resources),
+                                actions=np.array(self.actions), scopes=self.scopes,
+                                meta=np.array(json.dumps(self.meta)))
+        tmp.replace(path)
+        return path
+
+    @classmethod
+    def load(cls, path: Path) -> "AccessMatrix":
+        with np.load(path) as z:
+            return cls(z["employee_ids"], tuple(z["resources"].tolist()), tuple(z["actions"].tolist()),
+                       z["scopes"], json.loads(str(z["meta"])))
+
+    def frame(self, scope: int = ALL) -> pd.DataFrame:
+        """Boolean employee x "resource:action" table of cells granted under `scope`."""
+        cols = [f"{r}:{a}" for r in self.resources for a in self.actions]
+        flat = (self.scopes & scope).astype(bool).reshape(len(self.employee_ids), -1)
+        return pd.DataFrame(flat, index=pd.Index(self.employee_ids, name="employee_id"), columns=cols)
+
+
+def role_table(rules: RuleEngine, roles: Sequence[str], resources: Sequence[str],
+               actions: Sequence[str]) -> np.ndarray:
+    """SCOPES bits for every (role, resource, action): one rule evaluation per distinct role, not per employee."""
+    contexts = sorted(rules.values("report_type"))
+    table = np.zeros((len(roles), len(resources), len(actions)), dtype=np.uint8)
+    for i, role in enumerate(roles):
+        for r, resource in enumerate(resources):
+            for a, action in enumerate(actions):
+                bits = 0
+                for relationship, bit in _RELATIONSHIPS:
+                    d = rules.decide(role, resource, action, relationship)
+                    if d.allow:
+                        bits |= ROWS if d.row_scope else bit
+                if bits & ALL:
+                    bits = ALL  # unrestricted access subsumes the narrower scopes
+                elif any(rules.decide(role, resource, action, "other", c).allow for c in contexts):
+                    bits |= CONTEXT
+                table[i, r, a] = bits
+    return table
+
+
+def review(emp: pd.DataFrame, rules: RuleEngine, resources: Optional[Sequence[str]] = None,
+           actions: Optional[Sequence[str]] = None) -> AccessMatrix:
+    """
+    The full employee x resource x action matrix for `emp` (employees.csv).
+
+    Rules are evaluated once per distinct role and broadcast to employees via
+    the role codes; the reports and chain bits are then cleared for employees
+    without direct reports or without reports two levels down.
+    """
+    resources = tuple(resources or rules.resources())
+    actions = tuple(actions or rules.actions() or ("read",))
+    codes, roles = pd.factorize(emp["role"].fillna("").astype(str))
+    scopes = role_table(rules, list(roles), resources, actions)[codes]
+    ids = emp["employee_id"].to_numpy(dtype=np.int64)
+    managers = emp["manager_id"].dropna().to_numpy(dtype=np.int64)
+    skip_level = emp.loc[np.isin(ids, managers), "manager_id"].dropna().to_numpy(dtype=np.int64)
+    scopes[~np.isin(ids, managers)] &= np.uint8(~REPORTS & 0xFF)
+    scopes[~np.isin(ids, skip_level)] &= np.uint8(~CHAIN & 0xFF)
+    meta = {"generated": datetime.now().isoformat(timespec="seconds"), "employees": str(len(ids))}
+    return AccessMatrix(ids, resources, actions, scopes, meta)
+
+
+def diff(old: AccessMatrix, new: AccessMatrix) -> pd.DataFrame:
+    """Cells whose scopes changed between two runs, one row per (employee, resource, action)."""
+    ids = np.union1d(old.employee_ids, new.employee_ids)
+    resources = sorted(set(old.resources) | set(new.resources))
+    actions = sorted(set(old.actions) | set(new.actions))
+
+    def aligned(m: AccessMatrix) -> np.ndarray:
+        out = np.zeros((len(ids), len(resources), len(actions)), dtype=np.uint8)
+        rows = np.searchsorted(ids, m.employee_ids)
+        res = [resources.index(r) for r in m.resources]
+        act = [actions.index(a) for a in m.actions]
+        out[np.ix_(rows, res, act)] = m.scopes
+        return out
+
+    before, after = aligned(old), aligned(new)
+    i, r, a = np.nonzero(before != after)
+    b, n = before[i, r, a], after[i, r, a]
+    change = np.where(b == 0, "granted", np.where(n == 0, "revoked", "changed"))
+    return pd.DataFrame({
+        "employee_id": ids[i],
+        "resource": np.asarray(resources, dtype=object)[r],
+        "action": np.asarray(actions, dtype=object)[a],
+        "before": [scope_names(int(x)) for x in b],
+        "after": [scope_names(int(x)) for x in n],
+        "change": change,
+    })
+
+
+def latest(out_dir: Path) -> Optional[Path]:
+    runs = sorted(Path(out_dir).glob("access-*.npz"))
+    return runs[-1] if runs else None
+
+
+def run(emp: pd.DataFrame, rules: RuleEngine, out_dir: Path) -> Tuple[Path, Optional[pd.DataFrame]]:
+    """Review, save as access-<timestamp>.npz and diff against the previous run (None on the first)."""
+    out_dir = Path(out_dir)
+    previous = latest(out_dir)
+    matrix = review(emp, rules)
+    path = matrix.save(out_dir / f"access-{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}.npz")
+    if previous is None:
+        return path, None
+    changes = diff(AccessMatrix.load(previous), matrix)
+    changes.to_csv(path.with_suffix(".diff.csv"), index=False)
+    return path, changes
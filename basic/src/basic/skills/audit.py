@@ -0,0 +1,461 @@
+import os
+import re
+import gzip
+import json
+import queue
+import logging
+import shutil
+import threading
+import time
+from contextlib import contextmanager
+from datetime import date, datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional, Set, Union
+
+from basic.tracing import span
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-process use only
+    fcntl = None
+
+log = logging.getLogger(__name__)
+
+_STOP = object()
+_PLAIN = re.compile(r"^audit-(\d{4}-\d{2}-\d{2})\.jsonl$")  # an unsealed day segment
+_DAY_FILE = re.compile(r"^audit-(\d{4}-\d{2}-\d{2})\.(?:jsonl(?:\.gz)?|idx\.jsonl?)$")  # segment or sidecar
+
+
+class AuditRecord(NamedTuple):
+    """One serialized audit line plus the fields the segment index is keyed on."""
+
+    line: str
+    day: str
+    user_email: str
+    resource: str
+
+    @classmethod
+    def from_entry(cls, entry: Dict[str, Any], now: Optional[datetime] = None) -> "AuditRecord":
+        # The segment day comes from the server clock at submit time, never from the
+        # entry's own timestamp, which the caller (or the LLM) supplies.
+        day = (now or datetime.now(timezone.utc)).date().isoformat()
+        return cls(json.dumps(entry) + "\n", day,
+                   str(entry.get("user_email") or ""), str(entry.get("resource") or ""))
+
+
+class JsonlFileStore:
+    """Single flat append-only JSONL file."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.spill_path = self.path.with_name(self.path.stem + ".spill.jsonl")
+        self._f = None
+
+    def write(self, records: List[AuditRecord]) -> None:
+        if self._f is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._f = open(self.path, "a")
+        self._f.write("".join(r.line for r in records))
+        self._f.flush()
+
+    def sync(self) -> None:
+        if self._f is not None:
+            os.fsync(self._f.fileno())
+
+    def close(self) -> None:
+        if self._f is not None:
+            self._f.close()
+            self._f = None
+
+
+@contextmanager
+def _file_lock(path: Path) -> Iterator[None]:
+    """Exclusive advisory lock on `path` across processes (a no-op where fcntl is unavailable)."""
+    with open(path, "a") as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+class SegmentedAuditStore:
+    """
+    Audit storage split into one JSONL segment per UTC day.
+
+    The segment for the most recent day stays open as `audit-<day>.jsonl`;
+    when a later day starts it is sealed, i.e. gzipped into
+    `audit-<day>.jsonl.gz` (late entries for a sealed day are added as an
+    extra gzip member). Sealed files are built next to the segment and
+    swapped in with os.replace. Every segment has a sidecar
+    `audit-<day>.idx.jsonl` to which each batch appends only the user_emails
+    and resources the day had not seen yet, so `query()` only opens segments
+    that can match and a commit costs O(new keys), not O(index).
+
+    Each write holds an exclusive flock on `<root>/.lock`, so several worker
+    processes may share one root; a process whose open segment was sealed by
+    another reopens it.
+    """
+
+    def __init__(self, root: Path, compress: bool = True):
+        self.root = Path(root)
+        self.spill_path = self.root / "spill.jsonl"
+        self.compress = compress
+        self._day: Optional[str] = None
+        self._f = None
+        self._index: Dict[str, Dict[str, Set[str]]] = {}
+        self._lock = threading.Lock()
+
+    def _segment(self, day: str, sealed: bool = False) -> Path:
+        return self.root / (f"audit-{day}.jsonl" + (".gz" if sealed else ""))
+
+    def _sidecar(self, day: str) -> Path:
+        return self.root / f"audit-{day}.idx.jsonl"
+
+    def _read_index(self, day: str) -> Dict[str, Set[str]]:
+        idx: Dict[str, Set[str]] = {"user_email": set(), "resource": set()}
+        legacy = self.root / f"audit-{day}.idx.json"  # whole-file index from earlier versions
+        lines = [legacy.read_text()] if legacy.exists() else []
+        try:
+            with open(self._sidecar(day)) as f:
+                lines += f.readlines()
+        except FileNotFoundError:
+            pass
+        for line in lines:
+            try:
+                raw = json.loads(line)
+            except ValueError:
+                continue  # a line cut short by a crash
+            for k in idx:
+                idx[k].update(raw.get(k, ()))
+        return idx
+
+    def _append_index(self, day: str, records: List[AuditRecord]) -> None:
+        idx = self._index.get(day)
+        if idx is None:
+            idx = self._index[day] = self._read_index(day)
+            self._sidecar(day).touch()  # exists even when no entry of the day names a user or resource
+        new = {"user_email": {r.user_email for r in records if r.user_email} - idx["user_email"],
+               "resource": {r.resource for r in records if r.resource} - idx["resource"]}
+        if any(new.values()):
+            with open(self._sidecar(day), "a") as f:
+                f.write(json.dumps({k: sorted(v) for k, v in new.items() if v}) + "\n")
+            for k, v in new.items():
+                idx[k] |= v
+
+    def write(self, records: List[AuditRecord]) -> None:
+        with self._lock:
+            self.root.mkdir(parents=True, exist_ok=True)
+            by_day: Dict[str, List[AuditRecord]] = {}
+            for r in records:
+                by_day.setdefault(r.day, []).append(r)
+            with _file_lock(self.root / ".lock"):
+                for day in sorted(by_day):
+                    self._write_day(day, by_day[day])
+
+    def _write_day(self, day: str, records: List[AuditRecord]) -> None:
+        if self._day is None or day >= self._day:
+            if day != self._day:
+                self._rotate(day)
+            elif os.fstat(self._f.fileno()).st_nlink == 0:
+                # Another process sealed (and unlinked) this day's segment.
+                self._f.close()
+                self._f = open(self._segment(day), "a")
+            self._f.write("".join(r.line for r in records))
+            self._f.flush()
+        else:
+            # Late entry for an older day: reopen its plain segment briefly and seal again.
+            with open(self._segment(day), "a") as f:
+                f.write("".join(r.line for r in records))
+            if self.compress:
+                self._seal(day)
+        self._append_index(day, records)
+        if day != self._day:
+            self._index.pop(day, None)
+
+    def _rotate(self, day: str) -> None:
+        old = self._day
+        if self._f is not None:
+            self._f.close()
+        self._day, self._f = day, open(self._segment(day), "a")
+        if old is not None:
+            self._index.pop(old, None)
+        if self.compress:
+            # Seal the previous day, plus any plain segments left by an earlier process.
+            for p in self.root.glob("audit-*.jsonl"):
+                m = _PLAIN.match(p.name)
+                if m and m.group(1) < day:
+                    self._seal(m.group(1))
+
+    def _seal(self, day: str) -> None:
+        plain, sealed = self._segment(day), self._segment(day, sealed=True)
+        if not plain.exists():
+            return
+        tmp = sealed.with_name(sealed.name + ".tmp")
+        with open(tmp, "wb") as dst:
+            if sealed.exists():
+                with open(sealed, "rb") as src:  # earlier gzip members stay as they are
+                    shutil.copyfileobj(src, dst)
+            with open(plain, "rb") as src, gzip.GzipFile(fileobj=dst, mode="wb") as gz:
+                shutil.copyfileobj(src, gz)
+            dst.flush()
+            os.fsync(dst.fileno())
+        os.replace(tmp, sealed)
+        # A crash right here leaves the lines in both files: read twice, never lost.
+        plain.unlink()
+
+    def sync(self) -> None:
+        if self._f is not None:
+            os.fsync(self._f.fileno())
+
+    def close(self) -> None:
+        with self._lock:
+            if self._f is not None:
+                self._f.close()
+                self._f = None
+
+    def days(self) -> List[str]:
+        # Segments count too: a day written before sidecars were always created may lack one.
+        return sorted({m.group(1) for m in map(_DAY_FILE.match, (p.name for p in self.root.glob("audit-*")))
+                       if m})
+
+    def query(self, user_email: Optional[str] = None, resource: Optional[str] = None,
+              start: Union[date, str, None] = None, end: Union[date, str, None] = None) -> Iterator[Dict[str, Any]]:
+        """Yield entries matching every given criterion; start/end are inclusive days."""
+        lo = str(start) if start is not None else ""
+        hi = str(end) if end is not None else "9999-12-31"
+        for day in self.days():
+            if not lo <= day <= hi:
+                continue
+            idx = self._read_index(day)
+            if user_email is not None and user_email not in idx["user_email"]:
+                continue
+            if resource is not None and resource not in idx["resource"]:
+                continue
+            for entry in self._read_day(day):
+                if user_email is not None and entry.get("user_email") != user_email:
+                    continue
+                if resource is not None and entry.get("resource") != resource:
+                    continue
+                yield entry
+
+    def _read_day(self, day: str) -> Iterator[Dict[str, Any]]:
+        sealed, plain = self._segment(day, sealed=True), self._segment(day)
+        if sealed.exists():
+            with gzip.open(sealed, "rt") as f:
+                for line in f:
+                    yield json.loads(line)
+        if plain.exists():
+            with open(plain) as f:
+                for line in f:
+                    yield json.loads(line)
+
+
+class _Barrier:
+    """Queue marker: set once every entry submitted before it has been written."""
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+
+
+class AuditSink:
+    """
+    Background, group-committing writer for the append-only audit JSONL.
+
+    Lines go to `store` (a SegmentedAuditStore or JsonlFileStore; a plain
+    path means a single JsonlFileStore).
+
+    `submit()` serializes the entry on the caller's thread and enqueues the
+    line; a single writer thread appends lines in batches of up to
+    `batch_size`, or whatever arrived within `flush_interval` seconds of the
+    first line of the batch. With `fsync=True` every batch is fsynced before
+    the next one starts. The queue is bounded: when the writer falls behind,
+    `submit()` blocks rather than dropping audit records.
+
+    A batch the store fails to write is retried `retries` times with
+    exponential backoff from `backoff` seconds, then appended (and fsynced)
+    to `spill_path` (default: the store's spill file), keeping each entry's
+    segment day. When the writer thread starts (first submit, or `start()`)
+    it replays the spill file into the store before anything else; a replay
+    that fails leaves the file for the next start. Should the spill file fail
+    too, the lines are logged at CRITICAL level as a last resort. A batch
+    that failed halfway, or a replay cut short, may be written twice.
+    """
+
+    def __init__(self, store: Union[Path, str, JsonlFileStore, SegmentedAuditStore],
+                 batch_size: int = 64, flush_interval: float = 0.05,
+                 fsync: bool = False, maxsize: int = 10_000, retries: int = 5,
+                 backoff: float = 0.05, spill_path: Optional[Path] = None,
+                 clock: Callable[[], datetime] = lambda: datetime.now(timezone.utc)):
+        self.store = JsonlFileStore(Path(store)) if isinstance(store, (str, Path)) else store
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.fsync = fsync
+        self.retries = retries
+        self.backoff = backoff
+        self.clock = clock  # picks the segment day of each submitted entry
+        if spill_path is None:
+            spill_path = getattr(self.store, "spill_path", None) or Path("audit-spill.jsonl")
+        self.spill_path = Path(spill_path)
+        self._q: "queue.Queue[Any]" = queue.Queue(maxsize=maxsize)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._closed = False
+        self.written = 0
+        self.batches = 0
+        self.failed = 0   # failed write attempts
+        self.spilled = 0  # records written to spill_path instead of the store
+        self.replayed = 0  # spilled records later written to the store
+
+    def _ensure_started(self) -> None:
+        if self._closed:
+            raise RuntimeError("audit sink is closed")
+        if self._thread is None:
+            with self._lock:
+                if self._closed:
+                    raise RuntimeError("audit sink is closed")
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="audit-sink", daemon=True)
+                    self._thread.start()
+
+    def start(self) -> None:
+        """Start the writer now (it otherwise starts on the first submit), replaying any spilled entries."""
+        self._ensure_started()
+
+    def submit(self, entry: Dict[str, Any]) -> None:
+        """Queue one entry, blocking while the queue is full."""
+        record = AuditRecord.from_entry(entry, self.clock())
+        self._ensure_started()
+        self._q.put(record)
+
+    def try_submit(self, entry: Dict[str, Any]) -> bool:
+        """Queue one entry without blocking; False when the queue is full."""
+        record = AuditRecord.from_entry(entry, self.clock())
+        self._ensure_started()
+        try:
+            self._q.put_nowait(record)
+            return True
+        except queue.Full:
+            return False
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until everything submitted so far is on disk."""
+        if self._thread is None:
+            return True
+        barrier = _Barrier()
+        self._q.put(barrier)
+        return barrier.done.wait(timeout)
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        """Drain the queue and stop the writer. Safe to call more than once."""
+        with self._lock:
+            self._closed = True
+            thread = self._thread
+        if thread is None or not thread.is_alive():
+            return
+        self._q.put(_STOP)
+        thread.join(timeout)
+
+    def pending(self) -> int:
+        return self._q.qsize()
+
+    def _spill(self, records: List[AuditRecord]) -> None:
+        try:
+            self.spill_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.spill_path, "a") as f:
+                f.write("".join(json.dumps({"day": r.day, "entry": json.loads(r.line)}) + "\n" for r in records))
+                f.flush()
+                os.fsync(f.fileno())
+            self.spilled += len(records)
+            log.error("Audit store unavailable: %d entries spilled to %s", len(records), self.spill_path)
+        except Exception:
+            log.exception("Audit spill to %s failed; logging the entries instead", self.spill_path)
+            for r in records:
+                log.critical("unwritten audit entry: %s", r.line.rstrip("\n"))
+
+    def replay_spill(self) -> int:
+        """
+        Write the entries in `spill_path` into the store, in their original
+        days, and remove the file; returns how many were written. The file is
+        first renamed aside, so entries spilled meanwhile wait for the next replay.
+        """
+        replaying = self.spill_path.with_name(self.spill_path.name + ".replay")
+        if not replaying.exists():  # else: left by a replay that failed, retry it first
+            try:
+                os.replace(self.spill_path, replaying)
+            except FileNotFoundError:
+                return 0
+        records = []
+        with open(replaying) as f:
+            for line in f:
+                try:
+                    raw = json.loads(line)
+                except ValueError:
+                    log.error("Skipping unreadable spilled audit line: %r", line)
+                    continue
+                if "entry" in raw and "day" in raw:
+                    records.append(AuditRecord.from_entry(raw["entry"])._replace(day=raw["day"]))
+                else:  # a bare entry, as spilled by earlier versions
+                    records.append(AuditRecord.from_entry(raw, self.clock()))
+        if records:
+            with span("audit.replay", entries=len(records)):
+                self.store.write(records)
+                self.store.sync()
+        replaying.unlink()
+        self.replayed += len(records)
+        log.warning("Replayed %d spilled audit entries from %s", len(records), self.spill_path)
+        return len(records)
+
+    def _run(self) -> None:
+        try:
+            try:
+                self.replay_spill()
+            except Exception:
+                log.exception("Replaying %s failed; it is kept for the next start", self.spill_path)
+            stop = False
+            while not stop:
+                first = self._q.get()
+                items = [first]
+                deadline = time.monotonic() + self.flush_interval
+                while len(items) < self.batch_size and isinstance(first, AuditRecord):
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    try:
+                        items.append(self._q.get(timeout=remaining))
+                    except queue.Empty:
+                        break
+                    if items[-1] is _STOP or isinstance(items[-1], _Barrier):
+                        break
+                stop = self._commit(items)
+        finally:
+            self.store.close()
+
+    def _commit(self, items: List[Any]) -> bool:
+        records = [i for i in items if isinstance(i, AuditRecord)]
+        if records:
+            with span("audit.write", entries=len(records), fsync=self.fsync) as s:
+                for attempt in range(self.retries + 1):
+                    try:
+                        self.store.write(records)
+                        if self.fsync:
+                            self.store.sync()
+                        self.written += len(records)
+                        self.batches += 1
+                        break
+                    except Exception as e:
+                        self.failed += 1
+                        s.record_error(e)
+                        log.warning("Error writing audit batch of %d entries (attempt %d of %d): %s",
+                                    len(records), attempt + 1, self.retries + 1, e)
+                        if attempt < self.retries:
+                            time.sleep(min(self.backoff * 2 ** attempt, 5.0))
+                else:
+                    s.set(spilled=len(records))
+                    self._spill(records)
+        for i in items:
+            if isinstance(i, _Barrier):
+                i.done.set()
+        return any(i is _STOP for i in items)
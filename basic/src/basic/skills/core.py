@@ -1,87 +1,361 @@
-import os, json
+import os, sys, asyncio, atexit, itertools, threading
 from pathlib import Path
 import pandas as pd
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Iterable, Iterator, List, Mapping, NamedTuple, Optional, Set, Tuple
 from dotenv import load_dotenv
-from basic.retrieval import build_policy_query_engine
+from basic.skills.directory import EmployeeDirectory
+from basic.skills.cache import TTLCache
+from basic.skills.policy_notes import PolicyNotes, top_section
+from basic.skills.audit import AuditSink, SegmentedAuditStore
+from basic.skills.datasource import DataSource, PandasDataSource, SQLiteDataSource
+from basic.skills.reloader import FileReloader
+from basic.skills.rules import Decision, RuleEngine
+from basic import limits
+from basic.tracing import span, set_attributes
 from datetime import datetime
 
 load_dotenv()
 
 BASE = Path(__file__).resolve().parents[3]  # points to basic/
-EMP = pd.read_csv(BASE / "data" / "employees.csv")
 
-def _role(email:str)->Optional[str]:
-    r = EMP.loc[EMP["email"]==email]
-    return None if r.empty else str(r.iloc[0]["role"])
+class EmployeeSnapshot(NamedTuple):
+    """employees.csv as loaded at one point in time; replaced wholesale on reload."""
+    emp: pd.DataFrame
+    directory: EmployeeDirectory
+    version: int
 
-def _is_mgr_of(mgr_emp_id:int, emp_id:int)->bool:
+_VERSIONS = itertools.count(1)
+
+def _load_employees(path:Path)->EmployeeSnapshot:
+    emp = pd.read_csv(path)
+    return EmployeeSnapshot(emp, EmployeeDirectory.from_frame(emp), next(_VERSIONS))
+
+def _on_employees_swap(snap:EmployeeSnapshot)->None:
+    global EMP, DIRECTORY, DATA
+    EMP, DIRECTORY = snap.emp, snap.directory
+    data = globals().get("DATA")  # not opened yet: init() will read the new snapshot
+    if isinstance(data, PandasDataSource):
+        DATA = PandasDataSource(snap.emp, snap.directory)
+    elif isinstance(data, SQLiteDataSource):
+        data.refresh()
+    invalidate_decisions()
+
+EMPLOYEES = FileReloader(BASE / "data" / "employees.csv", _load_employees, on_swap=_on_employees_swap,
+                         interval=float(os.getenv("EMPLOYEES_RELOAD_INTERVAL", "5")))
+# Aliases of the current snapshot; per-call code reads EMPLOYEES.current once instead.
+EMP, DIRECTORY = EMPLOYEES.current.emp, EMPLOYEES.current.directory
+# Decisions depend only on (role, resource, action, relationship, report_type) and the
+# employees snapshot version, never on the individual requester, so they are shared across users.
+DECISIONS = TTLCache(maxsize=int(os.getenv("DECISION_CACHE_SIZE", "1024")),
+                     ttl=float(os.getenv("DECISION_CACHE_TTL", "300")))
+
+POLICIES_PATH = Path(os.getenv("POLICIES_PATH", BASE / "data" / "policies.json"))
+
+def _load_rules()->Tuple[RuleEngine, Tuple[str,...], Set[str]]:
+    """The rules, every resource a policy governs, and the roles they name (some absent from employees.csv)."""
+    rules = RuleEngine.load(POLICIES_PATH)
+    return rules, tuple(rules.resources()), rules.roles()
+
+RULES, RESOURCES, RULE_ROLES = _load_rules()
+NOTES_PATH = Path(os.getenv("POLICY_NOTES_PATH", BASE / "data" / "policy_notes.json"))
+NOTES = PolicyNotes.load(NOTES_PATH)
+PAGE_SIZE = int(os.getenv("FETCH_PAGE_SIZE", "50"))
+
+def _data_source()->DataSource:
+    """DATA_BACKEND=sqlite (default) serves every dataset; pandas serves employee resources from EMP."""
+    if os.getenv("DATA_BACKEND", "sqlite") == "pandas":
+        return PandasDataSource(EMP, DIRECTORY)
+    return SQLiteDataSource(BASE / "data", os.getenv("DATA_DB_PATH", BASE / "data" / "datasets.sqlite"))
+
+# DATA, AUDIT_STORE and AUDIT are created by init(), not at import: importing this module
+# opens no database, starts no thread and registers no exit hook.
+_LAZY = ("DATA", "AUDIT_STORE", "AUDIT")
+_INIT_LOCK = threading.Lock()
+_READY = False
+
+def init()->None:
+    """
+    Open the data source (building datasets.sqlite if needed) and the audit sink,
+    and start watching employees.csv. Idempotent; the functions that need them call
+    it, and reading core.DATA / AUDIT_STORE / AUDIT does too. Values already set
+    (e.g. by tests) are kept.
+    """
+    global DATA, AUDIT_STORE, AUDIT, _READY
+    if _READY:
+        return
+    with _INIT_LOCK:
+        if _READY:
+            return
+        g = globals()
+        if "DATA" not in g:
+            DATA = _data_source()
+        if "AUDIT_STORE" not in g:
+            # AUD-1.1 requires 7-year retention: keep one gzipped, indexed segment per day.
+            AUDIT_STORE = SegmentedAuditStore(BASE / "logs" / "audit",
+                                              compress=os.getenv("AUDIT_COMPRESS", "1") != "0")
+        if "AUDIT" not in g:
+            AUDIT = AuditSink(
+                AUDIT_STORE,
+                batch_size=int(os.getenv("AUDIT_BATCH_SIZE", "64")),
+                flush_interval=float(os.getenv("AUDIT_FLUSH_MS", "50")) / 1000,
+                fsync=os.getenv("AUDIT_DURABILITY", "flush") == "fsync",
+            )
+            atexit.register(AUDIT.close)  # drain queued entries even when used outside the workflow
+            AUDIT.start()  # replays entries an earlier run had to spill
+        EMPLOYEES.start()
+        _READY = True
+
+def __getattr__(name:str)->Any:
+    if name in _LAZY:
+        init()
+        return globals()[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def reload_employees()->bool:
+    """Pick up employees.csv changes now instead of waiting for the next poll."""
+    return EMPLOYEES.check()
+
+def _role(email:str, d:Optional[EmployeeDirectory]=None)->Optional[str]:
+    return (d or EMPLOYEES.current.directory).role_of(email)
+
+def _is_mgr_of(mgr_emp_id:int, emp_id:int, d:Optional[EmployeeDirectory]=None)->bool:
     try:
-        return bool(EMP.loc[EMP["employee_id"]==emp_id, "manager_id"].eq(mgr_emp_id).any())
+        return (d or EMPLOYEES.current.directory).is_manager_of(mgr_emp_id, emp_id)
     except Exception:
         return False
 
+def _relationship(user_email:str, target_employee_id:Optional[int],
+                  d:Optional[EmployeeDirectory]=None)->str:
+    """
+    How the requester relates to the target employee: self, manager (direct),
+    chain (skip-level manager anywhere above the target), other or none.
+    """
+    d = d or EMPLOYEES.current.directory
+    req = d.get(user_email)
+    if req is None or not target_employee_id:
+        return "none"
+    if req.employee_id==int(target_employee_id):
+        return "self"
+    if _is_mgr_of(req.employee_id, int(target_employee_id), d):
+        return "manager"
+    if d.is_in_chain(req.employee_id, int(target_employee_id)):
+        return "chain"
+    return "other"
+
+def _decide(role:str, resource:str, action:str, relationship:str, report_type:str)->Decision:
+    return RULES.decide(role, resource, action, relationship, report_type)
+
+def get_policy_query_engine():
+    # Imported on first use: retrieval pulls in weaviate (or the local index) and
+    # llama_index query engines, which only the RAG fallback needs.
+    from basic.policies import get_policy_query_engine as _get
+    return _get()
+
+def policy_note(resource:str, role:str)->Dict[str,str]:
+    """Policy note + section for (resource, role): precomputed table first, RAG query as fallback."""
+    hit = NOTES.get(resource, role)
+    set_attributes(note_source="precomputed" if hit is not None else "rag")
+    if hit is not None:
+        return hit
+    with span("rag.synthesis", resource=resource, role=role):
+        resp = get_policy_query_engine().query(PolicyNotes.question(resource, role))
+    return NOTES.put(resource, role, resp.response or "", top_section(resp))
+
+async def apolicy_note(resource:str, role:str)->Dict[str,str]:
+    hit = NOTES.get(resource, role)
+    set_attributes(note_source="precomputed" if hit is not None else "rag")
+    if hit is not None:
+        return hit
+    with span("rag.synthesis", resource=resource, role=role):
+        qe = await asyncio.to_thread(get_policy_query_engine)
+        resp = await qe.aquery(PolicyNotes.question(resource, role))
+    return NOTES.put(resource, role, resp.response or "", top_section(resp))
+
+def policy_note_roles()->List[str]:
+    """Every role the precompute step should cover."""
+    return sorted(set(EMPLOYEES.current.emp["role"].dropna().astype(str)) | RULE_ROLES)
+
+def _decision_key(user_email:str, user_role:str, resource:str, action:str,
+                  target_employee_id:Optional[int], context:Optional[Dict[str,Any]],
+                  snap:Optional[EmployeeSnapshot]=None)->Tuple[str, tuple]:
+    init()  # keeps the employees.csv watcher running for decision-only callers
+    snap = snap or EMPLOYEES.current  # one consistent snapshot for the whole decision
+    with span("directory.lookup", snapshot=snap.version):
+        role = _role(user_email, snap.directory) or user_role
+        relationship = _relationship(user_email, target_employee_id, snap.directory)
+    report_type = str((context or {}).get("report_type","")) if resource=="financial_report" else ""
+    return role, (role, resource, action, relationship, report_type, snap.version)
+
+def _finish(key:tuple, note:Dict[str,str])->Dict[str,Any]:
+    d = _decide(*key[:5])
+    rag = note["note"]
+    decision = {
+        "allow": d.allow,
+        "reason": " ".join(d.reasons) + (f" Policy note: {rag}" if rag else ""),
+        "policy_ref": "Policies",
+        "policy_section": note["section"] or d.section,
+        "requires_approval": d.requires_approval,
+    }
+    if d.row_scope:
+        decision["row_scope"] = d.row_scope  # fetch_data returns only rows where this column is the requester's id
+    DECISIONS.set(key, decision)
+    return dict(decision)
+
 def check_permissions(user_email:str, user_role:str, resource:str, action:str,
                       target_employee_id:Optional[int]=None,
                       context:Optional[Dict[str,Any]]=None)->Dict[str,Any]:
-    role = _role(user_email) or user_role
-    allow, reasons = False, []
-
-    if resource=="directory":
-        allow=True; reasons.append("Company directory accessible to all employees (GEN-1.1).")
-    elif resource=="performance_summary":
-        if role in {"HR","HR Manager","HR Director","Admin"}:
-            allow=True; reasons.append("HR may access all performance reviews (HR-1.2).")
-        else:
-            req = EMP.loc[EMP["email"]==user_email]
-            if not req.empty and target_employee_id:
-                if int(req.iloc[0]["employee_id"])==int(target_employee_id):
-                    allow=True; reasons.append("Employees may access their own reviews (HR-1.2).")
-                elif role.endswith("Manager") and _is_mgr_of(int(req.iloc[0]["employee_id"]), int(target_employee_id)):
-                    allow=True; reasons.append("Managers may access reviews for direct reports (HR-1.2).")
-    elif resource=="salary":
-        if role in {"HR","HR Manager","HR Director","Admin"}:
-            allow=True; reasons.append("Only HR/Admin may access salary (HR-1.1).")
-        else:
-            reasons.append("Managers/employees cannot view exact salary (HR-1.1).")
-    elif resource=="financial_report":
-        rt=(context or {}).get("report_type","")
-        if role in {"Finance","CFO","CEO"}:
-            allow=True; reasons.append("Finance/executives may access financial reports (FIN-1.1).")
-        elif role=="Executive" and rt=="quarterly":
-            allow=True; reasons.append("Executives may access quarterly summaries (FIN-1.1).")
-        else:
-            reasons.append("Non-finance access requires CFO approval (FIN-1.1).")
-
-    qe, client = build_policy_query_engine()
-    rag = qe.query(f"Which policy governs {resource} access for role {role}? Cite section.").response
-    client.close()
-
-    return {
-        "allow": allow,
-        "reason": " ".join(reasons) + (f" Policy note: {rag}" if rag else ""),
-        "policy_ref": "Policies",
-    }
+    with span("check_permissions", resource=resource, action=action) as s:
+        role, key = _decision_key(user_email, user_role, resource, action, target_employee_id, context)
+        cached = DECISIONS.get(key)
+        s.set(role=role, relationship=key[3], cache_hit=cached is not None)
+        if cached is not None:
+            return dict(cached)
+        return _finish(key, policy_note(resource, role))
+
+async def acheck_permissions(user_email:str, user_role:str, resource:str, action:str,
+                             target_employee_id:Optional[int]=None,
+                             context:Optional[Dict[str,Any]]=None)->Dict[str,Any]:
+    """Async check_permissions: a cache miss awaits the RAG fallback instead of blocking the loop."""
+    with span("check_permissions", resource=resource, action=action) as s:
+        role, key = _decision_key(user_email, user_role, resource, action, target_employee_id, context)
+        cached = DECISIONS.get(key)
+        s.set(role=role, relationship=key[3], cache_hit=cached is not None)
+        if cached is not None:
+            return dict(cached)
+        return _finish(key, await apolicy_note(resource, role))
+
+_CHECK_ARGS = ("user_email", "user_role", "resource", "action", "target_employee_id", "context")
+
+async def acheck_permissions_bulk(requests:Iterable[Any], max_concurrency:int=8)->List[Dict[str,Any]]:
+    """
+    check_permissions for many requests, in order. Each request is a dict of
+    check_permissions arguments or a tuple in its argument order. Requests
+    sharing a decision key are decided once, and the distinct policy notes
+    still missing are looked up concurrently.
+    """
+    reqs = [dict(r) if isinstance(r, Mapping) else dict(zip(_CHECK_ARGS, r)) for r in requests]
+    with span("check_permissions_bulk", requests=len(reqs)) as s:
+        snap = EMPLOYEES.current  # every request decided against the same snapshot
+        out:List[Optional[Dict[str,Any]]] = [None]*len(reqs)
+        misses:Dict[tuple, Tuple[str, List[int]]] = {}
+        for i, r in enumerate(reqs):
+            role, key = _decision_key(r["user_email"], r["user_role"], r["resource"], r["action"],
+                                      r.get("target_employee_id"), r.get("context"), snap)
+            cached = DECISIONS.get(key)
+            if cached is not None:
+                out[i] = dict(cached)
+            else:
+                misses.setdefault(key, (role, []))[1].append(i)
+        sem = asyncio.Semaphore(max(1, max_concurrency))
+        async def note(resource:str, role:str):
+            async with sem:
+                return (resource, role), await apolicy_note(resource, role)
+        pairs = {(key[1], role) for key, (role, _) in misses.items()}
+        notes = dict(await asyncio.gather(*(note(*p) for p in pairs)))
+        for key, (role, idxs) in misses.items():
+            decision = _finish(key, notes[(key[1], role)])
+            for i in idxs:
+                out[i] = dict(decision)
+        s.set(cache_hits=len(reqs)-sum(len(v[1]) for v in misses.values()),
+              decisions=len(misses), note_lookups=len(pairs))
+        return out
+
+def check_permissions_bulk(requests:Iterable[Any], max_concurrency:int=8)->List[Dict[str,Any]]:
+    """Blocking acheck_permissions_bulk, for scripts and batch jobs (not from inside an event loop)."""
+    return asyncio.run(acheck_permissions_bulk(requests, max_concurrency))
+
+def invalidate_decisions(policies_changed:bool=False)->None:
+    """Drop cached decisions; call when employees.csv or the policy file changes."""
+    if policies_changed:
+        global NOTES, RULES, RESOURCES, RULE_ROLES
+        NOTES = PolicyNotes.load(NOTES_PATH)
+        RULES, RESOURCES, RULE_ROLES = _load_rules()
+        index = sys.modules.get("basic.policy_index")  # only if the local backend was ever used
+        if index is not None:
+            index.reset_local_query_engine()
+    DECISIONS.clear()
 
-def fetch_data(resource:str, filters:Optional[Dict[str,Any]]=None)->Dict[str,Any]:
-    df = EMP.copy()
-    if resource=="directory":
-        df = df[["employee_id","name","email","department","role","manager_id","home_city"]]
-    elif resource=="salary":
-        df = df[["employee_id","name","salary"]]
-    elif resource=="performance_summary":
-        df = df[["employee_id","name","performance_rating","performance_summary"]]
-    else:
-        df = df.head(0)
-    if filters:
-        for k,v in filters.items():
-            if k in df.columns: df = df[df[k]==v]
-    return {"rows": df.to_dict(orient="records")}
+def decision_cache_stats()->Dict[str,int]:
+    return DECISIONS.stats()
+
+def _read_scope(resource:str, user_email:Optional[str])->Optional[Dict[str,Any]]:
+    """
+    Rows of `resource` the requester may read: None for all of them, else the
+    equality scope the data source must apply. A resource no policy governs for
+    reading, or a row-scoped one read by someone its policy does not cover, raises.
+    """
+    rule = RULES.rule(resource, "read")
+    if rule is None:
+        raise PermissionError(f"No policy grants read access to {resource}.")
+    if not any(g.scope for g in rule.grants):
+        return None
+    d = EMPLOYEES.current.directory
+    req = d.get(user_email) if user_email else None
+    decision = RULES.decide(req.role, resource, "read") if req is not None else None
+    if decision is None or not decision.allow:
+        raise PermissionError(f"{resource} rows are limited to the requester's policy scope; "
+                              f"{user_email or 'no user_email'} is not covered.")
+    return {decision.row_scope: req.employee_id} if decision.row_scope else None
+
+def fetch_data(resource:str, filters:Optional[Dict[str,Any]]=None,
+               limit:Optional[int]=None, cursor:Optional[Any]=None,
+               user_email:Optional[str]=None)->Dict[str,Any]:
+    """
+    One page of rows ordered by the dataset key. `limit` defaults to FETCH_PAGE_SIZE;
+    pass the returned `next_cursor` back as `cursor` to get the following page
+    (`total_rows` is only counted on the first). `user_email` is required for row-scoped resources (e.g. own accounts).
+    """
+    init()
+    with span("data.select", resource=resource, backend=type(DATA).__name__) as s:
+        scope = _read_scope(resource, user_email)
+        page = DATA.page(resource, filters, PAGE_SIZE if limit is None else limit, cursor, scope)
+        s.set(rows_returned=page["rows_returned"], scoped=scope is not None)
+        if page["total_rows"] is not None:
+            s.set(total_rows=page["total_rows"])
+        return page
+
+def count_rows(resource:str, filters:Optional[Dict[str,Any]]=None, user_email:Optional[str]=None)->int:
+    """Number of matching rows, without building any of them."""
+    init()
+    return DATA.count(resource, filters, _read_scope(resource, user_email))
+
+def iter_rows(resource:str, filters:Optional[Dict[str,Any]]=None,
+              batch_size:int=500, user_email:Optional[str]=None)->Iterator[List[Dict[str,Any]]]:
+    """Stream every matching row in key order, `batch_size` rows at a time."""
+    init()
+    return DATA.iter_batches(resource, filters, batch_size, _read_scope(resource, user_email))
 
 def audit_log(entry:Dict[str,Any]|None=None)->str:
-    (BASE / "logs").mkdir(exist_ok=True)
     safe = entry or {}
     safe.setdefault("timestamp", datetime.utcnow().isoformat() + "Z")
-    with open(BASE / "logs" / "audit.jsonl","a") as f:
-        f.write(json.dumps(safe) + "\n")
+    init()
+    with span("audit.enqueue", pending=AUDIT.pending()) as s:
+        if not AUDIT.try_submit(safe):
+            s.set(backpressure=True)
+            with limits.AUDIT.hold():
+                AUDIT.submit(safe)
+    return "ok"
+
+async def afetch_data(resource:str, filters:Optional[Dict[str,Any]]=None,
+                      limit:Optional[int]=None, cursor:Optional[Any]=None,
+                      user_email:Optional[str]=None)->Dict[str,Any]:
+    return await asyncio.to_thread(fetch_data, resource, filters, limit, cursor, user_email)
+
+def query_audit(user_email:Optional[str]=None, resource:Optional[str]=None,
+                start:Optional[str]=None, end:Optional[str]=None)->List[Dict[str,Any]]:
+    """Audit entries matching all given filters; start/end are inclusive YYYY-MM-DD days."""
+    init()
+    AUDIT.flush(timeout=5)
+    return list(AUDIT_STORE.query(user_email=user_email, resource=resource, start=start, end=end))
+
+async def aaudit_log(entry:Dict[str,Any]|None=None)->str:
+    safe = entry or {}
+    safe.setdefault("timestamp", datetime.utcnow().isoformat() + "Z")
+    init()
+    with span("audit.enqueue", pending=AUDIT.pending()) as s:
+        if not AUDIT.try_submit(safe):
+            # Queue is full: wait for the writer off the event loop.
+            s.set(backpressure=True)
+            async with limits.AUDIT.ahold():
+                await asyncio.to_thread(AUDIT.submit, safe)
     return "ok"
@@ -0,0 +1,322 @@
+import csv
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from basic.skills.directory import EmployeeDirectory
+
+
+class Dataset(NamedTuple):
+    table: str
+    csv: str
+    key: str                  # unique column used for ordering and keyset pagination
+    indexed: Tuple[str, ...]  # columns that get a secondary index
+
+
+DATASETS = {
+    "employees": Dataset("employees", "employees.csv", "employee_id", ("email", "manager_id", "department", "role")),
+    "customers": Dataset("customers", "customers.csv", "customer_id", ("account_executive_id", "status", "region")),
+    "financial_reports": Dataset("financial_reports", "financial_reports.csv", "report_id", ("report_type", "period")),
+    "database_access": Dataset("database_access", "database_access.csv", "access_id",
+                               ("employee_id", "db_name", "environment", "status")),
+    "api_keys": Dataset("api_keys", "api_keys.csv", "key_id", ("environment", "created_by", "status")),
+    "ip_whitelist": Dataset("ip_whitelist", "ip_whitelist.csv", "entry_id", ("requested_by", "status")),
+}
+
+# resource -> (dataset, projected columns); None projects every column.
+RESOURCES: Dict[str, Tuple[str, Optional[List[str]]]] = {
+    "directory": ("employees", ["employee_id", "name", "email", "department", "role", "manager_id", "home_city"]),
+    "salary": ("employees", ["employee_id", "name", "salary"]),
+    "performance_summary": ("employees", ["employee_id", "name", "performance_rating", "performance_summary"]),
+    "customers": ("customers", None),
+    "financial_report": ("financial_reports", None),
+    "database_access": ("database_access", None),
+    "api_keys": ("api_keys", None),
+    "ip_whitelist": ("ip_whitelist", None),
+}
+
+
+class DataSource:
+    """
+    Read-only access to the resources served by fetch_data.
+
+    Subclasses implement `columns`, `select` and `count`; rows always come
+    back ordered by the dataset key so `cursor` (the last key seen) gives
+    keyset pagination. Filters are equality predicates; filters on columns
+    outside the resource's projection are ignored. `scope` holds equality
+    predicates the caller is confined to (e.g. its own accounts): they apply
+    on top of the filters, and a scope column the dataset lacks matches no row.
+    """
+
+    def resources(self) -> List[str]:
+        raise NotImplementedError
+
+    def columns(self, resource: str) -> List[str]:
+        raise NotImplementedError
+
+    def key(self, resource: str) -> str:
+        return DATASETS[RESOURCES[resource][0]].key
+
+    def select(self, resource: str, filters: Optional[Dict[str, Any]] = None,
+               limit: Optional[int] = None, cursor: Any = None,
+               scope: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        raise NotImplementedError
+
+    def count(self, resource: str, filters: Optional[Dict[str, Any]] = None,
+              scope: Optional[Dict[str, Any]] = None) -> int:
+        raise NotImplementedError
+
+    def page(self, resource: str, filters: Optional[Dict[str, Any]] = None,
+             limit: int = 50, cursor: Any = None, scope: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Up to `limit` rows after `cursor`. `total_rows` is counted on the first
+        page only (None on later ones), so walking N pages costs N keyset
+        selects plus one count rather than N full counts.
+        """
+        limit = int(limit)
+        if limit < 1:
+            raise ValueError(f"limit must be at least 1, got {limit}")
+        rows = self.select(resource, filters, limit + 1, cursor, scope)
+        more = len(rows) > limit
+        rows = rows[:limit]
+        return {
+            "rows": rows,
+            "rows_returned": len(rows),
+            "total_rows": self.count(resource, filters, scope) if cursor is None else None,
+            "next_cursor": rows[-1][self.key(resource)] if more and rows else None,
+        }
+
+    def iter_batches(self, resource: str, filters: Optional[Dict[str, Any]] = None,
+                     batch_size: int = 500, scope: Optional[Dict[str, Any]] = None) -> Iterator[List[Dict[str, Any]]]:
+        cursor = None
+        while True:
+            rows = self.select(resource, filters, batch_size, cursor, scope)
+            if rows:
+                yield rows
+            if len(rows) < batch_size:
+                return
+            cursor = rows[-1][self.key(resource)]
+
+
+class PandasDataSource(DataSource):
+    """In-memory employee resources served from the EMP DataFrame and its directory index."""
+
+    def __init__(self, emp: pd.DataFrame, directory: EmployeeDirectory):
+        self.emp = emp
+        self.directory = directory
+        self._pos = {r: [emp.columns.get_loc(c) for c in cols]
+                     for r, (ds, cols) in RESOURCES.items() if ds == "employees"}
+        self._ids = emp["employee_id"].to_numpy()
+        self._by_id = np.argsort(self._ids, kind="stable")  # row positions in employee_id order
+
+    def resources(self) -> List[str]:
+        return list(self._pos)
+
+    def columns(self, resource: str) -> List[str]:
+        return list(RESOURCES[resource][1]) if resource in self._pos else []
+
+    def _candidate_rows(self, filters: Dict[str, Any]) -> Optional[np.ndarray]:
+        """Row positions from the directory index for employee_id/email equality, else None (scan)."""
+        try:
+            if "employee_id" in filters:
+                e = self.directory.get_by_id(filters["employee_id"])
+            elif "email" in filters:
+                e = self.directory.get(filters["email"])
+            else:
+                return None
+        except (TypeError, ValueError):
+            e = None
+        return np.array([] if e is None else [e.row], dtype=np.intp)
+
+    def _match(self, resource: str, filters: Optional[Dict[str, Any]],
+               scope: Optional[Dict[str, Any]] = None) -> np.ndarray:
+        """Row positions matching all filters and the scope, ordered by employee_id."""
+        cols = self.columns(resource)
+        if not cols or any(k not in self.emp.columns for k in scope or ()):
+            return np.array([], dtype=np.intp)
+        fs = {k: v for k, v in (filters or {}).items() if k in cols}
+        for k, v in (scope or {}).items():
+            if k in fs and fs[k] != v:
+                return np.array([], dtype=np.intp)
+            fs[k] = v
+        rows = self._candidate_rows(fs)
+        if rows is None:
+            if not fs:
+                return self._by_id
+            mask = np.ones(len(self.emp), dtype=bool)
+            for k, v in fs.items():
+                mask &= (self.emp[k] == v).to_numpy(dtype=bool)
+            rows = self._by_id[mask[self._by_id]]
+        elif fs and len(rows):
+            # Re-check every filter on the (at most one) indexed row, keeping == semantics.
+            keep = np.ones(len(rows), dtype=bool)
+            for k, v in fs.items():
+                keep &= (self.emp[k].iloc[rows] == v).to_numpy(dtype=bool)
+            rows = rows[keep]
+        return rows
+
+    def select(self, resource, filters=None, limit=None, cursor=None, scope=None):
+        rows = self._match(resource, filters, scope)
+        if cursor is not None:
+            rows = rows[self._ids[rows] > int(cursor)]
+        if limit is not None:
+            rows = rows[:max(int(limit), 0)]
+        if not len(rows):
+            return []
+        return self.emp.iloc[rows, self._pos[resource]].to_dict(orient="records")
+
+    def count(self, resource, filters=None, scope=None):
+        return len(self._match(resource, filters, scope))
+
+
+def _q(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _affinity(values: List[str]) -> str:
+    """SQLite column type for a sample of CSV strings (empty strings are NULL)."""
+    present = [v for v in values if v != ""]
+    for kind, conv in (("INTEGER", int), ("REAL", float)):
+        try:
+            for v in present:
+                conv(v)
+            return kind if present else "TEXT"
+        except ValueError:
+            continue
+    return "TEXT"
+
+
+class SQLiteDataSource(DataSource):
+    """
+    All CSV datasets loaded into one SQLite database with indexed columns.
+
+    Projections and filters are pushed down as parameterized SQL, so only
+    matching rows ever reach Python. The database is a file (or ":memory:");
+    a table is reloaded from its CSV only when the CSV's mtime/size changed.
+    Each thread gets its own connection to a file database.
+    """
+
+    def __init__(self, data_dir: Path, db_path: Any = ":memory:", chunk_size: int = 5000):
+        self.data_dir = Path(data_dir)
+        self.db_path = str(db_path)
+        self.chunk_size = chunk_size
+        self._local = threading.local()
+        self._shared: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        if self.db_path == ":memory:":
+            self._shared = sqlite3.connect(":memory:", check_same_thread=False)
+        self._columns: Dict[str, List[str]] = {}
+        self.refresh()
+
+    def _conn(self) -> sqlite3.Connection:
+        if self._shared is not None:
+            return self._shared
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        return conn
+
+    def refresh(self) -> List[str]:
+        """(Re)load every dataset whose CSV changed; returns the reloaded table names."""
+        reloaded = []
+        with self._lock:
+            conn = self._conn()
+            conn.execute("CREATE TABLE IF NOT EXISTS _sources (tbl TEXT PRIMARY KEY, stamp TEXT)")
+            for ds in DATASETS.values():
+                src = self.data_dir / ds.csv
+                if not src.exists():
+                    continue
+                st = src.stat()
+                stamp = f"{st.st_mtime_ns}:{st.st_size}"
+                row = conn.execute("SELECT stamp FROM _sources WHERE tbl=?", (ds.table,)).fetchone()
+                if row is None or row[0] != stamp:
+                    self._load(conn, ds, src, stamp)
+                    reloaded.append(ds.table)
+                self._columns[ds.table] = [r[1] for r in conn.execute(f'PRAGMA table_info("{ds.table}")')]
+        return reloaded
+
+    def _load(self, conn: sqlite3.Connection, ds: Dataset, src: Path, stamp: str) -> None:
+        """Stream one CSV into a fresh table and swap it in within a single transaction."""
+        tmp = f"{ds.table}__loading"
+        with open(src, newline="") as f:
+            reader = csv.reader(f)
+            header = next(reader)
+            sample = [row for _, row in zip(range(1000), reader)]
+            types = [_affinity([r[i] for r in sample]) for i in range(len(header))]
+            cols = ", ".join(f'"{c}" {t}' for c, t in zip(header, types))
+            marks = ", ".join("?" * len(header))
+            with conn:
+                conn.execute(f'DROP TABLE IF EXISTS "{tmp}"')
+                conn.execute(f'CREATE TABLE "{tmp}" ({cols})')
+                insert = f'INSERT INTO "{tmp}" VALUES ({marks})'
+                conn.executemany(insert, ([v if v != "" else None for v in r] for r in sample))
+                while True:
+                    chunk = [[v if v != "" else None for v in r] for _, r in zip(range(self.chunk_size), reader)]
+                    if not chunk:
+                        break
+                    conn.executemany(insert, chunk)
+                conn.execute(f'DROP TABLE IF EXISTS "{ds.table}"')
+                conn.execute(f'ALTER TABLE "{tmp}" RENAME TO "{ds.table}"')
+                conn.execute(f'CREATE UNIQUE INDEX "ix_{ds.table}_{ds.key}" ON "{ds.table}" ("{ds.key}")')
+                for c in ds.indexed:
+                    if c in header:
+                        conn.execute(f'CREATE INDEX "ix_{ds.table}_{c}" ON "{ds.table}" ("{c}")')
+                conn.execute("INSERT OR REPLACE INTO _sources VALUES (?, ?)", (ds.table, stamp))
+
+    def resources(self) -> List[str]:
+        return [r for r, (ds, _) in RESOURCES.items() if DATASETS[ds].table in self._columns]
+
+    def columns(self, resource: str) -> List[str]:
+        if resource not in RESOURCES:
+            return []
+        ds, cols = RESOURCES[resource]
+        available = self._columns.get(DATASETS[ds].table, [])
+        return [c for c in (cols or available) if c in available]
+
+    def _where(self, resource: str, filters: Optional[Dict[str, Any]],
+               cursor: Any = None, scope: Optional[Dict[str, Any]] = None) -> Tuple[str, List[Any]]:
+        cols = self.columns(resource)
+        table = self._columns.get(DATASETS[RESOURCES[resource][0]].table, [])
+        # Column names come from the schema, never from the caller, so only values are bound.
+        fs = [(k, v) for k, v in (filters or {}).items() if k in cols]
+        clauses = [f"{_q(k)} = ?" for k, _ in fs]
+        params = [v for _, v in fs]
+        for k, v in (scope or {}).items():
+            if k in table:
+                clauses.append(f"{_q(k)} = ?")
+                params.append(v)
+            else:
+                clauses.append("0")
+        if cursor is not None:
+            clauses.append(f"{_q(self.key(resource))} > ?")
+            params.append(cursor)
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def select(self, resource, filters=None, limit=None, cursor=None, scope=None):
+        cols = self.columns(resource)
+        if not cols:
+            return []
+        table = DATASETS[RESOURCES[resource][0]].table
+        where, params = self._where(resource, filters, cursor, scope)
+        sql = f"SELECT {', '.join(map(_q, cols))} FROM {_q(table)}{where} ORDER BY {_q(self.key(resource))}"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(max(int(limit), 0))
+        return [dict(zip(cols, r)) for r in self._execute(sql, params)]
+
+    def count(self, resource, filters=None, scope=None):
+        if not self.columns(resource):
+            return 0
+        table = DATASETS[RESOURCES[resource][0]].table
+        where, params = self._where(resource, filters, scope=scope)
+        return self._execute(f"SELECT COUNT(*) FROM {_q(table)}{where}", params)[0][0]
+
+    def _execute(self, sql: str, params: List[Any]):
+        if self._shared is not None:
+            with self._lock:
+                return self._shared.execute(sql, params).fetchall()
+        return self._conn().execute(sql, params).fetchall()
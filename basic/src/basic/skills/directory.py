@@ -0,0 +1,157 @@
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+
+
+class Employee:
+    """Compact employee record used on the permission path."""
+
+    __slots__ = ("employee_id", "email", "name", "department", "role", "manager_id", "row")
+
+    def __init__(self, employee_id: int, email: str, name: str, department: str, role: str,
+                 manager_id: Optional[int], row: int):
+        self.employee_id = employee_id
+        self.email = email
+        self.name = name
+        self.department = department
+        self.role = role
+        self.manager_id = manager_id
+        self.row = row  # positional row in the source DataFrame
+
+    def __repr__(self) -> str:
+        return f"Employee({self.employee_id}, {self.email!r}, {self.role!r})"
+
+
+class EmployeeDirectory:
+    """
+    Hash-indexed view of employees.csv, built once at load time.
+
+    Lookups by email or employee_id and "is X the manager of Y" checks are
+    O(1) dictionary hits instead of full DataFrame scans.
+
+    Reporting-chain queries use an Euler tour of the org tree: every employee
+    gets an interval [tin, tout) that contains the intervals of everyone below
+    them, so "is X above Y" is two integer comparisons and "everyone under X"
+    is one slice. The tour is built on the first such query and rebuilt lazily
+    after set_manager() changes a reporting line.
+    """
+
+    def __init__(self, employees: List[Employee]):
+        self.by_email: Dict[str, Employee] = {}
+        self.by_id: Dict[int, Employee] = {}
+        reports: Dict[int, List[int]] = {}
+        for e in employees:
+            self.by_email[e.email] = e
+            self.by_id[e.employee_id] = e
+            if e.manager_id is not None:
+                reports.setdefault(e.manager_id, []).append(e.employee_id)
+        self.reports: Dict[int, Tuple[int, ...]] = {m: tuple(ids) for m, ids in reports.items()}
+        self._tour: Optional[Tuple[Dict[int, int], Dict[int, int], List[int]]] = None
+        self._tour_lock = threading.Lock()
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> "EmployeeDirectory":
+        mgr = df["manager_id"]
+        employees = [
+            Employee(
+                employee_id=int(eid),
+                email=str(email),
+                name=str(name),
+                department=str(dept),
+                role=str(role),
+                manager_id=None if pd.isna(m) else int(m),
+                row=i,
+            )
+            for i, (eid, email, name, dept, role, m) in enumerate(zip(
+                df["employee_id"], df["email"], df["name"], df["department"], df["role"], mgr))
+        ]
+        return cls(employees)
+
+    def __len__(self) -> int:
+        return len(self.by_id)
+
+    def get(self, email: str) -> Optional[Employee]:
+        return self.by_email.get(email)
+
+    def get_by_id(self, employee_id: int) -> Optional[Employee]:
+        return self.by_id.get(int(employee_id))
+
+    def role_of(self, email: str) -> Optional[str]:
+        e = self.by_email.get(email)
+        return None if e is None else e.role
+
+    def direct_reports(self, manager_id: int) -> Tuple[int, ...]:
+        return self.reports.get(int(manager_id), ())
+
+    def is_manager_of(self, mgr_emp_id: int, emp_id: int) -> bool:
+        e = self.by_id.get(int(emp_id))
+        return e is not None and e.manager_id == int(mgr_emp_id)
+
+    def _intervals(self) -> Tuple[Dict[int, int], Dict[int, int], List[int]]:
+        """(tin, tout, order): employee ids in pre-order, with each subtree at order[tin:tout]."""
+        tour = self._tour
+        if tour is None:
+            with self._tour_lock:
+                tour = self._tour
+                if tour is None:
+                    tour = self._tour = self._build_tour()
+        return tour
+
+    def _build_tour(self) -> Tuple[Dict[int, int], Dict[int, int], List[int]]:
+        tin: Dict[int, int] = {}
+        tout: Dict[int, int] = {}
+        order: List[int] = []
+        roots = [i for i, e in self.by_id.items() if e.manager_id not in self.by_id]
+        # Employees left unvisited sit on a manager_id cycle; each is entered as a root.
+        for root in roots + list(self.by_id):
+            if root in tin:
+                continue
+            stack = [(root, False)]
+            while stack:  # iterative: org charts can be deeper than the recursion limit
+                emp_id, done = stack.pop()
+                if done:
+                    tout[emp_id] = len(order)
+                    continue
+                if emp_id in tin:
+                    continue
+                tin[emp_id] = len(order)
+                order.append(emp_id)
+                stack.append((emp_id, True))
+                stack.extend((r, False) for r in reversed(self.reports.get(emp_id, ())))
+        return tin, tout, order
+
+    def is_in_chain(self, mgr_emp_id: int, emp_id: int) -> bool:
+        """True when mgr_emp_id is above emp_id at any depth (direct or skip-level manager)."""
+        tin, tout, _ = self._intervals()
+        m, e = tin.get(int(mgr_emp_id)), tin.get(int(emp_id))
+        return m is not None and e is not None and m < e < tout[int(mgr_emp_id)]
+
+    def subordinates(self, mgr_emp_id: int) -> List[int]:
+        """Everyone below mgr_emp_id, in pre-order (direct reports before their own reports)."""
+        tin, tout, order = self._intervals()
+        m = tin.get(int(mgr_emp_id))
+        return [] if m is None else order[m + 1:tout[int(mgr_emp_id)]]
+
+    def chain_of(self, emp_id: int) -> List[int]:
+        """Managers of emp_id from the direct manager up to the top."""
+        chain: List[int] = []
+        e = self.by_id.get(int(emp_id))
+        while e is not None and e.manager_id is not None and e.manager_id not in chain:
+            chain.append(e.manager_id)
+            e = self.by_id.get(e.manager_id)
+        return chain
+
+    def set_manager(self, emp_id: int, manager_id: Optional[int]) -> None:
+        """Change one reporting line in place; the tour is rebuilt on the next chain query."""
+        e = self.by_id[int(emp_id)]
+        manager_id = None if manager_id is None else int(manager_id)
+        if manager_id is not None and (manager_id == e.employee_id or self.is_in_chain(e.employee_id, manager_id)):
+            raise ValueError(f"{manager_id} reports to {e.employee_id}; the change would create a cycle")
+        with self._tour_lock:
+            if e.manager_id is not None:
+                self.reports[e.manager_id] = tuple(r for r in self.reports.get(e.manager_id, ()) if r != e.employee_id)
+            if manager_id is not None:
+                self.reports[manager_id] = self.reports.get(manager_id, ()) + (e.employee_id,)
+            e.manager_id = manager_id
+            self._tour = None
@@ -0,0 +1,90 @@
+import json
+import asyncio
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+
+class PolicyNotes:
+    """
+    Precomputed "which policy governs <resource> for <role>" answers.
+
+    The (resource, role) space is small, so the RAG + LLM synthesis is run
+    once per pair by `build()` (see scripts/build_policy_notes.py) and the
+    result is served from memory afterwards. Pairs missing from the table
+    are answered by the caller's fallback and remembered via `put()`.
+    """
+
+    def __init__(self, notes: Optional[Dict[str, Dict[str, Dict[str, str]]]] = None):
+        self._notes: Dict[str, Dict[str, Dict[str, str]]] = notes or {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path: Path) -> "PolicyNotes":
+        try:
+            with open(path) as f:
+                return cls(json.load(f).get("notes", {}))
+        except FileNotFoundError:
+            return cls()
+
+    def save(self, path: Path) -> None:
+        tmp = Path(path).with_suffix(".tmp")
+        with open(tmp, "w") as f:
+            json.dump({"version": 1, "notes": self._notes}, f, indent=2, sort_keys=True)
+        tmp.replace(path)
+
+    def get(self, resource: str, role: str) -> Optional[Dict[str, str]]:
+        return self._notes.get(resource, {}).get(role)
+
+    def put(self, resource: str, role: str, note: str, section: str = "") -> Dict[str, str]:
+        entry = {"note": note, "section": section}
+        with self._lock:
+            self._notes.setdefault(resource, {})[role] = entry
+        return entry
+
+    def clear(self) -> None:
+        with self._lock:
+            self._notes.clear()
+
+    def __len__(self) -> int:
+        return sum(len(v) for v in self._notes.values())
+
+    @staticmethod
+    def question(resource: str, role: str) -> str:
+        return f"Which policy governs {resource} access for role {role}? Cite section."
+
+    @classmethod
+    def build(cls, query_engine, resources: Iterable[str], roles: Iterable[str]) -> "PolicyNotes":
+        """Run the policy query once per (resource, role) pair and collect note + section."""
+        notes = cls()
+        roles = sorted(set(roles))
+        for resource in resources:
+            for role in roles:
+                resp = query_engine.query(cls.question(resource, role))
+                notes.put(resource, role, resp.response or "", top_section(resp))
+        return notes
+
+    @classmethod
+    async def abuild(cls, query_engine, resources: Iterable[str], roles: Iterable[str],
+                     max_concurrency: int = 8) -> "PolicyNotes":
+        """build() with up to `max_concurrency` policy queries in flight at once."""
+        notes = cls()
+        sem = asyncio.Semaphore(max_concurrency)
+        pairs = [(resource, role) for resource in resources for role in sorted(set(roles))]
+
+        async def one(resource: str, role: str) -> None:
+            async with sem:
+                resp = await query_engine.aquery(cls.question(resource, role))
+            notes.put(resource, role, resp.response or "", top_section(resp))
+
+        await asyncio.gather(*(one(*p) for p in pairs))
+        return notes
+
+
+def top_section(response) -> str:
+    """Section id of the best-scoring source node of a query response, if any."""
+    for n in getattr(response, "source_nodes", None) or []:
+        section = n.node.metadata.get("section")
+        if section:
+            return str(section)
+    return ""
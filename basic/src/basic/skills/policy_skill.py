@@ -1,11 +1,17 @@
 from llama_index.core.tools import FunctionTool
-from .core import check_permissions, fetch_data, audit_log
+from .core import (check_permissions, fetch_data, audit_log,
+                   acheck_permissions, afetch_data, aaudit_log)
 
+# Each tool carries both implementations; the agent awaits the async one so
+# concurrent conversations overlap their Weaviate / file I/O.
 TOOLS = [
-    FunctionTool.from_defaults(check_permissions, name="check_permissions",
+    FunctionTool.from_defaults(check_permissions, async_fn=acheck_permissions, name="check_permissions",
                                description="Check policy to allow/deny access."),
-    FunctionTool.from_defaults(fetch_data, name="fetch_data",
-                               description="Fetch data rows when allowed."),
-    FunctionTool.from_defaults(audit_log, name="audit_log",
+    FunctionTool.from_defaults(fetch_data, async_fn=afetch_data, name="fetch_data",
+                               description="Fetch data rows when allowed. Pass the requester's user_email; "
+                                           "row-scoped resources only return their rows. Results are paginated: "
+                                           "pass next_cursor back as cursor for the next page; "
+                                           "total_rows is given on the first page only."),
+    FunctionTool.from_defaults(audit_log, async_fn=aaudit_log, name="audit_log",
                                description="Append an audit entry.")
 ]
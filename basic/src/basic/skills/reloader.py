@@ -0,0 +1,77 @@
+import os
+import logging
+import threading
+from pathlib import Path
+from typing import Callable, Generic, Optional, Tuple, TypeVar
+
+log = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class FileReloader(Generic[T]):
+    """
+    Keeps an immutable snapshot built from a file and swaps in a new one when
+    the file changes (mtime/size polling).
+
+    The new snapshot is fully built before the single reference assignment
+    that publishes it, so readers that grabbed `current` keep a consistent
+    view for the rest of their call. `on_swap(new)` runs after each swap,
+    e.g. to invalidate dependent caches. A build error keeps the old snapshot.
+    """
+
+    def __init__(self, path: Path, build: Callable[[Path], T],
+                 on_swap: Optional[Callable[[T], None]] = None, interval: float = 5.0):
+        self.path = Path(path)
+        self._build = build
+        self._on_swap = on_swap
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._stamp = self._stat()
+        self.current: T = build(self.path)
+        self.version = 1
+
+    def _stat(self) -> Optional[Tuple[int, int]]:
+        try:
+            st = os.stat(self.path)
+            return st.st_mtime_ns, st.st_size
+        except FileNotFoundError:
+            return None
+
+    def check(self, force: bool = False) -> bool:
+        """Rebuild and swap if the file changed (or `force`); True when a swap happened."""
+        with self._lock:
+            stamp = self._stat()
+            if stamp is None or (stamp == self._stamp and not force):
+                return False
+            try:
+                snapshot = self._build(self.path)
+            except Exception as e:
+                # Half-written file or bad edit: keep serving the last good snapshot.
+                log.warning("Error reloading %s: %s", self.path, e)
+                return False
+            self._stamp = stamp
+            self.current = snapshot
+            self.version += 1
+        if self._on_swap is not None:
+            self._on_swap(snapshot)
+        return True
+
+    def start(self) -> None:
+        """Poll in a daemon thread every `interval` seconds."""
+        if self._thread is not None or self.interval <= 0:
+            return
+        self._thread = threading.Thread(target=self._run, name=f"reload-{self.path.name}", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.check()
@@ -0,0 +1,199 @@
+import re
+import logging
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+log = logging.getLogger(__name__)
+
+# roles_conditional vocabulary: "Role (condition)" -> (request field, accepted values).
+# A conditional entry whose condition is not listed here grants nothing. The "rows"
+# field grants access to the rows whose named column holds the requester's employee_id
+# only; fetch_data enforces that scope in the data source.
+CONDITIONS: Dict[str, Tuple[str, Tuple[str, ...]]] = {
+    "own": ("relationship", ("self",)),
+    "own accounts": ("rows", ("account_executive_id",)),
+    "direct reports": ("relationship", ("manager",)),
+    "reporting chain": ("relationship", ("manager", "chain")),
+    "quarterly only": ("report_type", ("quarterly",)),
+    "read-only": ("action", ("read",)),
+}
+_FIELDS = ("relationship", "report_type", "action")  # order of the request tuple in decide()
+_SPEC = re.compile(r"^\s*(?P<role>[^()]+?)\s*(?:\((?P<cond>[^)]*)\))?\s*$")
+
+
+class Decision(NamedTuple):
+    """
+    An allow is never pending: `requires_approval` is only set on a deny whose
+    policy offers an approval route, which this service does not record.
+    `row_scope` names the column that must equal the requester's employee_id.
+    """
+    allow: bool
+    reasons: List[str]
+    section: str = ""
+    requires_approval: bool = False
+    row_scope: str = ""
+
+
+class Grant:
+    """One way into a rule: roles as a bitmask, optionally gated on one request field or scoped to rows."""
+
+    __slots__ = ("mask", "field", "values", "scope", "reason", "section", "pending")
+
+    def __init__(self, field: int, values: Tuple[str, ...], scope: str, reason: str, section: str,
+                 pending: str = ""):
+        self.mask = 0
+        self.field = field  # index into _FIELDS, -1 for unconditional
+        self.values = values
+        self.scope = scope  # row_scope column, "" for every row
+        self.reason = reason
+        self.section = section
+        self.pending = pending  # deny reason while the policy's approval is missing
+
+
+class Rule:
+    __slots__ = ("grants", "deny", "section", "roles", "approval")
+
+    def __init__(self, section: str):
+        self.grants: List[Grant] = []
+        self.deny: List[str] = []
+        self.section = section
+        self.roles: Set[str] = set()  # literal role names the grants mention
+        self.approval = False  # some policy offers an approval route to denied requests
+
+
+def _sentence(text: str, name: str) -> Optional[str]:
+    """First sentence of the policy text that talks about `name` (singular or plural)."""
+    for s in re.split(r"(?<=\.)\s+", text):
+        if re.search(rf"\b{re.escape(name)}s?\b", s, re.IGNORECASE):
+            return s.rstrip(".")
+    return None
+
+
+class RuleEngine:
+    """
+    Permission rules compiled from the policy documents.
+
+    Each policy names the ``resource`` it governs (and optionally its
+    ``actions``; default all of them); a fetch_data dataset is only named by a
+    policy about reading it, and a resource no policy names is denied.
+    ``roles_allowed`` entries are granted; ``roles_conditional`` entries
+    ("Role (condition)") are granted when the condition in CONDITIONS holds.
+    Role names may be groups from the policy file's ``role_groups``, whose
+    members are roles, "*" (any role) or "*Suffix".
+
+    ``requires_approval`` means the grants themselves need approval, so they
+    are denied (with requires_approval set) until approvals exist; with
+    ``"approval_for": "others"`` the grants stand and only the roles outside
+    them are told approval is their route.
+
+    Every (resource, action) compiles to a Rule whose grants are role bitmasks,
+    so a decision is a dict lookup and a few ``bit & mask`` tests. Roles get a
+    bit on first sight; pattern members are applied to them at that point.
+    """
+
+    def __init__(self, rules: Dict[Tuple[str, str], Rule], groups: Dict[str, List[str]]):
+        self._rules = rules
+        self._groups = groups
+        self._bits: Dict[str, int] = {}
+        self._patterns: List[Tuple[str, Grant]] = []
+        self._lock = threading.Lock()
+
+    @classmethod
+    def compile(cls, policies: Iterable[Dict[str, Any]],
+                role_groups: Optional[Dict[str, List[str]]] = None) -> "RuleEngine":
+        engine = cls({}, dict(role_groups or {}))
+        for doc in policies:
+            if doc.get("resource") and doc.get("roles_allowed"):
+                engine._add(doc)
+        return engine
+
+    @classmethod
+    def load(cls, path: Path) -> "RuleEngine":
+        from basic.policies import load_policies, load_role_groups
+        return cls.compile(load_policies(path), load_role_groups(path))
+
+    def _add(self, doc: Dict[str, Any]) -> None:
+        section, title, text = doc["section"], doc.get("title", doc["section"]), doc.get("text", "")
+        approval = bool(doc.get("requires_approval"))
+        gated = approval and doc.get("approval_for") != "others"
+        level = doc.get("approval_level")
+        specs = [(name, -1, (), "") for name in doc["roles_allowed"]]
+        for entry in doc.get("roles_conditional", ()):
+            m = _SPEC.match(entry)
+            cond = CONDITIONS.get((m.group("cond") or "").strip().lower()) if m else None
+            if cond is None:
+                log.debug("%s: conditional %r not enforceable, not granted", section, entry)
+                continue
+            if cond[0] == "rows":
+                specs.append((m.group("role"), -1, (), cond[1][0]))
+            else:
+                specs.append((m.group("role"), _FIELDS.index(cond[0]), cond[1], ""))
+        for action in doc.get("actions") or ("*",):
+            rule = self._rules.setdefault((doc["resource"], action), Rule(section))
+            rule.approval |= approval and not gated
+            for name, field, values, scope in specs:
+                reason = _sentence(text, name) or f"{title} permits {name}"
+                pending = (f"{title} requires {level + ' ' if level else ''}approval, "
+                           f"which is not on record ({section}).") if gated else ""
+                grant = Grant(field, values, scope, f"{reason} ({section}).", section, pending)
+                for member in self._groups.get(name, [name]):
+                    if member.startswith("*"):
+                        self._patterns.append((member[1:], grant))
+                        for role, bit in self._bits.items():
+                            if role.endswith(member[1:]):
+                                grant.mask |= bit
+                    else:
+                        grant.mask |= self.bit(member)
+                        rule.roles.add(member)
+                rule.grants.append(grant)
+            others = "; other access requires approval" if approval and not gated else ""
+            rule.deny.append(f"{title} is limited to {', '.join(doc['roles_allowed'])}{others} ({section}).")
+
+    def bit(self, role: str) -> int:
+        b = self._bits.get(role)
+        if b is None:
+            with self._lock:
+                b = self._bits.get(role)
+                if b is None:
+                    b = 1 << len(self._bits)
+                    for suffix, grant in self._patterns:
+                        if role.endswith(suffix):
+                            grant.mask |= b
+                    self._bits[role] = b  # published only once every pattern mask has it
+        return b
+
+    def rule(self, resource: str, action: str) -> Optional[Rule]:
+        return self._rules.get((resource, action)) or self._rules.get((resource, "*"))
+
+    def decide(self, role: str, resource: str, action: str, relationship: str = "none",
+               report_type: str = "") -> Decision:
+        rule = self.rule(resource, action)
+        if rule is None:
+            return Decision(False, [f"No policy grants {action} access to {resource}; denied by default."])
+        bit = self.bit(role)
+        request = (relationship, report_type, action)
+        for g in rule.grants:
+            if g.mask & bit and (g.field < 0 or request[g.field] in g.values):
+                if g.pending:
+                    return Decision(False, [g.reason, g.pending], g.section, True)
+                return Decision(True, [g.reason], g.section, False, g.scope)
+        return Decision(False, list(rule.deny), rule.section, rule.approval)
+
+    def resources(self) -> List[str]:
+        return sorted({r for r, _ in self._rules})
+
+    def actions(self) -> List[str]:
+        """Actions named by any rule ("*" rules match every action)."""
+        return sorted({a for _, a in self._rules if a != "*"})
+
+    def values(self, field: str) -> Set[str]:
+        """Request values some grant is conditioned on, e.g. values("report_type") == {"quarterly"}."""
+        i = _FIELDS.index(field)
+        return {v for rule in self._rules.values() for g in rule.grants if g.field == i for v in g.values}
+
+    def roles(self, resources: Optional[Iterable[str]] = None) -> Set[str]:
+        """Literal role names the rules for `resources` (default all) mention."""
+        wanted = None if resources is None else set(resources)
+        return {role for (r, _), rule in self._rules.items() if wanted is None or r in wanted
+                for role in rule.roles}
@@ -0,0 +1,303 @@
+"""Lightweight span tracing for the request path.
+
+Spans nest through a contextvar, so parents carry across ``await`` and
+``asyncio.to_thread``. Finished spans are handed to a background thread that
+batches them to the configured exporters; the request path never blocks on
+export (spans are dropped, and counted, if the queue is full).
+
+Exporters are chosen with ``TRACE_EXPORT`` (comma separated):
+
+- ``json``: one JSON object per span appended to ``TRACE_FILE``
+  (default ``logs/traces.jsonl``)
+- ``otlp``: OTLP/HTTP JSON posted to ``OTEL_EXPORTER_OTLP_ENDPOINT``
+  (default ``http://localhost:4318``), i.e. any local OpenTelemetry collector
+
+With no exporter configured spans are still timed but never leave the process.
+"""
+
+import os
+import json
+import time
+import queue
+import atexit
+import secrets
+import threading
+import contextvars
+import urllib.request
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Union
+
+from dotenv import load_dotenv
+
+load_dotenv()  # exporters are chosen at import, so .env must be loaded before
+
+_CURRENT: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar("basic_current_span", default=None)
+
+
+class SpanContext(NamedTuple):
+    """The ids a child needs to join a trace, e.g. when handing work to another workflow step."""
+    trace_id: str
+    span_id: str
+
+
+class Span:
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "start_ns", "end_ns",
+                 "attributes", "status", "error", "_token")
+
+    def __init__(self, name: str, parent: Union["Span", SpanContext, None] = None, attributes: Optional[Dict[str, Any]] = None):
+        self.name = name
+        self.trace_id = parent.trace_id if parent is not None else secrets.token_hex(16)
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent.span_id if parent is not None else None
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.attributes: Dict[str, Any] = dict(attributes or {})
+        self.status = "ok"
+        self.error: Optional[str] = None
+        self._token = None
+
+    @property
+    def context(self) -> SpanContext:
+        return SpanContext(self.trace_id, self.span_id)
+
+    def set(self, **attributes: Any) -> "Span":
+        self.attributes.update(attributes)
+        return self
+
+    def record_error(self, exc: BaseException) -> None:
+        self.status = "error"
+        self.error = f"{type(exc).__name__}: {exc}"
+
+    @property
+    def duration_ms(self) -> float:
+        end = self.end_ns if self.end_ns is not None else time.time_ns()
+        return (end - self.start_ns) / 1e6
+
+    def end(self) -> None:
+        """Finish the span (idempotent) and queue it for export."""
+        if self.end_ns is not None:
+            return
+        self.end_ns = time.time_ns()
+        if self._token is not None:
+            try:
+                _CURRENT.reset(self._token)
+            except (ValueError, RuntimeError):
+                pass  # ended from a different context than it was started in
+            self._token = None
+        _PIPELINE.submit(self)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start_ns": self.start_ns,
+            "end_ns": self.end_ns,
+            "duration_ms": round(self.duration_ms, 3),
+            "attributes": self.attributes,
+            "status": self.status,
+            "error": self.error,
+        }
+
+
+def current_span() -> Optional[Span]:
+    return _CURRENT.get()
+
+
+def set_attributes(**attributes: Any) -> None:
+    """Attach attributes to the innermost active span, if any."""
+    span = _CURRENT.get()
+    if span is not None:
+        span.set(**attributes)
+
+
+def start_span(name: str, activate: bool = False, parent: Union[Span, SpanContext, None] = None,
+               **attributes: Any) -> Span:
+    """Start a span that is ended explicitly, e.g. one that spans several stream events."""
+    span = Span(name, parent if parent is not None else _CURRENT.get(), attributes)
+    if activate:
+        span._token = _CURRENT.set(span)
+    return span
+
+
+@contextmanager
+def span(name: str, parent: Union[Span, SpanContext, None] = None, **attributes: Any) -> Iterator[Span]:
+    """Time the enclosed block as a child of `parent` (default: the current span)."""
+    s = start_span(name, activate=True, parent=parent, **attributes)
+    try:
+        yield s
+    except BaseException as e:
+        s.record_error(e)
+        raise
+    finally:
+        s.end()
+
+
+class SpanExporter:
+    def export(self, spans: List[Span]) -> None:
+        raise NotImplementedError
+
+    def shutdown(self) -> None:
+        pass
+
+
+class InMemoryExporter(SpanExporter):
+    """Keeps finished spans in a list; used by tests and benchmarks."""
+
+    def __init__(self) -> None:
+        self.spans: List[Span] = []
+
+    def export(self, spans: List[Span]) -> None:
+        self.spans.extend(spans)
+
+    def names(self) -> List[str]:
+        return [s.name for s in self.spans]
+
+
+class JsonFileExporter(SpanExporter):
+    def __init__(self, path: Path):
+        self.path = Path(path)
+
+    def export(self, spans: List[Span]) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "a") as f:
+            f.write("".join(json.dumps(s.to_dict(), default=str) + "\n" for s in spans))
+
+
+def _otlp_value(v: Any) -> Dict[str, Any]:
+    if isinstance(v, bool):
+        return {"boolValue": v}
+    if isinstance(v, int):
+        return {"intValue": str(v)}
+    if isinstance(v, float):
+        return {"doubleValue": v}
+    return {"stringValue": str(v)}
+
+
+class OTLPHttpExporter(SpanExporter):
+    """Posts spans as OTLP/HTTP JSON, which every OpenTelemetry collector accepts."""
+
+    def __init__(self, endpoint: str = "http://localhost:4318", service_name: str = "basic-concierge",
+                 timeout: float = 2.0):
+        self.url = endpoint.rstrip("/") + "/v1/traces"
+        self.service_name = service_name
+        self.timeout = timeout
+
+    def payload(self, spans: List[Span]) -> Dict[str, Any]:
+        return {"resourceSpans": [{
+            "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": self.service_name}}]},
+            "scopeSpans": [{
+                "scope": {"name": "basic.tracing"},
+                "spans": [{
+                    "traceId": s.trace_id,
+                    "spanId": s.span_id,
+                    **({"parentSpanId": s.parent_id} if s.parent_id else {}),
+                    "name": s.name,
+                    "kind": 1,
+                    "startTimeUnixNano": str(s.start_ns),
+                    "endTimeUnixNano": str(s.end_ns),
+                    "attributes": [{"key": k, "value": _otlp_value(v)} for k, v in s.attributes.items()],
+                    "status": {"code": 2, "message": s.error or ""} if s.status == "error" else {"code": 1},
+                } for s in spans],
+            }],
+        }]}
+
+    def export(self, spans: List[Span]) -> None:
+        req = urllib.request.Request(self.url, data=json.dumps(self.payload(spans)).encode(),
+                                     headers={"Content-Type": "application/json"}, method="POST")
+        with urllib.request.urlopen(req, timeout=self.timeout):
+            pass
+
+
+class _Pipeline:
+    """Background batching of finished spans to the exporters."""
+
+    def __init__(self, maxsize: int = 10_000, batch_size: int = 256, interval: float = 1.0):
+        self.exporters: List[SpanExporter] = []
+        self.batch_size = batch_size
+        self.interval = interval
+        self.dropped = 0
+        self._q: "queue.Queue[Any]" = queue.Queue(maxsize=maxsize)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def submit(self, s: Span) -> None:
+        if not self.exporters:
+            return
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="span-export", daemon=True)
+                    self._thread.start()
+        try:
+            self._q.put_nowait(s)
+        except queue.Full:
+            self.dropped += 1
+
+    def flush(self, timeout: float = 5.0) -> None:
+        if self._thread is None:
+            return
+        done = threading.Event()
+        try:
+            self._q.put(done, timeout=timeout)
+        except queue.Full:
+            return
+        done.wait(timeout)
+
+    def _run(self) -> None:
+        while True:
+            batch, markers = [], []
+            item = self._q.get()
+            deadline = time.monotonic() + self.interval
+            while True:
+                (markers if isinstance(item, threading.Event) else batch).append(item)
+                if markers or len(batch) >= self.batch_size:
+                    break
+                try:
+                    item = self._q.get(timeout=max(deadline - time.monotonic(), 0))
+                except queue.Empty:
+                    break
+            for exporter in list(self.exporters):
+                try:
+                    if batch:
+                        exporter.export(batch)
+                except Exception:
+                    self.dropped += len(batch)
+            for m in markers:
+                m.set()
+
+
+_PIPELINE = _Pipeline()
+
+
+def configure(exporters: List[SpanExporter]) -> None:
+    """Replace the active exporters (an empty list disables export)."""
+    _PIPELINE.flush()
+    _PIPELINE.exporters = list(exporters)
+
+
+def exporters() -> List[SpanExporter]:
+    return list(_PIPELINE.exporters)
+
+
+def flush(timeout: float = 5.0) -> None:
+    """Block until spans finished so far have been handed to the exporters."""
+    _PIPELINE.flush(timeout)
+
+
+def _from_env() -> List[SpanExporter]:
+    out: List[SpanExporter] = []
+    for kind in filter(None, (k.strip() for k in os.getenv("TRACE_EXPORT", "").split(","))):
+        if kind == "json":
+            default = Path(__file__).resolve().parents[2] / "logs" / "traces.jsonl"
+            out.append(JsonFileExporter(Path(os.getenv("TRACE_FILE", default))))
+        elif kind == "otlp":
+            out.append(OTLPHttpExporter(os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT", "http://localhost:4318"),
+                                        os.getenv("OTEL_SERVICE_NAME", "basic-concierge")))
+    return out
+
+
+_PIPELINE.exporters = _from_env()
+atexit.register(flush, 2.0)
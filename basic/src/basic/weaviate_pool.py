@@ -0,0 +1,246 @@
+import os
+import time
+import logging
+import asyncio
+import threading
+from typing import Awaitable, Callable, Optional
+
+import weaviate
+from weaviate import exceptions as wx
+from weaviate.classes.init import Auth
+from dotenv import load_dotenv
+
+load_dotenv()
+log = logging.getLogger(__name__)
+
+
+def connect_cloud():
+    """Open a new Weaviate Cloud connection from WEAVIATE_URL / WEAVIATE_API_KEY."""
+    return weaviate.connect_to_weaviate_cloud(
+        cluster_url=os.environ["WEAVIATE_URL"],
+        auth_credentials=Auth.api_key(os.environ["WEAVIATE_API_KEY"]),
+    )
+
+
+async def connect_cloud_async():
+    """Open a new async Weaviate Cloud connection from WEAVIATE_URL / WEAVIATE_API_KEY."""
+    client = weaviate.use_async_with_weaviate_cloud(
+        cluster_url=os.environ["WEAVIATE_URL"],
+        auth_credentials=Auth.api_key(os.environ["WEAVIATE_API_KEY"]),
+    )
+    await client.connect()
+    return client
+
+
+# Failures that mean the connection itself is gone. Anything else (a bad filter,
+# a query timeout) is the call's own problem and must not close a client that
+# other threads are still using.
+_CONNECTION_ERRORS = (ConnectionError, wx.WeaviateConnectionError, wx.WeaviateClosedClientError,
+                      wx.WeaviateGRPCUnavailableError, wx.WeaviateStartUpError)
+
+
+def is_connection_error(e: BaseException) -> bool:
+    return isinstance(e, _CONNECTION_ERRORS) or isinstance(e.__cause__, _CONNECTION_ERRORS)
+
+
+class WeaviateClientPool:
+    """
+    Process-wide, lazily connected Weaviate client.
+
+    The v4 sync client is thread-safe, so a single connection is shared by
+    every caller. `get()` health-checks it at most once per
+    `health_interval` seconds and reconnects when it has gone away.
+    `generation` increases on every reconnect so callers that cache objects
+    bound to the old client (collections, retrievers) know to rebuild them.
+    """
+
+    def __init__(self, connect: Callable[[], object] = connect_cloud, health_interval: float = 30.0):
+        self._connect = connect
+        self._client = None
+        self._lock = threading.Lock()
+        self._last_check = 0.0
+        self.health_interval = health_interval
+        self.generation = 0
+
+    def _healthy(self, client) -> bool:
+        try:
+            return bool(client.is_ready())
+        except Exception:
+            return False
+
+    def get(self):
+        """Return the shared client, connecting or reconnecting as needed."""
+        with self._lock:
+            now = time.monotonic()
+            if self._client is not None and now - self._last_check < self.health_interval:
+                return self._client
+            if self._client is not None and self._healthy(self._client):
+                self._last_check = now
+                return self._client
+            self._close_locked()
+            self._client = self._connect()
+            self._last_check = now
+            self.generation += 1
+            return self._client
+
+    def invalidate(self, client=None) -> None:
+        """
+        Drop the current client; the next `get()` reconnects. With `client`, only
+        if it is still the current one, so callers that all failed on the same
+        connection close it once and never close its replacement.
+        """
+        with self._lock:
+            if client is None or client is self._client:
+                self._close_locked()
+
+    def report_error(self, e: BaseException, client) -> None:
+        """
+        A call on `client` failed: a connection error invalidates it, any other
+        error only makes the next `get()` health-check it.
+        """
+        with self._lock:
+            if client is not self._client:
+                return
+            if is_connection_error(e):
+                self._close_locked()
+            else:
+                self._last_check = 0.0
+
+    def close(self) -> None:
+        """Close the shared client. Safe to call more than once."""
+        with self._lock:
+            self._close_locked()
+
+    def _close_locked(self) -> None:
+        client, self._client = self._client, None
+        if client is not None:
+            try:
+                client.close()
+            except Exception as e:
+                log.warning("Error closing Weaviate client: %s", e)
+
+
+class AsyncWeaviateClientPool:
+    """
+    Async counterpart of WeaviateClientPool built on WeaviateAsyncClient.
+
+    An async client is bound to the event loop it connected on, so the pool
+    keeps one client per loop and transparently reconnects when it is asked
+    for a client from a different loop.
+    """
+
+    def __init__(self, connect: Callable[[], Awaitable[object]] = connect_cloud_async,
+                 health_interval: float = 30.0):
+        self._connect = connect
+        self._client = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock: Optional[asyncio.Lock] = None
+        self._last_check = 0.0
+        self.health_interval = health_interval
+        self.generation = 0
+
+    async def _healthy(self, client) -> bool:
+        try:
+            return bool(await client.is_ready())
+        except Exception:
+            return False
+
+    async def get(self):
+        """Return the shared async client for the running loop, (re)connecting as needed."""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # Clients (and asyncio locks) from another loop are unusable here.
+            self._client, self._loop, self._lock = None, loop, asyncio.Lock()
+        async with self._lock:
+            now = time.monotonic()
+            if self._client is not None and now - self._last_check < self.health_interval:
+                return self._client
+            if self._client is not None and await self._healthy(self._client):
+                self._last_check = now
+                return self._client
+            await self._aclose_current()
+            self._client = await self._connect()
+            self._last_check = now
+            self.generation += 1
+            return self._client
+
+    async def invalidate(self, client=None) -> None:
+        """Drop the current client (only if it is still `client`, when given); the next `get()` reconnects."""
+        if client is None or client is self._client:
+            await self._aclose_current()
+
+    async def report_error(self, e: BaseException, client) -> None:
+        """Same as WeaviateClientPool.report_error, for the running loop's client."""
+        if client is not self._client:
+            return
+        if is_connection_error(e):
+            await self._aclose_current()
+        else:
+            self._last_check = 0.0
+
+    async def close(self) -> None:
+        await self._aclose_current()
+
+    async def _aclose_current(self) -> None:
+        client, self._client = self._client, None
+        if client is not None:
+            try:
+                await client.close()
+            except Exception as e:
+                log.warning("Error closing async Weaviate client: %s", e)
+
+
+_POOL: Optional[WeaviateClientPool] = None
+_ASYNC_POOL: Optional[AsyncWeaviateClientPool] = None
+_POOL_LOCK = threading.Lock()
+
+
+def get_pool() -> WeaviateClientPool:
+    """Return the process-wide pool, creating it on first use."""
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is None:
+            _POOL = WeaviateClientPool()
+        return _POOL
+
+
+def set_pool(pool: Optional[WeaviateClientPool]) -> None:
+    """Replace the process-wide pool (closing the old one), e.g. for tests."""
+    global _POOL
+    with _POOL_LOCK:
+        old, _POOL = _POOL, pool
+    if old is not None and old is not pool:
+        old.close()
+
+
+def get_async_pool() -> AsyncWeaviateClientPool:
+    """Return the process-wide async pool, creating it on first use."""
+    global _ASYNC_POOL
+    with _POOL_LOCK:
+        if _ASYNC_POOL is None:
+            _ASYNC_POOL = AsyncWeaviateClientPool()
+        return _ASYNC_POOL
+
+
+def set_async_pool(pool: Optional[AsyncWeaviateClientPool]) -> None:
+    """Replace the process-wide async pool, e.g. for tests."""
+    global _ASYNC_POOL
+    with _POOL_LOCK:
+        _ASYNC_POOL = pool
+
+
+def close_pool() -> None:
+    """Shutdown hook: close the shared client if one was ever opened."""
+    with _POOL_LOCK:
+        pool = _POOL
+    if pool is not None:
+        pool.close()
+
+
+async def aclose_pools() -> None:
+    """Async shutdown hook: close both the async and the sync shared clients."""
+    with _POOL_LOCK:
+        apool = _ASYNC_POOL
+    if apool is not None:
+        await apool.close()
+    close_pool()
@@ -1,27 +1,29 @@
 import os
+import sys
+import atexit
+import logging
+import threading
+from typing import Optional
 from dotenv import load_dotenv
 
-from llama_index.core import Settings
-from llama_index.core.agent.workflow import FunctionAgent
-from llama_index.core.workflow import step, Workflow, StartEvent, StopEvent
-from basic.skills.policy_skill import TOOLS
-
+# Before any basic.* import: limits and tracing read their settings at import time.
 load_dotenv()
 
-# --- LLM (OpenAI) ---
-from llama_index.llms.openai import OpenAI
+# Workflow primitives come straight from llama-index-workflows: importing them via
+# llama_index.core.workflow would pull in all of llama_index.core at import time.
+from workflows import Context, Workflow, step
+from workflows.events import Event, StartEvent, StopEvent
+
+from basic import fastpath, limits
+from basic.llm import get_llm
+from basic.events import (PermissionDecisionEvent, QueuedEvent, TokenDeltaEvent,
+                          ToolCallFinishedEvent, ToolCallStartedEvent, row_chunks, without_rows)
+from basic.tracing import SpanContext, span, start_span
 
-# Use OpenAI API key
-openai_api_key = os.getenv("OPENAI_API_KEY")
-if not openai_api_key:
-    raise ValueError("OPENAI_API_KEY environment variable is required")
+log = logging.getLogger(__name__)
 
-Settings.llm = OpenAI(
-    model=os.getenv("OPENAI_MODEL", "gpt-4o-mini"),
-    api_key=openai_api_key,
-    temperature=0.1,
-    max_tokens=2048,
-)
+_AGENT = None
+_INIT_LOCK = threading.Lock()
 
 # SYSTEM = """You are a Compliance-Aware Data Concierge.
 # - Always call check_permissions() BEFORE fetch_data().
@@ -36,7 +38,7 @@ SYSTEM = """You are a Compliance-Aware Data Concierge.
 Policy:
 - Always call check_permissions() BEFORE fetch_data().
 - If denied: reply briefly with the reason + policy section; DO NOT call fetch_data() or audit_log().
-- If allowed: call fetch_data(), THEN call audit_log(entry=<dict>) with ALL fields below.
+- If allowed: call fetch_data(user_email=<requester>), THEN call audit_log(entry=<dict>) with ALL fields below.
 
 audit_log(entry) REQUIRED fields example:
 {
@@ -48,42 +50,201 @@ audit_log(entry) REQUIRED fields example:
   "decision": "allow|deny",
   "policy_section": "<e.g., HR-1.2>",
   "policy_ref": "Policies",
-  "rows_returned": <int>,          # number of rows returned from fetch_data
+  "rows_returned": <int>,          # rows_returned from fetch_data
   "timestamp": "<iso8601>"
 }
 
 Be concise. Default to least privilege. Include a short policy note (quote or section id)."""
 
 
-agent = FunctionAgent(llm=Settings.llm, tools=TOOLS, system_prompt=SYSTEM)
+def get_agent():
+    """Build the FunctionAgent (and with it the tools, data and LLM) on first use."""
+    global _AGENT
+    llm = get_llm()
+    with _INIT_LOCK:
+        if _AGENT is None:
+            from llama_index.core.agent.workflow import FunctionAgent
+            from basic.skills.policy_skill import TOOLS
+
+            _AGENT = FunctionAgent(llm=llm, tools=TOOLS, system_prompt=SYSTEM)
+        return _AGENT
+
+
+def __getattr__(name):
+    # `basic.workflow.agent` used to be a module global built at import time.
+    if name == "agent":
+        return get_agent()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def warmup(connect_vector_store: bool = True) -> None:
+    """
+    Optional warm-up hook for the deployment: do the first-request work ahead
+    of traffic (imports, LLM client, agent, employee data, policy index or
+    Weaviate connection).
+    """
+    get_agent()
+    from basic.skills import core
+    from basic.policies import get_policy_query_engine, retriever_backend
+
+    core.init()
+
+    if connect_vector_store and (retriever_backend() == "local" or os.getenv("WEAVIATE_URL")):
+        get_policy_query_engine()
+
+
+class StructuredRequestEvent(Event):
+    """A message the rule-based parser fully understood; answered without the LLM."""
+    request: fastpath.StructuredRequest
+    trace: Optional[SpanContext] = None
+
+
+class AgentRequestEvent(Event):
+    """A free-form message that needs the FunctionAgent."""
+    message: str
+    trace: Optional[SpanContext] = None
+
+
+FAST_PATH = os.getenv("FAST_PATH", "1") != "0"
+
+
+def _usage(raw) -> dict:
+    """Token counts from a raw LLM response/chunk, when the provider reports them."""
+    usage = raw.get("usage") if isinstance(raw, dict) else getattr(raw, "usage", None)
+    if usage is None:
+        return {}
+    get = usage.get if isinstance(usage, dict) else lambda k: getattr(usage, k, None)
+    return {k: get(k) for k in ("prompt_tokens", "completion_tokens", "total_tokens") if get(k) is not None}
+
+
+def _relay(ctx: Context, agent_ev: Event, started: dict) -> None:
+    """
+    Translate FunctionAgent stream events into the workflow's own stream events.
+
+    `started` holds the open spans: one per in-flight tool call (by tool_id) and,
+    under "llm", the current LLM turn (AgentInput until AgentOutput).
+    """
+    from llama_index.core.agent.workflow import (AgentInput, AgentOutput, AgentStream,
+                                                 ToolCall, ToolCallResult)
+
+    if isinstance(agent_ev, AgentStream):
+        if agent_ev.delta:
+            ctx.write_event_to_stream(TokenDeltaEvent(delta=agent_ev.delta))
+    elif isinstance(agent_ev, AgentInput):
+        started["llm"] = start_span("agent.llm", agent=agent_ev.current_agent_name, messages=len(agent_ev.input))
+    elif isinstance(agent_ev, AgentOutput):
+        s = started.pop("llm", None)
+        if s is not None:
+            s.set(tool_calls=len(agent_ev.tool_calls), **_usage(agent_ev.raw))
+            s.end()
+    elif isinstance(agent_ev, ToolCallResult):
+        s = started.pop(agent_ev.tool_id, None)
+        out = agent_ev.tool_output
+        if s is not None:
+            if out.is_error:
+                s.set(error=str(out))
+                s.status = "error"
+            s.end()
+        ctx.write_event_to_stream(ToolCallFinishedEvent(
+            tool_name=agent_ev.tool_name,
+            tool_id=agent_ev.tool_id,
+            output=without_rows(out.raw_output) if out.raw_output is not None else str(out),
+            duration_ms=s.duration_ms if s is not None else 0.0,
+            status="failed" if out.is_error else "completed",
+        ))
+        page = out.raw_output
+        if agent_ev.tool_name == "fetch_data" and isinstance(page, dict) and "rows" in page:
+            for chunk in row_chunks(page["rows"], tool_id=agent_ev.tool_id):
+                ctx.write_event_to_stream(chunk)
+        decision = out.raw_output
+        if agent_ev.tool_name == "check_permissions" and isinstance(decision, dict) and "allow" in decision:
+            ctx.write_event_to_stream(PermissionDecisionEvent(
+                resource=str(agent_ev.tool_kwargs.get("resource", "")),
+                action=str(agent_ev.tool_kwargs.get("action", "")),
+                allow=bool(decision["allow"]),
+                reason=str(decision.get("reason", "")),
+                policy_section=str(decision.get("policy_section", "")),
+            ))
+    elif isinstance(agent_ev, ToolCall):
+        started[agent_ev.tool_id] = start_span("tool", tool_name=agent_ev.tool_name, path="agent")
+        ctx.write_event_to_stream(ToolCallStartedEvent(
+            tool_name=agent_ev.tool_name, tool_id=agent_ev.tool_id, input=dict(agent_ev.tool_kwargs)))
+
+
+def _overloaded(e: limits.Overloaded) -> dict:
+    return {
+        "error": str(e),
+        "error_type": "Overloaded",
+        "queue_depth": e.queue_depth,
+        "in_flight": limits.WORKFLOW.in_flight,
+    }
+
+
+def _admit(ctx: Context):
+    """Hold a limits.WORKFLOW slot for the run, streaming the queue position while it waits."""
+    return limits.WORKFLOW.ahold(on_queued=lambda position: ctx.write_event_to_stream(
+        QueuedEvent(position=position, queue_depth=limits.WORKFLOW.queue_depth)))
+
 
 class ConciergeWorkflow(Workflow):
     @step
-    async def gate_and_answer(self, ev: StartEvent) -> StopEvent:
-        # Debug: print what we received
-        print(f"DEBUG: ev type = {type(ev)}")
-        print(f"DEBUG: dict(ev) = {dict(ev)}")
-        print(f"DEBUG: hasattr 'message' = {hasattr(ev, 'message')}")
-        print(f"DEBUG: hasattr 'input' = {hasattr(ev, 'input')}")
-
-        # Try to get message from various possible locations
-        msg = ""
-        if hasattr(ev, "message"):
-            msg = ev.message
-        elif hasattr(ev, "input") and isinstance(ev.input, dict):
-            msg = ev.input.get("message", "")
-
-        if not msg:
+    async def route(self, ev: StartEvent) -> StructuredRequestEvent | AgentRequestEvent | StopEvent:
+        log.debug("route received %s: %s", type(ev).__name__, dict(ev))
+
+        with span("workflow.route") as s:
+            # Try to get message from various possible locations
+            msg = ""
+            if hasattr(ev, "message"):
+                msg = ev.message
+            elif hasattr(ev, "input") and isinstance(ev.input, dict):
+                msg = ev.input.get("message", "")
+
+            if not msg:
+                s.set(route="error")
+                return StopEvent(result={
+                    "error": "missing 'message' in input",
+                    "debug_received": dict(ev)
+                })
+
+            req = fastpath.parse(msg) if FAST_PATH else None
+            s.set(route="fast" if req is not None else "agent")
+            # Each step runs in its own task, so the later steps join this trace explicitly.
+            if req is not None:
+                return StructuredRequestEvent(request=req, trace=s.context)
+            return AgentRequestEvent(message=msg, trace=s.context)
+
+    @step
+    async def fast_path(self, ctx: Context, ev: StructuredRequestEvent) -> StopEvent:
+        try:
+            with span("workflow.fast_path", parent=ev.trace, resource=ev.request.resource):
+                async with _admit(ctx):
+                    return StopEvent(result=await fastpath.run(ev.request, emit=ctx.write_event_to_stream))
+        except limits.Overloaded as e:
+            return StopEvent(result=_overloaded(e))
+        except Exception as e:
+            import traceback
             return StopEvent(result={
-                "error": "missing 'message' in input",
-                "debug_received": dict(ev)
+                "error": str(e),
+                "error_type": type(e).__name__,
+                "traceback": traceback.format_exc()
             })
 
+    @step
+    async def gate_and_answer(self, ctx: Context, ev: AgentRequestEvent) -> StopEvent:
+        msg = ev.message
+        started = {}
         try:
-            print(f"DEBUG: Calling agent with message: {msg[:100]}...")
-            result = await agent.run(user_msg=msg)
-            print(f"DEBUG: Agent result: {str(result)[:200]}...")
-            return StopEvent(result={"answer": str(result)})
+            with span("workflow.gate_and_answer", parent=ev.trace):
+                async with _admit(ctx):
+                    log.debug("calling agent with message: %s", msg[:100])
+                    handler = get_agent().run(user_msg=msg)
+                    async for agent_ev in handler.stream_events():
+                        _relay(ctx, agent_ev, started)
+                    result = await handler
+                    log.debug("agent result: %s", str(result)[:200])
+                    return StopEvent(result={"answer": str(result)})
+        except limits.Overloaded as e:
+            return StopEvent(result=_overloaded(e))
         except Exception as e:
             import traceback
             error_details = {
@@ -91,9 +252,34 @@ class ConciergeWorkflow(Workflow):
                 "error_type": type(e).__name__,
                 "traceback": traceback.format_exc()
             }
-            print(f"DEBUG: Exception occurred: {error_details}")
+            log.exception("agent run failed")
             return StopEvent(result=error_details)
+        finally:
+            for s in started.values():  # close spans of calls that never reported back
+                s.end()
 
 wf = ConciergeWorkflow()
 # give it a nicer URL name (optional)
 # wf.name = "concierge"
+
+
+def shutdown() -> None:
+    """Release process-wide resources held on behalf of `wf` (only those ever created)."""
+    core = sys.modules.get("basic.skills.core")
+    audit = vars(core).get("AUDIT") if core is not None else None  # never opened: nothing to drain
+    if audit is not None:
+        audit.close()
+    pool = sys.modules.get("basic.weaviate_pool")
+    if pool is not None:
+        pool.close_pool()
+
+
+async def ashutdown() -> None:
+    """Async variant of shutdown() that also closes the event-loop bound async client."""
+    pool = sys.modules.get("basic.weaviate_pool")
+    if pool is not None:
+        await pool.aclose_pools()
+    shutdown()
+
+
+atexit.register(shutdown)
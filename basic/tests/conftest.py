@@ -0,0 +1,46 @@
+import os
+from types import SimpleNamespace
+
+import pytest
+
+# Build the datasets in memory: a test run must not write datasets.sqlite into the source tree.
+os.environ.setdefault("DATA_DB_PATH", ":memory:")
+
+from basic.skills import core
+from basic.skills.audit import AuditSink, SegmentedAuditStore
+from basic.skills.policy_notes import PolicyNotes
+
+
+class FakeEngine:
+    """Stands in for the Weaviate-backed policy query engine."""
+
+    def __init__(self) -> None:
+        self.calls = 0
+
+    def query(self, q: str):
+        self.calls += 1
+        node = SimpleNamespace(node=SimpleNamespace(metadata={"section": "HR-1.1"}))
+        return SimpleNamespace(response="See HR-1.1.", source_nodes=[node])
+
+    async def aquery(self, q: str):
+        return self.query(q)
+
+
+@pytest.fixture
+def engine(monkeypatch):
+    eng = FakeEngine()
+    monkeypatch.setattr(core, "get_policy_query_engine", lambda: eng)
+    monkeypatch.setattr(core, "NOTES", PolicyNotes())
+    core.invalidate_decisions()
+    yield eng
+    core.invalidate_decisions()
+
+
+@pytest.fixture
+def audit_store(monkeypatch, tmp_path):
+    store = SegmentedAuditStore(tmp_path / "audit")
+    sink = AuditSink(store, flush_interval=0.001)
+    monkeypatch.setattr(core, "AUDIT_STORE", store)
+    monkeypatch.setattr(core, "AUDIT", sink)
+    yield store
+    sink.close()
@@ -0,0 +1,44 @@
+import numpy as np
+
+from basic.skills import core
+from basic.skills.access_review import ALL, CONTEXT, REPORTS, ROWS, SELF, AccessMatrix, diff, review, run
+
+
+def test_matrix_matches_check_permissions(engine) -> None:
+    m = review(core.EMP, core.RULES, resources=core.RESOURCES, actions=("read",))
+    emails = dict(zip(core.EMP["employee_id"], core.EMP["email"]))
+    roles = dict(zip(core.EMP["employee_id"], core.EMP["role"]))
+    for i, emp_id in enumerate(m.employee_ids):
+        for r, resource in enumerate(m.resources):
+            d = core.check_permissions(emails[emp_id], roles[emp_id], resource, "read")
+            assert bool(m.scopes[i, r, 0] & (ALL | ROWS)) == d["allow"], (emp_id, resource)
+            assert bool(m.scopes[i, r, 0] & ROWS) == ("row_scope" in d), (emp_id, resource)
+
+
+def test_scopes_follow_relationships() -> None:
+    m = review(core.EMP, core.RULES, resources=core.RESOURCES, actions=("read",))
+    row = {e: i for i, e in enumerate(m.employee_ids)}
+    perf, fin = m.resources.index("performance_summary"), m.resources.index("financial_report")
+    assert m.scopes[row[201], perf, 0] == SELF | REPORTS      # Engineering Manager with reports
+    assert m.scopes[row[101], perf, 0] == SELF                # no reports: no manager scope
+    assert m.scopes[row[107], perf, 0] & ALL                  # HR Manager
+    assert m.scopes[row[302], fin, 0] == ALL                  # CFO
+    exec_only = review(core.EMP.assign(role="Executive"), core.RULES, resources=("financial_report",))
+    assert (exec_only.scopes == CONTEXT).all()
+
+
+def test_save_load_and_diff(tmp_path) -> None:
+    path, changes = run(core.EMP, core.RULES, tmp_path)
+    assert changes is None
+    loaded = AccessMatrix.load(path)
+    assert np.array_equal(loaded.scopes, review(core.EMP, core.RULES).scopes)
+
+    emp = core.EMP.copy()
+    emp.loc[emp["employee_id"] == 102, "role"] = "HR"
+    emp = emp[emp["employee_id"] != 105]
+    _, changes = run(emp, core.RULES, tmp_path)
+    salary = changes[(changes["employee_id"] == 102) & (changes["resource"] == "salary") & (changes["action"] == "read")]
+    assert salary["change"].tolist() == ["granted"] and salary["after"].tolist() == ["all"]
+    assert set(changes[changes["employee_id"] == 105]["change"]) == {"revoked"}
+    assert len(list(tmp_path.glob("*.diff.csv"))) == 1
+    assert diff(loaded, loaded).empty
@@ -0,0 +1,147 @@
+import json
+from datetime import datetime, timezone
+
+import pytest
+
+from basic.skills.audit import AuditRecord, AuditSink, SegmentedAuditStore
+
+
+def test_group_commit_and_drain(tmp_path) -> None:
+    path = tmp_path / "logs" / "audit.jsonl"
+    sink = AuditSink(path, batch_size=10, flush_interval=0.01)
+    for i in range(25):
+        sink.submit({"n": i})
+    sink.close()
+    rows = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [r["n"] for r in rows] == list(range(25))
+    assert sink.batches <= 25
+    with pytest.raises(RuntimeError):
+        sink.submit({"n": 99})
+
+
+def test_flush_makes_entries_visible(tmp_path) -> None:
+    path = tmp_path / "audit.jsonl"
+    sink = AuditSink(path, flush_interval=5, fsync=True)
+    sink.submit({"decision": "allow"})
+    assert sink.flush(timeout=2)
+    assert json.loads(path.read_text()) == {"decision": "allow"}
+    sink.close()
+
+
+def test_segments_rotate_compress_and_query(tmp_path) -> None:
+    store = SegmentedAuditStore(tmp_path)
+    now = [datetime(2025, 3, 1, 10, tzinfo=timezone.utc)]
+    sink = AuditSink(store, flush_interval=0.01, clock=lambda: now[0])
+    sink.submit({"timestamp": "2031-01-01T00:00:00Z", "user_email": "a@x.com", "resource": "salary"})
+    now[0] = datetime(2025, 3, 2, 10, tzinfo=timezone.utc)
+    sink.submit({"user_email": "b@x.com", "resource": "directory"})
+    sink.submit({"user_email": "a@x.com", "resource": "directory"})
+    sink.flush(timeout=2)
+    # A late entry for an already sealed day lands in the same compressed segment.
+    now[0] = datetime(2025, 3, 1, 23, tzinfo=timezone.utc)
+    sink.submit({"user_email": "c@x.com", "resource": "salary"})
+    sink.close()
+
+    # The day comes from the sink's clock, not the entry's own timestamp.
+    assert (tmp_path / "audit-2025-03-01.jsonl.gz").exists()
+    assert not (tmp_path / "audit-2025-03-01.jsonl").exists()
+    assert (tmp_path / "audit-2025-03-02.jsonl").exists()
+    assert store.days() == ["2025-03-01", "2025-03-02"]
+    assert not list(tmp_path.glob("*.tmp"))
+
+    assert len(list(store.query(user_email="a@x.com"))) == 2
+    assert [e["user_email"] for e in store.query(resource="salary")] == ["a@x.com", "c@x.com"]
+    assert list(store.query(user_email="b@x.com", start="2025-03-01", end="2025-03-01")) == []
+    assert len(list(store.query(start="2025-03-02"))) == 2
+
+
+def test_index_appends_only_new_keys(tmp_path) -> None:
+    store = SegmentedAuditStore(tmp_path)
+    day = datetime(2025, 3, 1, tzinfo=timezone.utc)
+    for email in ("a@x.com", "a@x.com", "b@x.com"):
+        store.write([AuditRecord.from_entry({"user_email": email, "resource": "salary"}, day)])
+    store.close()
+    lines = (tmp_path / "audit-2025-03-01.idx.jsonl").read_text().splitlines()
+    assert [json.loads(line) for line in lines] == [
+        {"user_email": ["a@x.com"], "resource": ["salary"]}, {"user_email": ["b@x.com"]}]
+    # A second writer (another process) continues the same day after this one sealed it.
+    other = SegmentedAuditStore(tmp_path)
+    other.write([AuditRecord.from_entry({"user_email": "c@x.com"}, day)])
+    store.write([AuditRecord.from_entry({"user_email": "d@x.com"}, day.replace(day=2))])
+    other.write([AuditRecord.from_entry({"user_email": "e@x.com"}, day)])
+    assert sorted(e["user_email"] for e in store.query(end="2025-03-01")) == [
+        "a@x.com", "a@x.com", "b@x.com", "c@x.com", "e@x.com"]
+
+
+class FlakyStore:
+    """Fails the first `failures` writes, then keeps everything it is given."""
+
+    def __init__(self, tmp_path, failures: int) -> None:
+        self.failures = failures
+        self.lines = []
+        self.spill_path = tmp_path / "spill.jsonl"
+
+    def write(self, records) -> None:
+        if self.failures:
+            self.failures -= 1
+            raise OSError("disk full")
+        self.lines += [json.loads(r.line) for r in records]
+
+    def sync(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+def test_failed_batches_are_retried(tmp_path) -> None:
+    store = FlakyStore(tmp_path, failures=2)
+    sink = AuditSink(store, backoff=0.001)
+    for i in range(3):
+        sink.submit({"n": i})
+    sink.close()
+    assert [e["n"] for e in store.lines] == [0, 1, 2]
+    assert sink.failed == 2 and sink.spilled == 0 and not store.spill_path.exists()
+
+
+def test_unwritable_store_spills_records(tmp_path) -> None:
+    store = FlakyStore(tmp_path, failures=100)
+    sink = AuditSink(store, retries=2, backoff=0.001)
+    for i in range(3):
+        sink.submit({"n": i})
+    sink.close()
+    spilled = [json.loads(line)["entry"]["n"] for line in store.spill_path.read_text().splitlines()]
+    assert sorted(spilled) == [0, 1, 2] and sink.spilled == 3 and store.lines == []
+
+
+def test_spilled_entries_are_replayed_on_start(tmp_path) -> None:
+    day = datetime(2025, 3, 1, 10, tzinfo=timezone.utc)
+    failing = FlakyStore(tmp_path, failures=100)
+    sink = AuditSink(failing, retries=0, clock=lambda: day)
+    sink.submit({"user_email": "a@x.com", "resource": "salary"})
+    sink.close()
+    assert failing.spill_path.exists()
+
+    store = SegmentedAuditStore(tmp_path)
+    later = AuditSink(store, clock=lambda: datetime(2025, 3, 5, tzinfo=timezone.utc))
+    later.start()
+    assert later.flush(timeout=2) and later.replayed == 1
+    assert not store.spill_path.exists() and not (tmp_path / "spill.jsonl.replay").exists()
+    # The entry lands in the day it was submitted, not the day of the replay.
+    assert store.days() == ["2025-03-01"]
+    assert list(store.query(user_email="a@x.com")) == [{"user_email": "a@x.com", "resource": "salary"}]
+    later.close()
+
+
+def test_entries_without_index_keys_are_queryable(tmp_path) -> None:
+    store = SegmentedAuditStore(tmp_path)
+    sink = AuditSink(store, flush_interval=0.01, clock=lambda: datetime(2025, 3, 1, tzinfo=timezone.utc))
+    sink.submit({"decision": "deny"})
+    sink.flush(timeout=2)
+    assert store.days() == ["2025-03-01"]
+    assert list(store.query()) == [{"decision": "deny"}]
+    assert list(store.query(user_email="a@x.com")) == []
+    sink.close()
+    # A day left by an earlier version without any sidecar is still listed.
+    (tmp_path / "audit-2025-03-01.idx.jsonl").unlink()
+    assert store.days() == ["2025-03-01"] and list(store.query()) == [{"decision": "deny"}]
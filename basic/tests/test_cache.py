@@ -0,0 +1,22 @@
+from basic.skills.cache import TTLCache
+
+
+def test_lru_eviction_and_stats() -> None:
+    c = TTLCache(maxsize=2, ttl=60)
+    c.set("a", 1)
+    c.set("b", 2)
+    assert c.get("a") == 1
+    c.set("c", 3)  # evicts "b", the least recently used
+    assert c.get("b") is None
+    assert c.stats() == {"hits": 1, "misses": 1, "evictions": 1, "size": 2, "maxsize": 2}
+
+
+def test_ttl_expiry() -> None:
+    now = [0.0]
+    c = TTLCache(maxsize=4, ttl=10, clock=lambda: now[0])
+    c.set("k", "v")
+    now[0] = 9.9
+    assert c.get("k") == "v"
+    now[0] = 10.0
+    assert c.get("k") is None
+    assert len(c) == 0
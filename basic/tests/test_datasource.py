@@ -0,0 +1,69 @@
+import shutil
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from basic.skills.datasource import PandasDataSource, SQLiteDataSource
+from basic.skills.directory import EmployeeDirectory
+
+DATA = Path(__file__).resolve().parents[1] / "data"
+
+
+@pytest.fixture
+def data_dir(tmp_path) -> Path:
+    d = tmp_path / "data"
+    shutil.copytree(DATA, d, ignore=shutil.ignore_patterns("*.sqlite", "*.json"))
+    return d
+
+
+def test_sqlite_matches_pandas_for_employee_resources(data_dir, tmp_path) -> None:
+    emp = pd.read_csv(data_dir / "employees.csv")
+    pandas_src = PandasDataSource(emp, EmployeeDirectory.from_frame(emp))
+    sqlite_src = SQLiteDataSource(data_dir, tmp_path / "db.sqlite")
+    for resource, filters in [("salary", {"employee_id": 101}),
+                              ("directory", {"department": "Engineering"}),
+                              ("performance_summary", None)]:
+        ids = lambda rows: [r["employee_id"] for r in rows]
+        assert ids(sqlite_src.select(resource, filters)) == ids(pandas_src.select(resource, filters))
+        assert sqlite_src.columns(resource) == pandas_src.columns(resource)
+        assert sqlite_src.count(resource, filters) == pandas_src.count(resource, filters)
+
+
+def test_sqlite_serves_all_datasets_with_pushdown(data_dir) -> None:
+    src = SQLiteDataSource(data_dir)
+    assert {"customers", "financial_report", "api_keys", "database_access", "ip_whitelist"} <= set(src.resources())
+    quarterly = src.select("financial_report", {"report_type": "quarterly"})
+    assert quarterly and all(r["report_type"] == "quarterly" for r in quarterly)
+    # Unknown columns are ignored and values are bound, never interpolated.
+    assert src.count("customers", {"nope": 1}) == src.count("customers")
+    assert src.select("customers", {"region": "West' OR '1'='1"}) == []
+
+    page = src.page("api_keys", limit=4)
+    assert page["rows_returned"] == 4 and page["next_cursor"] == page["rows"][-1]["key_id"]
+    streamed = [r["key_id"] for b in src.iter_batches("api_keys", batch_size=3) for r in b]
+    assert streamed == sorted(streamed) and len(streamed) == page["total_rows"]
+
+
+def test_sqlite_reloads_only_changed_csv(data_dir, tmp_path) -> None:
+    db = tmp_path / "db.sqlite"
+    SQLiteDataSource(data_dir, db)
+    src = SQLiteDataSource(data_dir, db)
+    assert src.refresh() == []
+    with open(data_dir / "customers.csv", "a") as f:
+        f.write("9999,New Co,Retail,1,1,106,active,2025-01-01,2026-01-01,West\n")
+    assert src.refresh() == ["customers"]
+    assert src.select("customers", {"customer_id": 9999})[0]["customer_name"] == "New Co"
+
+
+def test_scope_narrows_both_backends(data_dir, tmp_path) -> None:
+    emp = pd.read_csv(data_dir / "employees.csv")
+    sources = (PandasDataSource(emp, EmployeeDirectory.from_frame(emp)), SQLiteDataSource(data_dir, tmp_path / "db.sqlite"))
+    for src in sources:
+        mine = src.select("salary", scope={"employee_id": 101})
+        assert [r["employee_id"] for r in mine] == [101] and src.count("salary", scope={"employee_id": 101}) == 1
+        assert src.select("salary", {"employee_id": 102}, scope={"employee_id": 101}) == []
+        # A scope column the dataset lacks matches nothing rather than everything.
+        assert src.select("salary", scope={"account_executive_id": 106}) == []
+    own = sources[1].select("customers", scope={"account_executive_id": 106})
+    assert own and all(r["account_executive_id"] == 106 for r in own)
@@ -0,0 +1,74 @@
+import pandas as pd
+import pytest
+
+from basic.skills.directory import EmployeeDirectory
+
+
+def _frame() -> pd.DataFrame:
+    return pd.DataFrame({
+        "employee_id": [1, 2, 3],
+        "name": ["Ann", "Ben", "Cy"],
+        "email": ["ann@x.com", "ben@x.com", "cy@x.com"],
+        "department": ["Eng", "Eng", "Eng"],
+        "role": ["Engineering Manager", "Engineer", "Engineer"],
+        "manager_id": [None, 1, 1],
+    })
+
+
+def test_lookups() -> None:
+    d = EmployeeDirectory.from_frame(_frame())
+    assert len(d) == 3
+    assert d.role_of("ben@x.com") == "Engineer"
+    assert d.role_of("nobody@x.com") is None
+    assert d.get_by_id(3).email == "cy@x.com"
+    assert d.get_by_id(1).manager_id is None
+    assert d.get("cy@x.com").row == 2
+
+
+def test_manager_edges() -> None:
+    d = EmployeeDirectory.from_frame(_frame())
+    assert d.direct_reports(1) == (2, 3)
+    assert d.is_manager_of(1, 2)
+    assert not d.is_manager_of(2, 3)
+    assert not d.is_manager_of(1, 99)
+
+
+def _chain_frame(n: int) -> pd.DataFrame:
+    ids = list(range(1, n + 1))
+    return pd.DataFrame({
+        "employee_id": ids, "name": [f"E{i}" for i in ids], "email": [f"e{i}@x.com" for i in ids],
+        "department": ["Eng"] * n, "role": ["Engineer"] * n,
+        "manager_id": [None] + ids[:-1],
+    })
+
+
+def test_reporting_chain() -> None:
+    df = pd.concat([_frame(), pd.DataFrame({
+        "employee_id": [4, 5], "name": ["Di", "Ed"], "email": ["di@x.com", "ed@x.com"],
+        "department": ["Eng", "Eng"], "role": ["Engineer", "Engineer"], "manager_id": [2, 4]})])
+    d = EmployeeDirectory.from_frame(df)
+    assert d.is_in_chain(1, 5) and d.is_in_chain(2, 5) and d.is_in_chain(1, 2)
+    assert not d.is_in_chain(3, 5) and not d.is_in_chain(5, 1) and not d.is_in_chain(2, 2)
+    assert not d.is_in_chain(1, 99)
+    assert d.subordinates(1) == [2, 4, 5, 3]
+    assert d.chain_of(5) == [4, 2, 1]
+
+
+def test_deep_chain_and_set_manager() -> None:
+    n = 50_000  # deeper than the recursion limit
+    d = EmployeeDirectory.from_frame(_chain_frame(n))
+    assert d.is_in_chain(1, n) and not d.is_in_chain(n, 1)
+    assert len(d.subordinates(1)) == n - 1
+    d.set_manager(n // 2, None)
+    assert not d.is_in_chain(1, n) and d.is_in_chain(n // 2, n)
+    assert d.direct_reports(n // 2 - 1) == ()
+    with pytest.raises(ValueError):
+        d.set_manager(n // 2, n)
+
+
+def test_manager_cycle_in_source_data() -> None:
+    df = _frame()
+    df.loc[0, "manager_id"] = 3  # 1 -> 3 -> 1
+    d = EmployeeDirectory.from_frame(df)
+    assert len(d.subordinates(1)) + len(d.subordinates(3)) >= 1
+    assert not (d.is_in_chain(1, 3) and d.is_in_chain(3, 1))
@@ -0,0 +1,120 @@
+import asyncio
+from types import SimpleNamespace
+
+from basic import fastpath
+from basic.events import (AnswerChunkEvent, PermissionDecisionEvent, TokenDeltaEvent,
+                          ToolCallFinishedEvent, ToolCallStartedEvent, row_chunks)
+from basic.workflow import ConciergeWorkflow, _relay
+
+
+def _run(msg: str, events=None):
+    async def go():
+        handler = ConciergeWorkflow(timeout=10).run(message=msg)
+        async for ev in handler.stream_events():
+            if events is not None:
+                events.append(ev)
+        return await handler
+
+    return asyncio.run(go())
+
+
+def test_parse_structured_requests() -> None:
+    req = fastpath.parse("[user_email=grace.patel@company.com; role=HR] Show salary for employee_id 101")
+    assert req == fastpath.StructuredRequest("grace.patel@company.com", "HR", "salary", 101)
+    req = fastpath.parse("[user_email=a@x.com; role=Engineering Manager] show the performance review of employee 105.")
+    assert req.resource == "performance_summary" and req.role == "Engineering Manager"
+
+
+def test_free_form_goes_to_agent() -> None:
+    assert fastpath.parse("[user_email=a@x.com; role=HR] What's this person's salary?") is None
+    assert fastpath.parse("Show salary for employee_id 101") is None
+    assert fastpath.parse("[user_email=a@x.com; role=HR] Show lunch menu for employee_id 101") is None
+
+
+def test_workflow_answers_structured_request_without_llm(engine, audit_store) -> None:
+    msg = "[user_email=grace.patel@company.com; role=HR Manager] Show salary for employee_id 101"
+    events = []
+    result = _run(msg, events)
+    assert result["decision"]["allow"]
+    chunks = [e for e in events if isinstance(e, AnswerChunkEvent)]
+    assert [r for c in chunks for r in c.rows] == [{"employee_id": 101, "name": "Alice Chen", "salary": 160000}]
+    assert result["rows_returned"] == 1 and "rows" not in result
+    assert "Access allowed (HR-1.1)" in result["answer"]
+    from basic.skills import core
+    core.AUDIT.flush(timeout=2)
+    (entry,) = audit_store.query(user_email="grace.patel@company.com")
+    assert entry["rows_returned"] == 1 and entry["decision"] == "allow"
+
+
+def test_workflow_denies_without_fetch(engine, audit_store) -> None:
+    msg = "[user_email=bob.martinez@company.com; role=Engineer] Show salary for employee_id 101"
+    result = _run(msg)
+    assert not result["decision"]["allow"]
+    assert "rows" not in result and result["answer"].startswith("Access denied")
+
+
+def test_fast_path_streams_progress_events(engine, audit_store) -> None:
+    events = []
+    result = _run("[user_email=grace.patel@company.com; role=HR] Show salary for employee_id 102", events)
+    kinds = [type(e).__name__ for e in events if not type(e).__name__ == "StopEvent"]
+    assert kinds[:3] == ["ToolCallStartedEvent", "ToolCallFinishedEvent", "PermissionDecisionEvent"]
+    assert any(isinstance(e, AnswerChunkEvent) and e.rows for e in events)
+    finished = [e for e in events if isinstance(e, ToolCallFinishedEvent)]
+    assert [e.tool_name for e in finished] == ["check_permissions", "fetch_data", "audit_log"]
+    assert all(e.status == "completed" and e.duration_ms >= 0 for e in finished)
+    assert "rows" not in finished[1].output and finished[1].output["rows_returned"] == 1
+    # Rows reach the client once: in the chunks, not again in the answer text.
+    (row,) = [r for e in events if isinstance(e, AnswerChunkEvent) for r in e.rows]
+    assert str(row["salary"]) not in result["answer"] and row["name"] not in result["answer"]
+    assert "rows" not in result and result["rows_returned"] == 1
+
+
+def test_agent_events_are_relayed() -> None:
+    from llama_index.core.agent.workflow import AgentStream, ToolCall, ToolCallResult
+    from llama_index.core.tools import ToolOutput
+
+    out = []
+    ctx = SimpleNamespace(write_event_to_stream=out.append)
+    started = {}
+    kwargs = {"resource": "salary", "action": "read"}
+    _relay(ctx, AgentStream(delta="Hel", response="Hel", current_agent_name="a"), started)
+    _relay(ctx, ToolCall(tool_name="check_permissions", tool_kwargs=kwargs, tool_id="t1"), started)
+    result = ToolOutput(content="...", tool_name="check_permissions", raw_input=kwargs,
+                        raw_output={"allow": False, "reason": "no", "policy_section": "HR-1.1"})
+    _relay(ctx, ToolCallResult(tool_name="check_permissions", tool_kwargs=kwargs, tool_id="t1",
+                               tool_output=result, return_direct=False), started)
+    assert [type(e) for e in out] == [TokenDeltaEvent, ToolCallStartedEvent,
+                                      ToolCallFinishedEvent, PermissionDecisionEvent]
+    assert out[3].allow is False and out[3].policy_section == "HR-1.1"
+    assert started == {}
+
+
+def test_rows_stream_in_bounded_chunks() -> None:
+    rows = [{"employee_id": i} for i in range(7)]
+    chunks = list(row_chunks(rows, tool_id="t", size=3))
+    assert [len(c.rows) for c in chunks] == [3, 3, 1]
+    assert [c.index for c in chunks] == [0, 1, 2] and [c.last for c in chunks] == [False, False, True]
+    assert [r for c in chunks for r in c.rows] == rows
+    (empty,) = row_chunks([], tool_id="t")
+    assert empty.rows == [] and empty.last
+
+
+def test_agent_fetch_rows_are_chunked_not_duplicated(monkeypatch) -> None:
+    from llama_index.core.agent.workflow import ToolCall, ToolCallResult
+    from llama_index.core.tools import ToolOutput
+
+    from basic import events
+
+    monkeypatch.setattr(events, "ANSWER_CHUNK_ROWS", 2)
+    out = []
+    ctx = SimpleNamespace(write_event_to_stream=out.append)
+    kwargs = {"resource": "directory", "filters": {"department": "Engineering"}}
+    page = {"rows": [{"employee_id": i} for i in range(5)], "rows_returned": 5, "total_rows": 5, "next_cursor": None}
+    _relay(ctx, ToolCall(tool_name="fetch_data", tool_kwargs=kwargs, tool_id="t2"), {})
+    _relay(ctx, ToolCallResult(tool_name="fetch_data", tool_kwargs=kwargs, tool_id="t2", return_direct=False,
+                               tool_output=ToolOutput(content="...", tool_name="fetch_data", raw_input=kwargs,
+                                                      raw_output=page)), {})
+    finished, *chunks = out[1:]
+    assert isinstance(finished, ToolCallFinishedEvent) and "rows" not in finished.output
+    assert finished.output["rows_returned"] == 5
+    assert [len(c.rows) for c in chunks] == [2, 2, 1] and {c.tool_id for c in chunks} == {"t2"}
@@ -0,0 +1,48 @@
+import pytest
+
+from basic.skills import core
+
+
+def test_projection_per_resource() -> None:
+    rows = core.fetch_data("salary", {"employee_id": 101})["rows"]
+    assert rows == [{"employee_id": 101, "name": "Alice Chen", "salary": 160000}]
+    assert "salary" not in core.fetch_data("directory", {"employee_id": 101})["rows"][0]
+
+
+def test_indexed_and_scanned_filters() -> None:
+    by_email = core.fetch_data("directory", {"email": "grace.patel@company.com"})["rows"]
+    assert [r["employee_id"] for r in by_email] == [107]
+    assert core.fetch_data("directory", {"email": "grace.patel@company.com", "department": "Sales"})["rows"] == []
+    team = core.fetch_data("directory", {"manager_id": 201, "role": "Engineer"})["rows"]
+    assert [r["name"] for r in team] == ["Bob Martinez"]
+
+
+def test_unknown_inputs_return_nothing() -> None:
+    assert core.fetch_data("salary", {"employee_id": "not-a-number"})["rows"] == []
+    with pytest.raises(PermissionError):  # no policy governs reading it
+        core.fetch_data("unknown_resource")
+    # Filters on columns outside the projection are ignored, as before.
+    assert len(core.fetch_data("salary", {"ssn_last4": 1})["rows"]) == len(core.EMP)
+
+
+def test_keyset_pagination_and_streaming() -> None:
+    first = core.fetch_data("directory", limit=5)
+    assert first["rows_returned"] == 5
+    assert first["total_rows"] == len(core.EMP)
+    assert first["next_cursor"] == first["rows"][-1]["employee_id"]
+
+    seen = [r["employee_id"] for r in first["rows"]]
+    cursor = first["next_cursor"]
+    while cursor is not None:
+        page = core.fetch_data("directory", limit=5, cursor=cursor)
+        assert page["total_rows"] is None  # counted on the first page only
+        seen += [r["employee_id"] for r in page["rows"]]
+        cursor = page["next_cursor"]
+    assert seen == sorted(core.EMP["employee_id"])
+    for limit in (0, -1):
+        with pytest.raises(ValueError):
+            core.fetch_data("directory", limit=limit)
+
+    batches = list(core.iter_rows("salary", batch_size=6))
+    assert [len(b) for b in batches] == [6, 6, 4]
+    assert core.count_rows("directory", {"department": "Engineering"}) == 5
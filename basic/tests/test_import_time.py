@@ -0,0 +1,56 @@
+"""Import-time regression guard for workflow cold start.
+
+Runs ``python -X importtime -c "import basic.workflow"`` in a clean
+interpreter and checks that the heavy dependencies stay deferred until the
+first request (or an explicit ``warmup()``), and that importing
+``basic.skills.core`` has no side effects until ``init()``.
+"""
+
+import os
+import subprocess
+import sys
+
+HEAVY = ("pandas", "weaviate", "openai", "llama_index.core", "llama_index.llms.openai", "basic.skills.core")
+
+
+def _importtime(module: str) -> dict:
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, check=True,
+    )
+    cumulative = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cum, name = line.split("|")
+        if cum.strip().isdigit():
+            cumulative[name.strip()] = int(cum.strip())
+    return cumulative
+
+
+def test_workflow_import_defers_heavy_modules() -> None:
+    times = _importtime("basic.workflow")
+    loaded = sorted(m for m in HEAVY if m in times)
+    assert loaded == [], (f"imported eagerly: {loaded} "
+                          f"(import basic.workflow: {times['basic.workflow'] / 1000:.1f} ms cumulative)")
+
+
+_CORE_PROBE = """
+import atexit, threading
+registered = []
+atexit.register = lambda fn, *a, **k: registered.append(fn) or fn
+sinks = lambda: [fn for fn in registered if type(getattr(fn, "__self__", None)).__name__ == "AuditSink"]
+from basic.skills import core
+assert not {"DATA", "AUDIT", "AUDIT_STORE"} & set(vars(core)), "opened at import"
+assert threading.active_count() == 1, f"threads started at import: {threading.enumerate()}"
+assert sinks() == [], "audit sink exit hook registered at import"
+core.init()
+assert type(core.DATA).__name__ == "PandasDataSource" and sinks() == [core.AUDIT.close]
+core.AUDIT.close()
+"""
+
+
+def test_core_import_has_no_side_effects(tmp_path) -> None:
+    env = {**os.environ, "DATA_BACKEND": "pandas", "EMPLOYEES_RELOAD_INTERVAL": "0"}
+    proc = subprocess.run([sys.executable, "-c", _CORE_PROBE], capture_output=True, text=True, env=env, cwd=tmp_path)
+    assert proc.returncode == 0, proc.stderr
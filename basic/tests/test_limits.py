@@ -0,0 +1,155 @@
+import asyncio
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+from llama_index.core.base.llms.types import ChatMessage
+from llama_index.core.llms.mock import MockLLM
+
+from basic import limits
+from basic.events import QueuedEvent
+from basic.limits import Limiter, Overloaded
+from basic.llm import _LimitedLLM
+from basic.workflow import ConciergeWorkflow
+
+MSG = "[user_email=grace.patel@company.com; role=HR] Show salary for employee_id 102"
+
+
+def test_threads_never_exceed_limit() -> None:
+    lim, active, peak = Limiter("t", 2), [0], [0]
+    lock = threading.Lock()
+
+    def work():
+        with lim.hold():
+            with lock:
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+            time.sleep(0.01)
+            with lock:
+                active[0] -= 1
+
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    stats = lim.stats()
+    assert peak[0] == 2 and stats["acquired"] == 8 and stats["in_flight"] == 0
+    assert stats["wait_ms_max"] > 0
+
+
+def test_async_fifo_rejection_and_timeout() -> None:
+    async def go():
+        lim, order, positions = Limiter("a", 1, max_waiting=2), [], []
+        await lim.aacquire()
+
+        async def waiter(i):
+            async with lim.ahold(on_queued=positions.append):
+                order.append(i)
+
+        tasks = [asyncio.create_task(waiter(i)) for i in range(2)]
+        await asyncio.sleep(0)
+        with pytest.raises(Overloaded) as e:
+            await lim.aacquire()
+        assert e.value.queue_depth == 2 and not e.value.timed_out
+        lim.release()
+        await asyncio.gather(*tasks)
+        assert order == [0, 1] and positions == [1, 2]
+
+        await lim.aacquire()
+        with pytest.raises(Overloaded) as e:
+            await lim.aacquire(timeout=0.01)
+        assert e.value.timed_out
+        lim.release()
+        return lim.stats()
+
+    stats = asyncio.run(go())
+    assert stats == {**stats, "in_flight": 0, "queue_depth": 0, "rejected": 1, "timeouts": 1}
+
+
+def test_thread_release_wakes_event_loop_waiter() -> None:
+    lim = Limiter("x", 1)
+    lim.acquire()
+    threading.Timer(0.02, lim.release).start()
+
+    async def go():
+        async with lim.ahold(timeout=2):
+            return lim.in_flight
+
+    assert asyncio.run(go()) == 1
+    assert lim.stats()["in_flight"] == 0
+
+
+def test_cancelled_waiter_gives_slot_back() -> None:
+    async def go():
+        lim = Limiter("c", 1)
+        await lim.aacquire()
+        task = asyncio.create_task(lim.aacquire())
+        await asyncio.sleep(0)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        lim.release()
+        await asyncio.wait_for(lim.aacquire(), 1)
+        return lim.in_flight
+
+    assert asyncio.run(go()) == 1
+
+
+def test_workflow_rejects_when_queue_full(engine, audit_store, monkeypatch) -> None:
+    monkeypatch.setattr(limits, "WORKFLOW", Limiter("workflow", 1, max_waiting=0))
+    limits.WORKFLOW.acquire()
+
+    async def go():
+        return await ConciergeWorkflow(timeout=10).run(message=MSG)
+
+    result = asyncio.run(go())
+    assert result["error_type"] == "Overloaded" and limits.WORKFLOW.stats()["rejected"] == 1
+
+
+def test_workflow_streams_queue_position(engine, audit_store, monkeypatch) -> None:
+    monkeypatch.setattr(limits, "WORKFLOW", Limiter("workflow", 1, max_waiting=4))
+    limits.WORKFLOW.acquire()
+
+    async def go():
+        events = []
+        handler = ConciergeWorkflow(timeout=10).run(message=MSG)
+        async for ev in handler.stream_events():
+            events.append(ev)
+            if isinstance(ev, QueuedEvent):
+                limits.WORKFLOW.release()
+        return events, await handler
+
+    events, result = asyncio.run(go())
+    queued = [e for e in events if isinstance(e, QueuedEvent)]
+    assert queued and queued[0].position == 1
+    assert result["decision"]["allow"] and limits.WORKFLOW.in_flight == 0
+
+
+def test_llm_requests_take_a_slot(monkeypatch) -> None:
+    monkeypatch.setattr(limits, "LLM", Limiter("llm", 1))
+
+    class Limited(_LimitedLLM, MockLLM):
+        pass
+
+    llm = Limited(max_tokens=4)
+    llm.chat([ChatMessage(role="user", content="hi")])
+
+    async def go():
+        await llm.achat([ChatMessage(role="user", content="hi")])
+        stream = await llm.astream_chat([ChatMessage(role="user", content="hi")])
+        assert limits.LLM.in_flight == 1
+        async for _ in stream:
+            pass
+
+    asyncio.run(go())
+    assert limits.LLM.stats()["acquired"] == 3 and limits.LLM.in_flight == 0
+
+
+def test_dotenv_configures_limits_and_tracing(tmp_path) -> None:
+    (tmp_path / ".env").write_text(f"WORKFLOW_CONCURRENCY=3\nTRACE_EXPORT=json\nTRACE_FILE={tmp_path / 't.jsonl'}\n")
+    code = "import basic.workflow; from basic import limits, tracing; print(limits.WORKFLOW.limit, len(tracing._PIPELINE.exporters))"
+    out = subprocess.run([sys.executable, "-c", code], cwd=tmp_path, capture_output=True, text=True, check=True)
+    assert out.stdout.split() == ["3", "1"]
@@ -0,0 +1,124 @@
+import asyncio
+import re
+
+import pytest
+from llama_index.core.base.llms.types import ChatMessage, MessageRole, TextBlock, ToolCallBlock
+from llama_index.core.llms.mock import MockFunctionCallingLLM
+
+from basic import llm_cache
+from basic.llm_cache import CachedLLM, LLMResponseCache
+
+
+class Scripted(CachedLLM, MockFunctionCallingLLM):
+    pass
+
+
+def _llm(calls: list) -> Scripted:
+    def respond(messages, **kwargs):
+        calls.append(messages)
+        if messages[-1].role == MessageRole.TOOL:
+            return ChatMessage(role=MessageRole.ASSISTANT, content="Allowed (DEV-1.1).")
+        email = re.search(r"user_email=([^;]+);", messages[-1].content).group(1)
+        return ChatMessage(role=MessageRole.ASSISTANT, blocks=[
+            TextBlock(text=f"Checking for {email}."),
+            ToolCallBlock(tool_call_id=f"call-{len(calls)}", tool_name="check_permissions",
+                          tool_kwargs={"user_email": email, "user_role": "Engineer", "resource": "database_access"})])
+
+    return Scripted(response_generator=respond)
+
+
+def _ask(email: str):
+    return [ChatMessage(role=MessageRole.SYSTEM, content="You are a concierge."),
+            ChatMessage(role=MessageRole.USER,
+                        content=f"[user_email={email}; role=Engineer] What's the policy on production DB access?")]
+
+
+def _tool_turn(messages, response, tool: str, output: str):
+    call = next(b for b in response.message.blocks if isinstance(b, ToolCallBlock))
+    call = call.model_copy(update={"tool_name": tool})
+    return messages + [ChatMessage(role=MessageRole.ASSISTANT, blocks=[call]),
+                       ChatMessage(role=MessageRole.TOOL, content=output,
+                                   additional_kwargs={"tool_call_id": call.tool_call_id})]
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    store = LLMResponseCache(":memory:", ttl=60)
+    monkeypatch.setenv("LLM_CACHE", "1")
+    monkeypatch.setattr(llm_cache, "_CACHE", store)
+    return store
+
+
+def test_same_question_from_another_user_is_a_hit(cache) -> None:
+    calls = []
+    llm = _llm(calls)
+    first = llm.chat(_ask("alice.chen@company.com"))
+    second = llm.chat(_ask("bob.martinez@company.com"))
+    assert len(calls) == 1 and cache.stats()["hits"] == 1
+    assert second.message.content == "Checking for bob.martinez@company.com."
+    (call,) = [b for b in second.message.blocks if isinstance(b, ToolCallBlock)]
+    assert call.tool_kwargs["user_email"] == "bob.martinez@company.com"
+    assert call.tool_call_id != first.message.blocks[1].tool_call_id
+
+    # Later turns match too: tool call ids are normalized out of the key.
+    llm.chat(_tool_turn(_ask("alice.chen@company.com"), first, "check_permissions", '{"allow": true}'))
+    llm.chat(_tool_turn(_ask("bob.martinez@company.com"), second, "check_permissions", '{"allow": true}'))
+    assert len(calls) == 2
+
+
+def test_different_tool_results_or_params_miss(cache) -> None:
+    calls = []
+    llm = _llm(calls)
+    first = llm.chat(_ask("alice.chen@company.com"))
+    llm.chat(_tool_turn(_ask("alice.chen@company.com"), first, "check_permissions", '{"allow": true}'))
+    llm.chat(_tool_turn(_ask("alice.chen@company.com"), first, "check_permissions", '{"allow": false}'))
+    llm.chat(_ask("alice.chen@company.com"), tool_choice="required")
+    assert len(calls) == 4
+
+
+def test_fetch_data_rows_bypass_the_cache(cache) -> None:
+    calls = []
+    llm = _llm(calls)
+    first = llm.chat(_ask("alice.chen@company.com"))
+    turn = _tool_turn(_ask("alice.chen@company.com"), first, "fetch_data", '{"rows": [{"salary": 1}]}')
+    llm.chat(turn)
+    llm.chat(turn)
+    assert len(calls) == 3 and cache.stats()["bypassed"] == 2 and len(cache) == 1
+
+
+def test_stream_hit_and_miss(cache) -> None:
+    calls = []
+    llm = _llm(calls)
+
+    async def go(email):
+        stream = await llm.astream_chat(_ask(email))
+        last = None
+        async for last in stream:
+            pass
+        return last
+
+    asyncio.run(go("alice.chen@company.com"))
+    hit = asyncio.run(go("bob.martinez@company.com"))
+    assert len(calls) == 1 and hit.message.content == "Checking for bob.martinez@company.com."
+
+
+def test_entries_expire_and_trim() -> None:
+    now = [0.0]
+    store = LLMResponseCache(":memory:", ttl=10, max_entries=2, clock=lambda: now[0])
+    for i in range(3):
+        now[0] += 1
+        store.set(f"k{i}", "v")
+    assert store.get("k0") == "v"
+    store.purge()
+    assert len(store) == 2 and store.get("k0") is None
+    now[0] += 10
+    assert store.get("k2") is None
+
+
+def test_disabled(monkeypatch) -> None:
+    monkeypatch.setenv("LLM_CACHE", "0")
+    calls = []
+    llm = _llm(calls)
+    llm.chat(_ask("alice.chen@company.com"))
+    llm.chat(_ask("alice.chen@company.com"))
+    assert len(calls) == 2
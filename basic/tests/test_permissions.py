@@ -0,0 +1,88 @@
+import asyncio
+
+from basic.skills import core
+from basic.skills.policy_notes import PolicyNotes
+
+
+def test_salary_rules(engine) -> None:
+    hr = core.check_permissions("grace.patel@company.com", "HR", "salary", "read", 101)
+    eng = core.check_permissions("bob.martinez@company.com", "Engineer", "salary", "read", 101)
+    assert hr["allow"] and "HR-1.1" in hr["reason"]
+    assert not eng["allow"]
+
+
+def test_performance_relationships(engine) -> None:
+    own = core.check_permissions("alice.chen@company.com", "Senior Engineer", "performance_summary", "read", 101)
+    mgr = core.check_permissions("isabel.santos@company.com", "Engineering Manager", "performance_summary", "read", 101)
+    other = core.check_permissions("isabel.santos@company.com", "Engineering Manager", "performance_summary", "read", 105)
+    assert own["allow"] and "own reviews" in own["reason"]
+    assert mgr["allow"] and "direct reports" in mgr["reason"]
+    assert not other["allow"]
+
+
+def test_decisions_are_cached_per_relationship(engine) -> None:
+    core.check_permissions("grace.patel@company.com", "HR", "salary", "read", 101)
+    core.check_permissions("grace.patel@company.com", "HR", "salary", "read", 102)
+    assert engine.calls == 1
+    stats = core.decision_cache_stats()
+    assert stats["hits"] >= 1
+    core.invalidate_decisions()
+    core.check_permissions("grace.patel@company.com", "HR", "salary", "read", 101)
+    assert core.decision_cache_stats()["size"] == 1
+    assert engine.calls == 1  # the policy note is remembered across invalidations
+
+
+def test_precomputed_notes_skip_llm(engine, tmp_path) -> None:
+    built = PolicyNotes.build(engine, ["salary"], ["HR", "Engineer"])
+    assert engine.calls == 2
+    built.save(tmp_path / "notes.json")
+    core.NOTES = PolicyNotes.load(tmp_path / "notes.json")
+    d = core.check_permissions("bob.martinez@company.com", "Engineer", "salary", "read")
+    assert d["policy_section"] == "HR-1.1"
+    assert engine.calls == 2
+
+
+def test_precompute_covers_every_policy_resource(engine) -> None:
+    # What scripts/build_policy_notes.py builds: no decision on any policy resource falls back to RAG.
+    core.NOTES = asyncio.run(PolicyNotes.abuild(engine, core.RESOURCES, core.policy_note_roles()))
+    built = engine.calls
+    assert {"production_database", "customers", "audit_logs"} <= set(core.RESOURCES)
+    for email, role in zip(core.EMP["email"], core.EMP["role"]):
+        for resource in core.RESOURCES:
+            core.check_permissions(email, role, resource, "read")
+    assert engine.calls == built
+
+
+def test_async_check_permissions(engine) -> None:
+    d = asyncio.run(core.acheck_permissions("grace.patel@company.com", "HR", "salary", "read", 101))
+    assert d["allow"] and d["policy_section"] == "HR-1.1"
+    assert engine.calls == 1
+
+
+def test_bulk_matches_single_checks_and_dedupes_lookups(engine) -> None:
+    reqs = [
+        ("grace.patel@company.com", "HR", "salary", "read", 101),
+        {"user_email": "bob.martinez@company.com", "user_role": "Engineer", "resource": "salary", "action": "read"},
+        ("isabel.santos@company.com", "Engineering Manager", "performance_summary", "read", 101),
+        ("grace.patel@company.com", "HR", "salary", "read", 102),
+    ]
+    bulk = core.check_permissions_bulk(reqs)
+    assert [d["allow"] for d in bulk] == [True, False, True, True]
+    calls = engine.calls
+    assert calls == 3  # one note per distinct (resource, role)
+    core.invalidate_decisions()
+    single = [core.check_permissions(**r) if isinstance(r, dict) else core.check_permissions(*r) for r in reqs]
+    assert single == bulk and engine.calls == calls
+
+
+def test_abuild_matches_build(engine) -> None:
+    built = asyncio.run(PolicyNotes.abuild(engine, ["salary", "directory"], ["HR", "Engineer", "HR"]))
+    assert len(built) == 4 and engine.calls == 4
+    assert built.get("directory", "HR") == {"note": "See HR-1.1.", "section": "HR-1.1"}
+
+
+def test_skip_level_relationship() -> None:
+    d = core.EMPLOYEES.current.directory
+    assert core._relationship("nancy.chen@company.com", 101, d) == "chain"
+    assert core._relationship("isabel.santos@company.com", 101, d) == "manager"
+    assert core._relationship("lisa.brown@company.com", 101, d) == "other"
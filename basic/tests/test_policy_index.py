@@ -0,0 +1,115 @@
+import json
+
+import numpy as np
+
+from basic import policy_index, policies
+from basic.policy_index import HashingEmbedding, LocalPolicyIndex, LocalPolicyRetriever, open_index
+from basic.skills.policy_notes import PolicyNotes
+
+
+def _retriever(tmp_path, **kw) -> LocalPolicyRetriever:
+    embed = HashingEmbedding()
+    return LocalPolicyRetriever(open_index("hashing-1024", embed, index_dir=tmp_path / "idx", **kw), embed)
+
+
+def test_corpus_has_unique_sections() -> None:
+    docs = policies.load_policies()
+    assert len(docs) >= 20
+    assert len({d["section"] for d in docs}) == len(docs)
+    assert policies.policy_uuid("HR-1.1") == policies.policy_uuid("HR-1.1") != policies.policy_uuid("HR-1.2")
+
+
+def test_hashing_embedding_is_deterministic_and_normalized() -> None:
+    a, b = HashingEmbedding().embed("Salary access for HR"), HashingEmbedding().embed("salary  access for hr")
+    assert a == b
+    assert abs(np.linalg.norm(a) - 1) < 1e-6
+
+
+def test_policy_questions_hit_their_section(tmp_path) -> None:
+    r = _retriever(tmp_path)
+    expected = {"salary": "HR-1.1", "performance_summary": "HR-1.2",
+                "financial_report": "FIN-1.1", "directory": "GEN-1.1"}
+    for resource, section in expected.items():
+        nodes = r.retrieve(PolicyNotes.question(resource, "Engineer"))
+        assert nodes[0].node.metadata["section"] == section
+        assert len(nodes) == 5 and nodes[0].score >= nodes[-1].score
+    assert r.retrieve("production database write access")[0].node.metadata["section"] == "DEV-1.2"
+
+
+def test_index_is_memory_mapped_and_rebuilt_when_corpus_changes(tmp_path) -> None:
+    r = _retriever(tmp_path)
+    assert isinstance(r.index.vectors, np.memmap)
+    assert r.index.vectors.shape == (len(policies.load_policies()), 1024)
+
+    corpus = tmp_path / "policies.json"
+    corpus.write_text(json.dumps({"version": 2, "policies": [
+        {"title": "Snack Policy", "section": "GEN-9.9", "text": "Snacks are free.", "tags": ["food"]}]}))
+    index = open_index("hashing-1024", HashingEmbedding(), policies_path=corpus, index_dir=tmp_path / "idx")
+    assert [d["section"] for d in index.docs] == ["GEN-9.9"]
+    assert LocalPolicyIndex.load(tmp_path / "idx", mmap=False).docs == index.docs
+
+
+def test_backend_is_selected_by_config(monkeypatch) -> None:
+    sentinel = object()
+    monkeypatch.setattr(policy_index, "get_local_query_engine", lambda: sentinel)
+    monkeypatch.setenv("POLICY_RETRIEVER", "local")
+    assert policies.get_policy_query_engine() is sentinel
+
+
+def test_auto_filter_restricts_candidates(tmp_path) -> None:
+    r = _retriever(tmp_path)
+    r.auto_filter = True
+    nodes = r.retrieve(PolicyNotes.question("salary", "Engineer"))
+    assert {n.node.metadata["section"] for n in nodes} == {"HR-1.1"}
+    assert len(r.retrieve("unrelated words only")) == 5
+
+
+def test_retrieve_many_matches_single_queries(tmp_path) -> None:
+    r = _retriever(tmp_path)
+    r.auto_filter = True
+    queries = [PolicyNotes.question(res, "Engineer") for res in ("salary", "directory", "api_keys")]
+    queries += ["kubectl access", "HR-2.1"]
+    many = r.retrieve_many(queries)
+    for batch, q in zip(many, queries):
+        single = r.retrieve(q)
+        assert [n.node.metadata["section"] for n in batch] == [n.node.metadata["section"] for n in single]
+        assert np.allclose([n.score for n in batch], [n.score for n in single], atol=1e-5)
+
+
+def test_save_swaps_vectors_and_meta_together(tmp_path) -> None:
+    docs = policies.load_policies()
+    embed = HashingEmbedding()
+    LocalPolicyIndex.build(docs[:3], embed, {"n": 3}).save(tmp_path)
+    old = LocalPolicyIndex.load(tmp_path)
+    LocalPolicyIndex.build(docs, embed, {"n": len(docs)}).save(tmp_path)
+    LocalPolicyIndex.build(docs[:5], embed, {"n": 5}).save(tmp_path)
+    new = LocalPolicyIndex.load(tmp_path)
+    assert new.meta["n"] == len(new.docs) == len(new.vectors) == 5
+    assert len(old.vectors) == 3  # a reader holding the previous version is unaffected
+    assert len([p for p in tmp_path.iterdir() if p.is_dir()]) == 2
+
+
+def test_policy_change_resets_local_engine(monkeypatch) -> None:
+    from basic.skills import core
+
+    built = []
+    monkeypatch.setattr(policy_index, "build_local_query_engine", lambda: built.append(object()) or built[-1])
+    policy_index.reset_local_query_engine()
+    first = policy_index.get_local_query_engine()
+    assert policy_index.get_local_query_engine() is first
+    core.invalidate_decisions(policies_changed=True)
+    assert policy_index.get_local_query_engine() is not first
+    policy_index.reset_local_query_engine()
+
+
+def test_rag_answers_use_the_configured_llm(monkeypatch, tmp_path) -> None:
+    from llama_index.core.llms.mock import MockLLM
+
+    from basic import llm as basic_llm
+
+    llm = MockLLM()
+    monkeypatch.setattr(basic_llm, "get_llm", lambda: llm)
+    monkeypatch.setattr(policy_index, "build_local_retriever", lambda top_k: _retriever(tmp_path))
+    qe = policy_index.build_local_query_engine()
+    assert qe._response_synthesizer._llm is llm
+    assert qe.query("Which policy governs salary access for role HR?").response
@@ -0,0 +1,134 @@
+from contextlib import contextmanager
+from types import SimpleNamespace
+
+import pytest
+
+from basic import policy_sync
+from basic.policies import load_policies, load_policy_file, policy_uuid
+
+
+class FakeCollection:
+    """Weaviate collection stand-in: objects keyed by uuid, with write counters."""
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.objects = {}
+        self.writes = 0
+        self.deletes = 0
+        self.batch = SimpleNamespace(dynamic=self._dynamic, failed_objects=[])
+        self.data = SimpleNamespace(delete_many=self._delete_many)
+        self.aggregate = SimpleNamespace(over_all=lambda total_count: SimpleNamespace(total_count=len(self.objects)))
+
+    def iterator(self, return_properties=None):
+        for uid, props in self.objects.items():
+            yield SimpleNamespace(uuid=uid, properties={k: props.get(k) for k in return_properties})
+
+    @contextmanager
+    def _dynamic(self):
+        def add_object(properties, uuid):
+            self.writes += 1
+            self.objects[uuid] = dict(properties)
+        yield SimpleNamespace(add_object=add_object)
+
+    def _delete_many(self, where):
+        self.deletes += 1
+        for uid in where.value:
+            self.objects.pop(uid, None)
+
+
+class FakeClient:
+    def __init__(self) -> None:
+        self.stores = {}
+        self.aliases = {}
+        self.collections = SimpleNamespace(
+            exists=lambda name: name in self.stores, get=lambda name: self.stores[self.aliases.get(name, name)],
+            create=self._create, delete=lambda name: self.stores.pop(name))
+        self.alias = SimpleNamespace(
+            get=lambda alias_name: (SimpleNamespace(alias=alias_name, collection=self.aliases[alias_name])
+                                    if alias_name in self.aliases else None),
+            create=lambda alias_name, target_collection: self.aliases.__setitem__(alias_name, target_collection),
+            update=lambda alias_name, new_target_collection: self.aliases.__setitem__(alias_name, new_target_collection))
+
+    def _create(self, name, vector_config=None):
+        assert name not in self.stores
+        self.stores[name] = FakeCollection(name)
+        return self.stores[name]
+
+
+DOCS = load_policies()
+
+
+def test_sync_is_incremental_and_idempotent() -> None:
+    col = FakeCollection("Policies")
+    first = policy_sync.sync_collection(col, DOCS)
+    assert len(first.added) == len(DOCS) and col.writes == len(DOCS)
+    assert set(col.objects) == {policy_uuid(d["section"]) for d in DOCS}
+
+    again = policy_sync.sync_collection(col, DOCS)
+    assert not again.changed and again.unchanged == len(DOCS) and col.writes == len(DOCS)
+
+    edited = [dict(DOCS[0], text=DOCS[0]["text"] + " Amended.")] + DOCS[2:]
+    result = policy_sync.sync_collection(col, edited)
+    assert result.updated == [DOCS[0]["section"]] and not result.added
+    assert result.deleted == [policy_uuid(DOCS[1]["section"])]
+    assert col.writes == len(DOCS) + 1 and col.deletes == 1
+    assert col.objects[policy_uuid(DOCS[0]["section"])]["content_hash"] == policy_sync.content_hash(edited[0])
+
+
+def test_dry_run_and_legacy_objects() -> None:
+    col = FakeCollection("Policies")
+    col.objects[policy_uuid(DOCS[0]["section"])] = dict(DOCS[0])  # loaded before content hashes existed
+    result = policy_sync.sync_collection(col, DOCS, dry_run=True)
+    assert result.updated == [DOCS[0]["section"]] and len(result.added) == len(DOCS) - 1
+    assert col.writes == 0
+
+
+def test_duplicate_sections_rejected() -> None:
+    with pytest.raises(ValueError):
+        policy_sync.plan({}, [DOCS[0], DOCS[0]])
+
+
+def test_rebuild_swaps_alias() -> None:
+    client = FakeClient()
+    client.stores["Policies"] = FakeCollection("Policies")  # pre-alias layout
+    policy_sync.sync(client, DOCS, version=1)  # syncs in place until a rebuild
+    assert client.stores["Policies"].writes == len(DOCS) and not client.aliases
+
+    policy_sync.sync(client, DOCS, version=1, full_rebuild=True)
+    first = client.aliases["Policies"]
+    assert first.startswith("Policies_v1_") and set(client.stores) == {first}
+
+    client.stores.pop(first)
+    client.stores["Policies_v1_old"] = FakeCollection("Policies_v1_old")
+    client.aliases["Policies"] = "Policies_v1_old"
+    result = policy_sync.sync(client, DOCS[:3], version=2, full_rebuild=True, keep_old=True)
+    assert client.aliases["Policies"] == result.collection and result.collection.startswith("Policies_v2_")
+    assert "Policies_v1_old" in client.stores and len(client.stores[result.collection].objects) == 3
+
+    policy_sync.sync(client, DOCS[:4], version=2)
+    assert len(client.collections.get("Policies").objects) == 4
+
+
+def test_yaml_policy_file(tmp_path) -> None:
+    yaml = pytest.importorskip("yaml")
+    path = tmp_path / "policies.yaml"
+    path.write_text(yaml.safe_dump({"version": 3, "policies": DOCS[:2]}))
+    assert load_policy_file(path) == (3, DOCS[:2])
+
+
+def test_engine_builds_against_the_alias_after_rebuild(monkeypatch) -> None:
+    from llama_index.core.llms.mock import MockLLM
+
+    from basic import retrieval
+
+    client = FakeClient()
+    target = policy_sync.rebuild(client, DOCS, version=1).collection
+    assert "Policies" not in client.stores and policy_sync.resolve(client) == target
+    client.stores[target].query = SimpleNamespace(near_text=lambda query, limit: SimpleNamespace(objects=[]))
+    pool = SimpleNamespace(get=lambda: client, generation=1, report_error=lambda e, c: None)
+    monkeypatch.setattr(retrieval, "get_pool", lambda: pool)
+    monkeypatch.setattr(retrieval, "policy_llm", MockLLM)
+    monkeypatch.setattr(retrieval, "_ENGINE", None)
+    assert retrieval.get_policy_query_engine() is not None
+    assert retrieval.simple_policy_search("salary") == "No relevant policies found"
+    assert policy_sync.resolve(FakeClient()) is None
@@ -0,0 +1,30 @@
+import os
+
+from basic.skills.reloader import FileReloader
+
+
+def _bump(path, text: str) -> None:
+    path.write_text(text)
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+
+def test_swaps_only_on_change(tmp_path) -> None:
+    path = tmp_path / "f.txt"
+    path.write_text("a")
+    swapped = []
+    r = FileReloader(path, lambda p: p.read_text(), on_swap=swapped.append, interval=0)
+    assert r.current == "a"
+    assert not r.check()
+    _bump(path, "bb")
+    assert r.check()
+    assert r.current == "bb" and swapped == ["bb"] and r.version == 2
+
+
+def test_failed_build_keeps_last_snapshot(tmp_path) -> None:
+    path = tmp_path / "n.txt"
+    path.write_text("1")
+    r = FileReloader(path, lambda p: int(p.read_text()), interval=0)
+    _bump(path, "not a number")
+    assert not r.check()
+    assert r.current == 1
@@ -0,0 +1,142 @@
+import asyncio
+from types import SimpleNamespace
+
+from llama_index.core.schema import QueryBundle
+
+from basic.policies import PolicyFilter, policy_filter
+from basic.retrieval import WeaviateDirectRetriever
+from basic.skills.policy_notes import PolicyNotes
+
+
+def _obj(section: str, distance: float):
+    return SimpleNamespace(
+        uuid=section,
+        properties={"title": f"T {section}", "section": section, "text": "body", "tags": ["hr"]},
+        metadata=SimpleNamespace(distance=distance),
+    )
+
+
+class FakeQuery:
+    def __init__(self, objects, filtered=None) -> None:
+        self.objects = objects
+        self.filtered = objects if filtered is None else filtered
+        self.calls = []
+        self.requests = []
+
+    def near_text(self, query, limit, return_metadata=None, filters=None):
+        self.calls.append(query)
+        self.requests.append(("near_text", filters))
+        return SimpleNamespace(objects=(self.objects if filters is None else self.filtered)[:limit])
+
+    def hybrid(self, query, limit, alpha=None, query_properties=None, return_metadata=None, filters=None):
+        self.requests.append(("hybrid", filters))
+        objects = [SimpleNamespace(uuid=o.uuid, properties=o.properties, metadata=SimpleNamespace(score=0.7))
+                   for o in (self.objects if filters is None else self.filtered)]
+        return SimpleNamespace(objects=objects[:limit])
+
+
+class FakeAsyncQuery(FakeQuery):
+    async def near_text(self, query, limit, return_metadata=None, filters=None):
+        return FakeQuery.near_text(self, query, limit, return_metadata, filters)
+
+    async def hybrid(self, query, limit, **kwargs):
+        return FakeQuery.hybrid(self, query, limit, **kwargs)
+
+
+class FakeClient:
+    def __init__(self, query) -> None:
+        self.collections = SimpleNamespace(get=lambda name: SimpleNamespace(query=query))
+
+
+OBJECTS = [_obj("HR-1.1", 0.2), _obj("HR-1.2", 0.4)]
+
+
+def test_retrieve_builds_nodes() -> None:
+    r = WeaviateDirectRetriever(FakeClient(FakeQuery(OBJECTS)), top_k=1)
+    nodes = r.retrieve("salary")
+    assert len(nodes) == 1
+    assert nodes[0].node.metadata["section"] == "HR-1.1"
+    assert nodes[0].node.metadata["tags"] == ["hr"]
+    assert abs(nodes[0].score - 0.8) < 1e-9
+
+
+def test_aretrieve_uses_async_client() -> None:
+    aquery = FakeAsyncQuery(OBJECTS)
+    aclient = FakeClient(aquery)
+
+    async def get_client():
+        return aclient
+
+    r = WeaviateDirectRetriever(FakeClient(FakeQuery([])), top_k=5, async_client=get_client)
+    nodes = asyncio.run(r._aretrieve(QueryBundle("salary")))
+    assert [n.node.metadata["section"] for n in nodes] == ["HR-1.1", "HR-1.2"]
+    assert aquery.calls == ["salary"]
+
+
+def test_policy_filter_from_query() -> None:
+    assert policy_filter(PolicyNotes.question("salary", "Engineer")) == PolicyFilter(sections=("HR-1.1",))
+    assert policy_filter("what does hr-1.2 say?") == PolicyFilter(sections=("HR-1.2",))
+    assert policy_filter("lunch menu").empty
+    assert policy_filter("anything", resource="financial_report").sections == ("FIN-1.1",)
+    assert policy_filter("anything", resource="production_database").sections == ("DEV-1.1", "DEV-1.2")
+
+
+def test_resource_sections_follow_the_policy_file(tmp_path) -> None:
+    from basic.policies import resource_sections
+
+    path = tmp_path / "policies.json"
+    path.write_text('{"policies": [{"section": "OPS-1.1", "resource": "pager"}, {"section": "OPS-1.2"}]}')
+    assert resource_sections(path) == {"pager": ("OPS-1.1",)}
+
+
+def test_hybrid_search_is_filtered_server_side() -> None:
+    query = FakeQuery(OBJECTS, filtered=OBJECTS[:1])
+    r = WeaviateDirectRetriever(FakeClient(query), mode="hybrid", auto_filter=True)
+    nodes = r.retrieve(PolicyNotes.question("salary", "HR"))
+    assert [n.node.metadata["section"] for n in nodes] == ["HR-1.1"]
+    assert nodes[0].score == 0.7
+    ((method, filters),) = query.requests
+    assert method == "hybrid" and filters is not None
+
+
+def test_empty_filtered_result_falls_back_to_unfiltered() -> None:
+    aquery = FakeAsyncQuery(OBJECTS, filtered=[])
+    aclient = FakeClient(aquery)
+
+    async def get_client():
+        return aclient
+
+    r = WeaviateDirectRetriever(FakeClient(FakeQuery([])), async_client=get_client, auto_filter=True)
+    nodes = asyncio.run(r._aretrieve(QueryBundle("Which policy covers SEC-9.9?")))
+    assert len(nodes) == 2
+    assert [f is None for _, f in aquery.requests] == [False, True]
+
+
+def test_retrieve_many_keeps_order_and_dedupes() -> None:
+    query = FakeQuery(OBJECTS)
+    r = WeaviateDirectRetriever(FakeClient(query), top_k=1)
+    results = r.retrieve_many(["a", "b", "a"])
+    assert [len(x) for x in results] == [1, 1, 1]
+    assert sorted(query.calls) == ["a", "b"]
+
+    aquery = FakeAsyncQuery(OBJECTS)
+    aclient = FakeClient(aquery)
+
+    async def get_client():
+        return aclient
+
+    r = WeaviateDirectRetriever(FakeClient(FakeQuery([])), async_client=get_client)
+    results = asyncio.run(r.aretrieve_many(["x", "y", "x"], max_concurrency=2))
+    assert [len(x) for x in results] == [2, 2, 2] and sorted(aquery.calls) == ["x", "y"]
+
+
+def test_query_errors_report_the_client_they_used() -> None:
+    class Failing(FakeQuery):
+        def near_text(self, query, limit, return_metadata=None, filters=None):
+            raise TimeoutError("slow")
+
+    errors = []
+    client = FakeClient(Failing([]))
+    r = WeaviateDirectRetriever(client, on_error=lambda e, c: errors.append((type(e), c)))
+    assert r.retrieve("salary") == []
+    assert errors == [(TimeoutError, client)]
@@ -0,0 +1,125 @@
+import itertools
+import json
+
+import pytest
+
+from basic.policies import load_policies, load_role_groups
+from basic.skills import core
+from basic.skills.rules import RuleEngine
+
+HR = {"HR", "HR Manager", "HR Director", "Admin"}
+LEGACY_RESOURCES = ("directory", "performance_summary", "salary", "financial_report")
+
+
+def _legacy(role, resource, relationship, report_type) -> bool:
+    """The hand-written rules check_permissions used before they were compiled from policies.json."""
+    if resource == "directory":
+        return True
+    if resource == "performance_summary":
+        return role in HR or relationship == "self" or (relationship == "manager" and role.endswith("Manager"))
+    if resource == "salary":
+        return role in HR
+    if resource == "financial_report":
+        return role in {"Finance", "CFO", "CEO"} or (role == "Executive" and report_type == "quarterly")
+    return False
+
+
+def test_compiled_rules_match_legacy_rules() -> None:
+    rules = RuleEngine.load(core.POLICIES_PATH)
+    roles = sorted(set(core.EMP["role"]) | HR | {"Finance", "CFO", "CEO", "Executive", "Intern", "Sales Manager"})
+    for role, resource, rel, rt in itertools.product(
+            roles, LEGACY_RESOURCES, ("none", "self", "manager", "other"), ("", "quarterly", "annual")):
+        d = rules.decide(role, resource, "read", rel, rt)
+        assert d.allow == _legacy(role, resource, rel, rt), (role, resource, rel, rt)
+        assert d.reasons and d.section
+
+
+def test_reasons_quote_the_policy() -> None:
+    rules = RuleEngine.load(core.POLICIES_PATH)
+    assert rules.decide("Engineer", "performance_summary", "read", "self").reasons == [
+        "Employees may access their own reviews (HR-1.2)."]
+    fin = rules.decide("Finance", "financial_report", "read")
+    assert fin.allow and not fin.requires_approval  # an allow is never pending approval
+    eng = rules.decide("Engineer", "financial_report", "read")
+    assert not eng.allow and eng.requires_approval and "requires approval" in eng.reasons[0]
+
+
+def test_actions_and_new_policies_need_no_code() -> None:
+    docs = load_policies() + [{"section": "OPS-9.1", "title": "Pager Access", "text": "SREs may page anyone.",
+                               "resource": "pager", "roles_allowed": ["SRE"],
+                               "roles_conditional": ["Senior Engineer (read-only)", "Intern (on weekends)",
+                                                     "Manager (reporting chain)"]}]
+    rules = RuleEngine.compile(docs, load_role_groups())
+    # Production database access needs approval this service does not record: denied, flagged.
+    dba = rules.decide("DBA", "production_database", "write")
+    assert not dba.allow and dba.requires_approval and "not on record" in dba.reasons[-1]
+    assert not rules.decide("Senior Engineer", "production_database", "write").requires_approval
+    assert rules.decide("Senior Engineer", "production_database", "read").requires_approval
+    assert rules.decide("SRE", "pager", "write").allow
+    assert rules.decide("Senior Engineer", "pager", "read").allow
+    assert not rules.decide("Senior Engineer", "pager", "write").allow
+    assert not rules.decide("Intern", "pager", "read").allow
+    assert rules.decide("Sales Manager", "pager", "read", "chain").allow
+    assert not rules.decide("Sales Manager", "performance_summary", "read", "chain").allow
+    unknown = rules.decide("Whoever", "unknown", "read")
+    assert not unknown.allow and unknown.reasons == ["No policy grants read access to unknown; denied by default."]
+
+
+def test_pattern_groups_cover_roles_seen_later() -> None:
+    rules = RuleEngine.compile(load_policies(), load_role_groups())
+    assert rules.decide("Brand New Manager", "performance_summary", "read", "manager").allow
+    assert not rules.decide("Brand New Lead", "performance_summary", "read", "manager").allow
+    assert rules.decide("Brand New Lead", "directory", "read").allow
+    assert {"HR", "HR Manager", "HR Director", "Admin", "Finance", "CFO", "CEO", "Executive"} <= core.RULE_ROLES
+    assert {"DBA", "Sales VP", "Compliance"} <= core.RULE_ROLES  # named only by the newer policies
+
+
+def test_resources_and_roles_follow_policy_reloads(monkeypatch, tmp_path) -> None:
+    assert set(core.RESOURCES) == set(core.RULES.resources()) and "production_database" in core.RESOURCES
+    doc = {"section": "OPS-9.1", "title": "Pager Access", "text": "", "resource": "pager",
+           "roles_allowed": ["Pager Duty"]}
+    path = tmp_path / "policies.json"
+    path.write_text(json.dumps({"policies": load_policies() + [doc], "role_groups": load_role_groups()}))
+    monkeypatch.setattr(core, "POLICIES_PATH", path)
+    try:
+        core.invalidate_decisions(policies_changed=True)
+        assert "pager" in core.RESOURCES and "Pager Duty" in core.RULE_ROLES
+        assert "Pager Duty" in core.policy_note_roles()
+    finally:
+        monkeypatch.undo()
+        core.invalidate_decisions(policies_changed=True)
+    assert "pager" not in core.RESOURCES
+
+
+def test_datasets_without_a_read_policy_are_denied(engine) -> None:
+    rules = RuleEngine.load(core.POLICIES_PATH)
+    for resource in ("ip_whitelist", "api_keys", "database_access"):
+        assert rules.rule(resource, "read") is None
+        assert not rules.decide("Engineer", resource, "read").allow
+        d = core.check_permissions("bob.martinez@company.com", "Engineer", resource, "read")
+        assert not d["allow"] and not d["requires_approval"]
+        with pytest.raises(PermissionError):
+            core.fetch_data(resource, user_email="bob.martinez@company.com")
+
+
+def test_own_accounts_are_scoped_to_rows(engine) -> None:
+    rules = RuleEngine.load(core.POLICIES_PATH)
+    ae = rules.decide("Account Executive", "customers", "read", "other")
+    assert ae.allow and ae.row_scope == "account_executive_id" and not ae.requires_approval
+    finance = rules.decide("Finance", "customers", "read")
+    assert finance.allow and not finance.row_scope
+    assert core.check_permissions("frank.zhang@company.com", "Account Executive", "customers", "read")[
+        "row_scope"] == "account_executive_id"
+
+    own = core.fetch_data("customers", user_email="frank.zhang@company.com", limit=100)
+    assert own["rows"] and {r["account_executive_id"] for r in own["rows"]} == {106}
+    assert own["total_rows"] == core.count_rows("customers", user_email="frank.zhang@company.com")
+    # Filters cannot widen the scope.
+    assert core.fetch_data("customers", {"account_executive_id": 203},
+                           user_email="frank.zhang@company.com")["rows"] == []
+    assert core.fetch_data("customers", user_email="frank.zhang@company.com",
+                           limit=100)["total_rows"] < core.DATA.count("customers")
+    with pytest.raises(PermissionError):
+        core.fetch_data("customers")
+    with pytest.raises(PermissionError):
+        core.fetch_data("customers", user_email="bob.martinez@company.com")
@@ -0,0 +1,81 @@
+import asyncio
+
+import pytest
+
+from basic import tracing
+from basic.tracing import InMemoryExporter, OTLPHttpExporter, span
+
+from test_fastpath import _run
+
+
+@pytest.fixture
+def spans():
+    exporter = InMemoryExporter()
+    previous = tracing.exporters()
+    tracing.configure([exporter])
+    yield exporter
+    tracing.configure(previous)
+
+
+def test_spans_nest_across_await(spans) -> None:
+    async def child():
+        await asyncio.sleep(0)
+        with span("child", n=1):
+            pass
+
+    def in_thread():
+        with span("thread"):
+            pass
+
+    async def go():
+        with span("parent") as p:
+            await asyncio.gather(child(), asyncio.to_thread(in_thread))
+        return p
+
+    parent = asyncio.run(go())
+    tracing.flush()
+    by_name = {s.name: s for s in spans.spans}
+    assert by_name["child"].parent_id == parent.span_id
+    assert by_name["thread"].parent_id == parent.span_id
+    assert by_name["child"].trace_id == parent.trace_id and by_name["child"].attributes == {"n": 1}
+    assert tracing.current_span() is None
+
+
+def test_error_is_recorded(spans) -> None:
+    with pytest.raises(KeyError):
+        with span("boom"):
+            raise KeyError("x")
+    tracing.flush()
+    (s,) = spans.spans
+    assert s.status == "error" and s.error.startswith("KeyError")
+
+
+def test_otlp_payload_shape() -> None:
+    with span("outer") as outer:
+        with span("inner", rows=3) as inner:
+            pass
+    body = OTLPHttpExporter("http://collector:4318/").payload([outer, inner])
+    out, inn = body["resourceSpans"][0]["scopeSpans"][0]["spans"]
+    assert "parentSpanId" not in out and inn["parentSpanId"] == out["spanId"]
+    assert inn["attributes"] == [{"key": "rows", "value": {"intValue": "3"}}]
+    assert int(inn["endTimeUnixNano"]) >= int(inn["startTimeUnixNano"])
+
+
+def test_fast_path_request_is_one_trace(engine, audit_store, spans) -> None:
+    _run("[user_email=grace.patel@company.com; role=HR] Show salary for employee_id 101")
+    from basic.skills import core
+    core.AUDIT.flush(timeout=2)
+    tracing.flush()
+    names = spans.names()
+    for name in ("workflow.route", "workflow.fast_path", "check_permissions", "directory.lookup",
+                 "rag.synthesis", "data.select", "audit.enqueue", "audit.write"):
+        assert name in names
+    by_name = {s.name: s for s in spans.spans}
+    route = by_name["workflow.route"]
+    assert route.attributes["route"] == "fast"
+    assert by_name["workflow.fast_path"].parent_id == route.span_id
+    assert by_name["check_permissions"].trace_id == route.trace_id
+    assert by_name["check_permissions"].attributes["cache_hit"] is False
+    assert by_name["data.select"].attributes["rows_returned"] == 1
+    assert [s.attributes["tool_name"] for s in spans.spans if s.name == "tool"] == \
+        ["check_permissions", "fetch_data", "audit_log"]
@@ -0,0 +1,60 @@
+from basic.weaviate_pool import WeaviateClientPool
+
+
+class FakeClient:
+    def __init__(self) -> None:
+        self.ready = True
+        self.closed = False
+
+    def is_ready(self) -> bool:
+        return self.ready
+
+    def close(self) -> None:
+        self.closed = True
+
+
+def test_pool_reuses_client() -> None:
+    made = []
+    pool = WeaviateClientPool(connect=lambda: made.append(FakeClient()) or made[-1], health_interval=0)
+    assert pool.get() is pool.get()
+    assert len(made) == 1
+    assert pool.generation == 1
+
+
+def test_pool_reconnects_when_unhealthy() -> None:
+    made = []
+    pool = WeaviateClientPool(connect=lambda: made.append(FakeClient()) or made[-1], health_interval=0)
+    first = pool.get()
+    first.ready = False
+    second = pool.get()
+    assert second is not first
+    assert first.closed
+    assert pool.generation == 2
+
+
+def test_pool_invalidate_and_close() -> None:
+    made = []
+    pool = WeaviateClientPool(connect=lambda: made.append(FakeClient()) or made[-1])
+    first = pool.get()
+    pool.invalidate()
+    assert first.closed
+    assert pool.get() is not first
+    pool.close()
+    pool.close()
+    assert made[-1].closed
+
+
+def test_only_connection_errors_close_the_shared_client() -> None:
+    made = []
+    pool = WeaviateClientPool(connect=lambda: made.append(FakeClient()) or made[-1], health_interval=60)
+    first = pool.get()
+    pool.report_error(ValueError("bad filter"), first)
+    assert not first.closed and pool.get() is first  # health-checked, still ready
+
+    pool.report_error(ConnectionError("reset"), first)
+    second = pool.get()
+    assert first.closed and second is not first
+    # Another thread that failed on the old connection must not close the new one.
+    pool.report_error(ConnectionError("reset"), first)
+    pool.invalidate(first)
+    assert not second.closed and pool.get() is second
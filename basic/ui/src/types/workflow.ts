@@ -14,6 +14,7 @@ export interface WorkflowResponse {
 
 export interface WorkflowResult {
 	answer?: string;
+	rows_returned?: number; // the rows were streamed as AnswerChunkEvents
 	steps?: WorkflowStep[];
 	tools_used?: ToolCall[];
 }
@@ -113,3 +114,46 @@ export interface UIState {
 	messages: ChatMessage[];
 	currentWorkflowId?: string;
 }
+
+// Events streamed by ConciergeWorkflow before the final result (src/basic/events.py)
+export interface QueuedEvent {
+	position: number;
+	queue_depth: number;
+}
+
+export interface TokenDeltaEvent {
+	delta: string;
+}
+
+export interface ToolCallStartedEvent {
+	tool_name: string;
+	tool_id: string;
+	input: Record<string, any>;
+}
+
+// fetch_data rows are not repeated in `output`; they arrive as AnswerChunkEvents.
+export interface ToolCallFinishedEvent {
+	tool_name: string;
+	tool_id: string;
+	output: any;
+	duration_ms: number;
+	status: "completed" | "failed";
+}
+
+export interface PermissionDecisionEvent {
+	resource: string;
+	action: string;
+	allow: boolean;
+	reason: string;
+	policy_section: string;
+}
+
+// Rows of one fetch_data call, at most ANSWER_CHUNK_ROWS per chunk. Chunks sharing a
+// tool_id arrive in index order, the final one with last = true.
+export interface AnswerChunkEvent {
+	index: number;
+	text: string;
+	rows: Record<string, any>[];
+	tool_id: string;
+	last: boolean;
+}
@@ -0,0 +1,21 @@
+# scripts/access_review.py
+# Compliance "who can see what" review: every employee x resource x action,
+# decided from the compiled policy rules (no Weaviate or LLM calls), saved as
+# logs/access_review/access-<ts>.npz and diffed against the previous run.
+import os
+from pathlib import Path
+from basic.skills.core import BASE, EMPLOYEES, RULES
+from basic.skills.access_review import run
+
+out_dir = Path(os.getenv("ACCESS_REVIEW_DIR", BASE / "logs" / "access_review"))
+path, changes = run(EMPLOYEES.current.emp, RULES, out_dir)
+print(f"✅ Wrote {path}")
+if changes is None:
+    print("   first run, nothing to diff")
+elif changes.empty:
+    print("   no changes since the previous run")
+else:
+    print(f"   {len(changes)} changed cells since the previous run: "
+          + ", ".join(f"{n} {k}" for k, n in changes["change"].value_counts().items()))
+    for row in changes.head(20).itertuples():
+        print(f"   {row.employee_id} {row.resource}:{row.action} {row.before or '-'} -> {row.after or '-'}")
@@ -0,0 +1,28 @@
+# scripts/build_policy_notes.py
+# Precompute the policy note + section for every (resource, role) pair so that
+# check_permissions never needs an LLM synthesis for known pairs. Resources are
+# every resource data/policies.json governs; roles are employees.csv's plus the
+# roles the policies name.
+# Re-run after bootstrap_policies.py changes the Policies collection.
+# With POLICY_RETRIEVER=local the notes come from the in-process policy index.
+# Notes are synthesized by the configured OPENAI_MODEL (basic.policies.policy_llm).
+import asyncio
+from basic.policies import retriever_backend
+from basic.skills import core
+from basic.skills.policy_notes import PolicyNotes
+
+if retriever_backend() == "local":
+    from basic.policy_index import build_local_query_engine
+
+    notes = asyncio.run(PolicyNotes.abuild(build_local_query_engine(), core.RESOURCES, core.policy_note_roles()))
+else:
+    from basic.retrieval import build_policy_query_engine
+
+    qe, client = build_policy_query_engine()
+    try:
+        notes = asyncio.run(PolicyNotes.abuild(qe, core.RESOURCES, core.policy_note_roles()))
+    finally:
+        client.close()
+
+notes.save(core.NOTES_PATH)
+print(f"✅ Wrote {len(notes)} policy notes for {len(core.RESOURCES)} resources to {core.NOTES_PATH}")